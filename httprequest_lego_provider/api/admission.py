@@ -0,0 +1,296 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Admission control of the record changes, bounding the git work each user can queue."""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from .metrics import ADMISSION_REJECTIONS, PENDING_RECORD_CHANGES
+from .settings import (
+    MAX_PENDING_RECORD_CHANGES,
+    RECORD_CHANGES_DRAIN_WINDOW,
+    USER_CONCURRENCY_LIMIT,
+    USER_RATE_BURST,
+    USER_RATE_LIMIT,
+)
+
+MAX_RETRY_AFTER = 300
+MAX_BUCKETS = 4096
+
+
+class AdmissionRejected(Exception):
+    """Exception raised when a record change is over the limits.
+
+    Attributes:
+        reason: the limit exceeded, "rate", "user_concurrency" or "pending".
+        retry_after: the number of seconds after which the change is expected to be admitted.
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        """Initialize the exception.
+
+        Args:
+            reason: the limit exceeded, "rate", "user_concurrency" or "pending".
+            retry_after: the number of seconds after which the change is expected to be
+                admitted.
+        """
+        super().__init__(f"Too many record changes ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _TokenBucket:
+    """Token bucket limiting the rate of the requests of a user.
+
+    Attributes:
+        tokens: the number of requests allowed immediately.
+        updated_at: the monotonic time the tokens were last refilled.
+    """
+
+    def __init__(self, burst: float, now: float):
+        """Initialize a full bucket.
+
+        Args:
+            burst: the capacity of the bucket.
+            now: the current monotonic time.
+        """
+        self.tokens = burst
+        self.updated_at = now
+
+
+class AdmissionSlot:
+    """Slot of pending git work held by an admitted record change, until released.
+
+    The slot is released once, when the change is applied or its job completes.
+    """
+
+    def __init__(self, controller: "AdmissionController", user_id: int, generation: int):
+        """Initialize the slot.
+
+        Args:
+            controller: the controller the slot was acquired from.
+            user_id: the identifier of the user holding the slot.
+            generation: the generation of the controller the slot was acquired in.
+        """
+        self._controller = controller
+        self._user_id = user_id
+        self._generation = generation
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        """Release the slot, unless already released."""
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._controller.release(self._user_id, self._generation)
+
+    def __enter__(self) -> "AdmissionSlot":
+        """Hold the slot.
+
+        Returns:
+            the slot.
+        """
+        return self
+
+    def __exit__(self, *_) -> None:
+        """Release the slot."""
+        self.release()
+
+
+class AdmissionController:
+    """Per-user rate and concurrency limits, and global cap on the pending record changes.
+
+    The limits are enforced per process, not shared between the worker processes and units, and
+    are disabled by default. The time to retry a rejected change is estimated from the rate at
+    which the pending changes completed over the drain window.
+
+    Attributes:
+        pending: the number of pending record changes.
+        generation: counter incremented whenever the pending changes are forgotten, so the slots
+            acquired before are not released twice.
+    """
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        user_rate: float,
+        user_burst: float,
+        user_concurrency: int,
+        max_pending: int,
+        drain_window: float,
+    ):
+        """Initialize the controller.
+
+        Args:
+            user_rate: the number of record changes per second allowed to each user, 0 for no
+                limit.
+            user_burst: the number of record changes each user can request at once.
+            user_concurrency: the number of pending record changes allowed to each user, 0 for
+                no limit.
+            max_pending: the number of pending record changes allowed to all the users, 0 for no
+                limit.
+            drain_window: the time in seconds over which the completion rate is measured.
+        """
+        self.user_rate = user_rate
+        self.user_burst = max(user_burst, 1)
+        self.user_concurrency = user_concurrency
+        self.max_pending = max_pending
+        self.drain_window = drain_window
+        self.pending = 0
+        self.generation = 0
+        self._pending_by_user: Dict[int, int] = {}
+        self._buckets: Dict[int, _TokenBucket] = {}
+        self._completions: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def _prune_completions(self, now: float) -> None:
+        """Forget the completions of the record changes older than the drain window.
+
+        Args:
+            now: the current monotonic time.
+        """
+        while self._completions and self._completions[0] <= now - self.drain_window:
+            self._completions.popleft()
+
+    def _get_drain_rate(self, now: float) -> float:
+        """Get the rate at which the pending record changes complete.
+
+        Args:
+            now: the current monotonic time.
+
+        Returns:
+            the number of changes completed per second over the drain window.
+        """
+        self._prune_completions(now)
+        return len(self._completions) / self.drain_window
+
+    def _get_retry_after(self, excess: int, now: float) -> int:
+        """Estimate the time until enough pending record changes complete.
+
+        Args:
+            excess: the number of changes to complete before a change is admitted.
+            now: the current monotonic time.
+
+        Returns:
+            the number of seconds to wait, the whole drain window if no change completed in it.
+        """
+        drain_rate = self._get_drain_rate(now)
+        if not drain_rate:
+            return min(math.ceil(self.drain_window), MAX_RETRY_AFTER)
+        return min(max(math.ceil(excess / drain_rate), 1), MAX_RETRY_AFTER)
+
+    def check_rate(self, user_id: int) -> None:
+        """Count a record change requested by a user against the rate limit.
+
+        Args:
+            user_id: the user identifier.
+
+        Raises:
+            AdmissionRejected: if the user requested too many changes recently.
+        """
+        if not self.user_rate:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if user_id not in self._buckets and len(self._buckets) >= MAX_BUCKETS:
+                self._forget_full_buckets(now)
+            bucket = self._buckets.setdefault(user_id, _TokenBucket(self.user_burst, now))
+            bucket.tokens = min(
+                bucket.tokens + (now - bucket.updated_at) * self.user_rate, self.user_burst
+            )
+            bucket.updated_at = now
+            if bucket.tokens < 1:
+                ADMISSION_REJECTIONS.labels(reason="rate").inc()
+                raise AdmissionRejected("rate", math.ceil((1 - bucket.tokens) / self.user_rate))
+            bucket.tokens -= 1
+
+    def acquire(self, user_id: int) -> AdmissionSlot:
+        """Acquire a slot of pending git work for a record change of a user.
+
+        Args:
+            user_id: the user identifier.
+
+        Returns:
+            the slot, to release once the change is applied.
+
+        Raises:
+            AdmissionRejected: if the user or all the users have too many pending changes.
+        """
+        now = time.monotonic()
+        with self._lock:
+            user_pending = self._pending_by_user.get(user_id, 0)
+            if self.user_concurrency and user_pending >= self.user_concurrency:
+                ADMISSION_REJECTIONS.labels(reason="user_concurrency").inc()
+                raise AdmissionRejected(
+                    "user_concurrency",
+                    self._get_retry_after(user_pending - self.user_concurrency + 1, now),
+                )
+            if self.max_pending and self.pending >= self.max_pending:
+                ADMISSION_REJECTIONS.labels(reason="pending").inc()
+                raise AdmissionRejected(
+                    "pending", self._get_retry_after(self.pending - self.max_pending + 1, now)
+                )
+            self._pending_by_user[user_id] = user_pending + 1
+            self.pending += 1
+        PENDING_RECORD_CHANGES.inc()
+        return AdmissionSlot(self, user_id, self.generation)
+
+    def release(self, user_id: int, generation: int) -> None:
+        """Release a slot of pending git work of a user, recording its completion.
+
+        Args:
+            user_id: the user identifier.
+            generation: the generation of the controller the slot was acquired in.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if generation != self.generation:
+                # The pending changes were forgotten by clear.
+                return
+            user_pending = self._pending_by_user.pop(user_id) - 1
+            if user_pending:
+                self._pending_by_user[user_id] = user_pending
+            self.pending -= 1
+            self._completions.append(now)
+            self._prune_completions(now)
+        PENDING_RECORD_CHANGES.dec()
+
+    def clear(self) -> None:
+        """Forget the pending record changes and the recent requests of all the users."""
+        with self._lock:
+            PENDING_RECORD_CHANGES.dec(self.pending)
+            self.generation += 1
+            self.pending = 0
+            self._pending_by_user.clear()
+            self._buckets.clear()
+            self._completions.clear()
+
+    def _forget_full_buckets(self, now: float) -> None:
+        """Forget the token buckets of the users idle long enough for them to be full.
+
+        Full buckets are equivalent to missing ones.
+
+        Args:
+            now: the current monotonic time.
+        """
+        refill = self.user_burst / self.user_rate
+        for user_id in [
+            user_id
+            for user_id, bucket in self._buckets.items()
+            if now - bucket.updated_at >= refill
+        ]:
+            del self._buckets[user_id]
+
+
+admission_controller = AdmissionController(
+    USER_RATE_LIMIT,
+    USER_RATE_BURST,
+    USER_CONCURRENCY_LIMIT,
+    MAX_PENDING_RECORD_CHANGES,
+    RECORD_CHANGES_DRAIN_WINDOW,
+)
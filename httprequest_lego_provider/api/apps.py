@@ -15,3 +15,8 @@ class ApiConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        """Connect the signal receivers."""
+        # pylint: disable=import-outside-toplevel,unused-import
+        from . import authentication, authorization  # noqa: F401
@@ -0,0 +1,171 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""HTTP Basic authentication caching the verified credentials."""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from django.contrib.auth.models import AbstractBaseUser, User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework.authentication import BasicAuthentication
+
+from .metrics import CREDENTIAL_CACHE
+from .settings import CREDENTIAL_CACHE_SIZE, CREDENTIAL_CACHE_TTL
+
+KEY_SALT = "api.authentication.CachedBasicAuthentication"
+
+
+class CredentialCache:
+    """LRU cache of the users whose credentials were recently verified.
+
+    The credentials are keyed by a HMAC of the username and password, keyed with the secret key
+    of the project, so neither the passwords nor their plain hashes are kept in memory.
+
+    Attributes:
+        generation: counter incremented whenever credentials are forgotten, so credentials
+            verified concurrently are not added back.
+    """
+
+    def __init__(self, size: int, ttl: float):
+        """Initialize the cache.
+
+        Args:
+            size: the maximum number of credentials kept.
+            ttl: the time in seconds after which the credentials are verified again.
+        """
+        self.size = size
+        self.ttl = ttl
+        self.generation = 0
+        self._entries: "OrderedDict[str, Tuple[AbstractBaseUser, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(username: str, password: str) -> str:
+        """Derive the cache key of credentials.
+
+        Args:
+            username: the username.
+            password: the password.
+
+        Returns:
+            the key.
+        """
+        return salted_hmac(KEY_SALT, f"{username}\0{password}", algorithm="sha256").hexdigest()
+
+    def get(self, key: str) -> AbstractBaseUser | None:
+        """Get the user whose credentials were verified.
+
+        Args:
+            key: the key of the credentials.
+
+        Returns:
+            a copy of the user, or None if the credentials were not verified recently.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            return copy.copy(entry[0])
+
+    def add(self, key: str, user: AbstractBaseUser, generation: int) -> None:
+        """Remember verified credentials, unless credentials were forgotten meanwhile.
+
+        Args:
+            key: the key of the credentials.
+            user: the authenticated user.
+            generation: the generation of the cache when the verification started.
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (copy.copy(user), time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def forget_user(self, user_id: int) -> None:
+        """Forget the credentials of a user.
+
+        Args:
+            user_id: the user identifier.
+        """
+        with self._lock:
+            self.generation += 1
+            for key in [key for key, (user, _) in self._entries.items() if user.pk == user_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Forget all the credentials."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+credential_cache = CredentialCache(CREDENTIAL_CACHE_SIZE, CREDENTIAL_CACHE_TTL)
+
+
+def _load_current_user(cached_user: AbstractBaseUser) -> AbstractBaseUser | None:
+    """Load a user whose credentials were verified, if still active with the same password.
+
+    Args:
+        cached_user: the user as verified.
+
+    Returns:
+        the user as currently stored, or None if deleted, deactivated or its password changed.
+    """
+    user = User.objects.filter(pk=cached_user.pk, is_active=True).first()
+    if user is None or not constant_time_compare(user.password, cached_user.password):
+        return None
+    return user
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """HTTP Basic authentication skipping the password hashing for recently verified credentials.
+
+    The clients send their credentials with every request, and hashing the password dominates
+    the cost of the requests. Each cache hit loads the user again, in a single query, and is
+    only accepted if the user is still active with the password hash the credentials were
+    verified against, so changes made by any process apply right away. Credentials are verified
+    again once expired, and as soon as the user is saved or deleted by the process.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        """Authenticate the userid and password, from the cache if verified recently.
+
+        Args:
+            userid: the username.
+            password: the password.
+            request: the HTTP request.
+
+        Returns:
+            the user and None as authentication token.
+        """
+        key = credential_cache.get_key(userid, password)
+        cached_user = credential_cache.get(key)
+        if cached_user is not None:
+            user = _load_current_user(cached_user)
+            if user is not None:
+                CREDENTIAL_CACHE.labels(result="hit").inc()
+                return (user, None)
+            credential_cache.forget_user(cached_user.pk)
+        CREDENTIAL_CACHE.labels(result="miss").inc()
+        generation = credential_cache.generation
+        user, auth = super().authenticate_credentials(userid, password, request)
+        credential_cache.add(key, user, generation)
+        return (user, auth)
+
+
+@receiver([post_save, post_delete], sender=User)
+def forget_user_credentials(instance: User, **_) -> None:
+    """Forget the verified credentials of a user when it changes, such as its password.
+
+    Args:
+        instance: the user.
+    """
+    credential_cache.forget_user(instance.pk)
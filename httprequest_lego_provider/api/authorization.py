@@ -0,0 +1,441 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Cached index of the domains the users are allowed to manage."""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Collection
+from typing import Dict, NamedTuple, Tuple
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .metrics import AUTHORIZATION_CACHE
+from .models import AuthorizationGeneration, Domain, DomainUserPermission, Zone
+from .settings import (
+    AUTHORIZATION_CACHE_SIZE,
+    AUTHORIZATION_CACHE_TTL,
+    AUTHORIZATION_GENERATION_TTL,
+)
+
+SHARED_CACHE_ALIAS = "authorization"
+GENERATION_KEY = "httprequest-lego-provider:authorization:generation"
+ENTRY_KEY_TEMPLATE = "httprequest-lego-provider:authorization:{generation}:{user_id}:{fqdn}"
+GENERATION_ROW_ID = 1
+
+_MISSING = object()
+
+
+class DomainGrant(NamedTuple):
+    """Permission of a user to manage the records of a domain.
+
+    Attributes:
+        fqdn: fully-qualified domain name.
+        backend: backend the records of the domain are written to.
+        zone: name of the zone of the domain, or empty if it has none.
+    """
+
+    fqdn: str
+    backend: str
+    zone: str
+
+
+class _Entry(NamedTuple):
+    """Cached authorization of a user on a FQDN.
+
+    Attributes:
+        grant: the permission, or None if the user is not allowed to manage the FQDN.
+        generation: the generation of the index the entry was loaded in.
+        expires_at: the monotonic time after which the entry is reloaded.
+    """
+
+    grant: DomainGrant | None
+    generation: int
+    expires_at: float
+
+
+def _grant_query(user_id: int, fqdn: str) -> QuerySet:
+    """Build the query of the permission of a user on a FQDN.
+
+    Args:
+        user_id: the user identifier.
+        fqdn: the FQDN.
+
+    Returns:
+        the query of the FQDN, backend and zone name of the domain.
+    """
+    return Domain.objects.filter(fqdn=fqdn, domainuserpermission__user_id=user_id).values_list(
+        "fqdn", "backend", "zone__name"
+    )
+
+
+def _to_grant(row: tuple | None) -> DomainGrant | None:
+    """Build the permission from a row of the permission query.
+
+    Args:
+        row: the row, or None if the user is not allowed to manage the FQDN.
+
+    Returns:
+        the permission, or None if the user is not allowed to manage the FQDN.
+    """
+    if row is None:
+        return None
+    fqdn, backend, zone = row
+    return DomainGrant(fqdn, backend, zone or "")
+
+
+def _load_grant(user_id: int, fqdn: str) -> DomainGrant | None:
+    """Load the permission of a user on a FQDN, in a single query.
+
+    Args:
+        user_id: the user identifier.
+        fqdn: the FQDN.
+
+    Returns:
+        the permission, or None if the user is not allowed to manage the FQDN.
+    """
+    return _to_grant(_grant_query(user_id, fqdn).first())
+
+
+def _load_grants(user_id: int, fqdns: Collection[str]) -> Dict[str, DomainGrant]:
+    """Load the permissions of a user on several FQDNs, in a single query.
+
+    Args:
+        user_id: the user identifier.
+        fqdns: the FQDNs.
+
+    Returns:
+        the permissions, by FQDN, for the FQDNs the user is allowed to manage.
+    """
+    rows = Domain.objects.filter(
+        fqdn__in=fqdns, domainuserpermission__user_id=user_id
+    ).values_list("fqdn", "backend", "zone__name")
+    return {grant.fqdn: grant for grant in map(_to_grant, rows)}
+
+
+def _load_generation() -> int:
+    """Load the generation of the index from the database.
+
+    Returns:
+        the generation, 0 if it was never moved.
+    """
+    generation = AuthorizationGeneration.objects.filter(pk=GENERATION_ROW_ID)
+    return generation.values_list("value", flat=True).first() or 0
+
+
+async def _aload_generation() -> int:
+    """Load the generation of the index from the database with the asynchronous ORM.
+
+    Returns:
+        the generation, 0 if it was never moved.
+    """
+    generation = AuthorizationGeneration.objects.filter(pk=GENERATION_ROW_ID)
+    return await generation.values_list("value", flat=True).afirst() or 0
+
+
+def _bump_generation() -> None:
+    """Move the generation of the index stored in the database to a new one."""
+    generation = AuthorizationGeneration.objects.filter(pk=GENERATION_ROW_ID)
+    if generation.update(value=F("value") + 1):
+        return
+    _, created = AuthorizationGeneration.objects.get_or_create(
+        pk=GENERATION_ROW_ID, defaults={"value": 1}
+    )
+    if not created:
+        generation.update(value=F("value") + 1)
+
+
+async def _aload_grant(user_id: int, fqdn: str) -> DomainGrant | None:
+    """Load the permission of a user on a FQDN with the asynchronous ORM, in a single query.
+
+    Args:
+        user_id: the user identifier.
+        fqdn: the FQDN.
+
+    Returns:
+        the permission, or None if the user is not allowed to manage the FQDN.
+    """
+    return _to_grant(await _grant_query(user_id, fqdn).afirst())
+
+
+class AuthorizationIndex:
+    """LRU cache of the permissions of the users on the FQDNs, with an optional shared tier.
+
+    Denials are cached as well. Any change to the domains, zones or permissions invalidates the
+    whole index by moving to a new generation, shared by all the processes so the changes made
+    by any of them, including the management commands, apply everywhere. The generation is kept
+    in the shared tier if any, which also holds the permissions loaded by the other processes.
+    Otherwise it is kept in the database, and read with a single primary key lookup at most once
+    per generation TTL, so the changes made by the other processes apply within that delay, and
+    the checks served from memory in between run no query.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        ttl: float,
+        shared: BaseCache | None = None,
+        generation_ttl: float = 0,
+    ):
+        """Initialize the index.
+
+        Args:
+            size: the maximum number of entries kept in memory.
+            ttl: the time in seconds after which an entry is reloaded.
+            shared: the cache shared by all the processes, if any, instead of the database.
+            generation_ttl: the time in seconds after which the generation is read again from
+                the database, when there is no shared tier.
+        """
+        self.size = size
+        self.ttl = ttl
+        self.shared = shared
+        self.generation_ttl = generation_ttl
+        self._entries: "OrderedDict[Tuple[int, str], _Entry]" = OrderedDict()
+        self._generation: Tuple[int, float] | None = None
+        self._lock = threading.Lock()
+
+    def _get_local_generation(self, now: float) -> int | None:
+        """Get the generation last read from the database, if read within the generation TTL.
+
+        Args:
+            now: the current monotonic time.
+
+        Returns:
+            the generation, or None if it has to be read again.
+        """
+        with self._lock:
+            if self._generation and self._generation[1] > now:
+                return self._generation[0]
+        return None
+
+    def _set_local_generation(self, generation: int, now: float) -> None:
+        """Keep the generation read from the database for the generation TTL.
+
+        Args:
+            generation: the generation read from the database.
+            now: the monotonic time the generation was read at.
+        """
+        with self._lock:
+            self._generation = (generation, now + self.generation_ttl)
+
+    def _get_generation(self) -> int:
+        """Get the current generation of the index.
+
+        Returns:
+            the generation, shared by all the processes.
+        """
+        if self.shared is not None:
+            return self.shared.get(GENERATION_KEY, 0)
+        now = time.monotonic()
+        generation = self._get_local_generation(now)
+        if generation is None:
+            generation = _load_generation()
+            self._set_local_generation(generation, now)
+        return generation
+
+    async def _aget_generation(self) -> int:
+        """Get the current generation of the index, querying the database asynchronously.
+
+        Returns:
+            the generation, shared by all the processes.
+        """
+        if self.shared is not None:
+            return await self.shared.aget(GENERATION_KEY, 0)
+        now = time.monotonic()
+        generation = self._get_local_generation(now)
+        if generation is None:
+            generation = await _aload_generation()
+            self._set_local_generation(generation, now)
+        return generation
+
+    def _get_cached(self, key: Tuple[int, str], generation: int, now: float) -> _Entry | None:
+        """Get an entry of the in-memory tier, if current.
+
+        Args:
+            key: the user identifier and FQDN.
+            generation: the current generation of the index.
+            now: the current monotonic time.
+
+        Returns:
+            the entry, or None if missing, stale or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.generation == generation and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                AUTHORIZATION_CACHE.labels(result="hit").inc()
+                return entry
+        return None
+
+    def _set_cached(
+        self, key: Tuple[int, str], grant: DomainGrant | None, generation: int, now: float
+    ) -> None:
+        """Store an entry in the in-memory tier, evicting the least recently used ones.
+
+        Args:
+            key: the user identifier and FQDN.
+            grant: the permission, or None if the user is not allowed to manage the FQDN.
+            generation: the generation the permission was loaded in.
+            now: the monotonic time the permission was looked up at.
+        """
+        with self._lock:
+            self._entries[key] = _Entry(grant, generation, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def get(self, user_id: int, fqdn: str) -> DomainGrant | None:
+        """Get the permission of a user on a FQDN.
+
+        Args:
+            user_id: the user identifier.
+            fqdn: the FQDN.
+
+        Returns:
+            the permission, or None if the user is not allowed to manage the FQDN.
+        """
+        generation = self._get_generation()
+        key = (user_id, fqdn)
+        now = time.monotonic()
+        if entry := self._get_cached(key, generation, now):
+            return entry.grant
+        grant = self._get_shared(generation, user_id, fqdn)
+        self._set_cached(key, grant, generation, now)
+        return grant
+
+    def get_many(self, user_id: int, fqdns: Collection[str]) -> Dict[str, DomainGrant | None]:
+        """Get the permissions of a user on several FQDNs.
+
+        The permissions missing from memory are loaded in a single query. The shared tier is not
+        used, the batches being rare enough.
+
+        Args:
+            user_id: the user identifier.
+            fqdns: the FQDNs.
+
+        Returns:
+            the permission on each FQDN, None if the user is not allowed to manage it.
+        """
+        generation = self._get_generation()
+        now = time.monotonic()
+        grants: Dict[str, DomainGrant | None] = {}
+        for fqdn in fqdns:
+            if entry := self._get_cached((user_id, fqdn), generation, now):
+                grants[fqdn] = entry.grant
+        missing = [fqdn for fqdn in fqdns if fqdn not in grants]
+        if missing:
+            AUTHORIZATION_CACHE.labels(result="miss").inc(len(missing))
+            loaded = _load_grants(user_id, missing)
+            for fqdn in missing:
+                grants[fqdn] = loaded.get(fqdn)
+                self._set_cached((user_id, fqdn), grants[fqdn], generation, now)
+        return grants
+
+    async def aget(self, user_id: int, fqdn: str) -> DomainGrant | None:
+        """Get the permission of a user on a FQDN, querying the database asynchronously.
+
+        Args:
+            user_id: the user identifier.
+            fqdn: the FQDN.
+
+        Returns:
+            the permission, or None if the user is not allowed to manage the FQDN.
+        """
+        generation = await self._aget_generation()
+        key = (user_id, fqdn)
+        now = time.monotonic()
+        if entry := self._get_cached(key, generation, now):
+            return entry.grant
+        grant = await self._aget_shared(generation, user_id, fqdn)
+        self._set_cached(key, grant, generation, now)
+        return grant
+
+    def _get_shared(self, generation: int, user_id: int, fqdn: str) -> DomainGrant | None:
+        """Get the permission of a user on a FQDN from the shared tier, or the database.
+
+        Args:
+            generation: the current generation of the index.
+            user_id: the user identifier.
+            fqdn: the FQDN.
+
+        Returns:
+            the permission, or None if the user is not allowed to manage the FQDN.
+        """
+        if self.shared is None:
+            AUTHORIZATION_CACHE.labels(result="miss").inc()
+            return _load_grant(user_id, fqdn)
+        key = ENTRY_KEY_TEMPLATE.format(generation=generation, user_id=user_id, fqdn=fqdn)
+        # Denials are stored as False, as the shared cache returns None for missing keys.
+        cached = self.shared.get(key, _MISSING)
+        if cached is not _MISSING:
+            AUTHORIZATION_CACHE.labels(result="shared_hit").inc()
+            return DomainGrant(*cached) if cached else None
+        AUTHORIZATION_CACHE.labels(result="miss").inc()
+        grant = _load_grant(user_id, fqdn)
+        self.shared.set(key, tuple(grant) if grant else False, self.ttl)
+        return grant
+
+    async def _aget_shared(self, generation: int, user_id: int, fqdn: str) -> DomainGrant | None:
+        """Get the permission of a user on a FQDN from the shared tier, or the database.
+
+        Args:
+            generation: the current generation of the index.
+            user_id: the user identifier.
+            fqdn: the FQDN.
+
+        Returns:
+            the permission, or None if the user is not allowed to manage the FQDN.
+        """
+        if self.shared is None:
+            AUTHORIZATION_CACHE.labels(result="miss").inc()
+            return await _aload_grant(user_id, fqdn)
+        key = ENTRY_KEY_TEMPLATE.format(generation=generation, user_id=user_id, fqdn=fqdn)
+        cached = await self.shared.aget(key, _MISSING)
+        if cached is not _MISSING:
+            AUTHORIZATION_CACHE.labels(result="shared_hit").inc()
+            return DomainGrant(*cached) if cached else None
+        AUTHORIZATION_CACHE.labels(result="miss").inc()
+        grant = await _aload_grant(user_id, fqdn)
+        await self.shared.aset(key, tuple(grant) if grant else False, self.ttl)
+        return grant
+
+    def clear(self) -> None:
+        """Forget the permissions and the generation held in the memory of this process."""
+        with self._lock:
+            self._entries.clear()
+            self._generation = None
+
+    def invalidate(self) -> None:
+        """Forget the permissions of all the users, in all the processes.
+
+        The memory of this process is cleared once the generation moved, so this process does
+        not keep the previous generation until it is read again.
+        """
+        if self.shared is None:
+            _bump_generation()
+        else:
+            try:
+                self.shared.incr(GENERATION_KEY)
+            except ValueError:
+                self.shared.add(GENERATION_KEY, 1, timeout=None)
+        self.clear()
+
+
+authorization_index = AuthorizationIndex(
+    AUTHORIZATION_CACHE_SIZE,
+    AUTHORIZATION_CACHE_TTL,
+    caches[SHARED_CACHE_ALIAS] if SHARED_CACHE_ALIAS in settings.CACHES else None,
+    AUTHORIZATION_GENERATION_TTL,
+)
+
+
+@receiver([post_save, post_delete], sender=Domain)
+@receiver([post_save, post_delete], sender=DomainUserPermission)
+@receiver([post_save, post_delete], sender=Zone)
+def invalidate_authorization_index(**_) -> None:
+    """Invalidate the authorization index when a domain, zone or permission changes."""
+    authorization_index.invalidate()
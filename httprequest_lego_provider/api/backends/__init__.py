@@ -0,0 +1,27 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Backends the DNS records are written to."""
+
+from ..models import Domain
+from .base import DnsBackend
+from .repository import GitBackend
+from .rfc2136 import Rfc2136Backend
+from .zonefile import ZoneFileBackend
+
+_BACKENDS = {
+    Domain.GIT: GitBackend,
+    Domain.ZONE_FILE: ZoneFileBackend,
+    Domain.RFC2136: Rfc2136Backend,
+}
+
+
+def get_backend(name: str) -> DnsBackend:
+    """Get a DNS record backend.
+
+    Args:
+        name: the backend name, as stored in the domain.
+
+    Returns:
+        the backend.
+    """
+    return _BACKENDS[name]()
@@ -0,0 +1,54 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Interface of the DNS record backends."""
+
+import abc
+from collections.abc import Collection
+
+from ..writer import RecordChange
+
+
+class DnsBackend(abc.ABC):
+    """Destination of the ACME challenge records."""
+
+    @abc.abstractmethod
+    def present(self, fqdn: str, value: str) -> None:
+        """Add the ACME challenge record of a FQDN, replacing the existing one.
+
+        Args:
+            fqdn: the FQDN for which to add a record.
+            value: ACME challenge for DNS record to add.
+
+        Raises:
+            DnsSourceUpdateError: if the record could not be added.
+        """
+
+    @abc.abstractmethod
+    def cleanup(self, fqdn: str) -> None:
+        """Remove the ACME challenge record of a FQDN if it exists.
+
+        Args:
+            fqdn: the FQDN for which to remove the record.
+
+        Raises:
+            DnsSourceUpdateError: if the record could not be removed.
+        """
+
+    def batch(self, changes: Collection[RecordChange]) -> None:
+        """Apply several record changes, one after the other unless overridden.
+
+        The changes applied are resolved, so an error raised only applies to the changes left
+        unresolved.
+
+        Args:
+            changes: the changes to apply.
+
+        Raises:
+            DnsSourceUpdateError: if a change could not be applied.
+        """
+        for change in changes:
+            if change.value is None:
+                self.cleanup(change.fqdn)
+            else:
+                self.present(change.fqdn, change.value)
+            change.resolve()
@@ -0,0 +1,41 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Backend storing the records in the DNS records git repository."""
+
+from collections.abc import Collection
+
+from ..dns import push_dns_record_changes, remove_dns_record, write_dns_record
+from ..writer import RecordChange
+from .base import DnsBackend
+
+
+class GitBackend(DnsBackend):
+    """Backend committing the records to the zone files of the git repository."""
+
+    def present(self, fqdn: str, value: str) -> None:
+        """Add the ACME challenge record of a FQDN, replacing the existing one.
+
+        Args:
+            fqdn: the FQDN for which to add a record.
+            value: ACME challenge for DNS record to add.
+        """
+        write_dns_record(fqdn, value)
+
+    def cleanup(self, fqdn: str) -> None:
+        """Remove the ACME challenge record of a FQDN if it exists.
+
+        Args:
+            fqdn: the FQDN for which to remove the record.
+        """
+        remove_dns_record(fqdn)
+
+    def batch(self, changes: Collection[RecordChange]) -> None:
+        """Apply several record changes, pushed together when they fit the same window.
+
+        The error of each change, if any, is set on the change. The changes to a repository or
+        zone file are pushed even if the changes to another one fail.
+
+        Args:
+            changes: the changes to apply.
+        """
+        push_dns_record_changes(changes)
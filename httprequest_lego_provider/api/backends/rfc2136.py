@@ -0,0 +1,113 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Backend sending the records to a nameserver with RFC 2136 dynamic updates."""
+
+from collections.abc import Collection
+from typing import Dict
+
+import dns.exception
+import dns.name
+import dns.query
+import dns.rcode
+import dns.tsigkeyring
+import dns.update
+
+from ..dns import DnsSourceUpdateError
+from ..settings import (
+    RFC2136_NAMESERVER,
+    RFC2136_PORT,
+    RFC2136_TIMEOUT,
+    RFC2136_TSIG_ALGORITHM,
+    RFC2136_TSIG_KEY_NAME,
+    RFC2136_TSIG_KEY_SECRET,
+)
+from ..writer import RecordChange
+from ..zone import get_domain_and_subdomain_from_fqdn
+from .base import DnsBackend
+
+RECORD_TTL = 600
+
+
+def _build_update(
+    zone: str, subdomain_changes: Dict[str, RecordChange]
+) -> dns.update.UpdateMessage:
+    """Build the dynamic update message applying the changes to a zone.
+
+    Args:
+        zone: the zone the changes apply to.
+        subdomain_changes: the changes, by subdomain.
+
+    Returns:
+        the update message, signed if a TSIG key is configured.
+    """
+    keyring = None
+    if RFC2136_TSIG_KEY_NAME:
+        keyring = dns.tsigkeyring.from_text({RFC2136_TSIG_KEY_NAME: RFC2136_TSIG_KEY_SECRET})
+    update = dns.update.UpdateMessage(zone, keyring=keyring, keyalgorithm=RFC2136_TSIG_ALGORITHM)
+    for subdomain, change in subdomain_changes.items():
+        name = dns.name.empty if subdomain == "." else dns.name.from_text(subdomain, None)
+        if change.value is None:
+            update.delete(name, "TXT")
+        else:
+            update.replace(name, RECORD_TTL, "TXT", f'"{change.value}"')
+    return update
+
+
+class Rfc2136Backend(DnsBackend):
+    """Backend updating the records on the primary nameserver of the zones.
+
+    The changes to a zone are sent in a single update over TCP, signed with the TSIG key when
+    one is configured. The nameserver has to be given as an IP address.
+    """
+
+    def present(self, fqdn: str, value: str) -> None:
+        """Add the ACME challenge record of a FQDN, replacing the existing one.
+
+        Args:
+            fqdn: the FQDN for which to add a record.
+            value: ACME challenge for DNS record to add.
+        """
+        self.batch([RecordChange(fqdn, value)])
+
+    def cleanup(self, fqdn: str) -> None:
+        """Remove the ACME challenge record of a FQDN if it exists.
+
+        Args:
+            fqdn: the FQDN for which to remove the record.
+        """
+        self.batch([RecordChange(fqdn)])
+
+    def batch(self, changes: Collection[RecordChange]) -> None:
+        """Apply several record changes, with one update per zone.
+
+        The changes of each zone updated are resolved, so an error raised only applies to the
+        changes of the zone whose update failed and of the zones left.
+
+        Args:
+            changes: the changes to apply.
+
+        Raises:
+            DnsSourceUpdateError: if the nameserver is not configured or an update failed.
+        """
+        if not RFC2136_NAMESERVER:
+            raise DnsSourceUpdateError("No RFC 2136 nameserver configured")
+        changes_by_zone: Dict[str, Dict[str, RecordChange]] = {}
+        for change in changes:
+            domain, subdomain = get_domain_and_subdomain_from_fqdn(change.fqdn)
+            changes_by_zone.setdefault(domain, {})[subdomain] = change
+        for zone, subdomain_changes in changes_by_zone.items():
+            try:
+                response = dns.query.tcp(
+                    _build_update(zone, subdomain_changes),
+                    RFC2136_NAMESERVER,
+                    timeout=RFC2136_TIMEOUT,
+                    port=RFC2136_PORT,
+                )
+            except (dns.exception.DNSException, OSError) as exc:
+                raise DnsSourceUpdateError from exc
+            if response.rcode() != dns.rcode.NOERROR:
+                raise DnsSourceUpdateError(
+                    f"Update of zone {zone} failed: {dns.rcode.to_text(response.rcode())}"
+                )
+            for change in subdomain_changes.values():
+                change.resolve()
@@ -0,0 +1,64 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Backend storing the records in zone files on the local filesystem."""
+
+import fcntl
+from collections.abc import Collection
+from pathlib import Path
+
+from ..dns import DnsSourceUpdateError
+from ..settings import ZONE_FILE_DIR
+from ..writer import RecordChange, edit_zone_files, group_changes_by_filename
+from .base import DnsBackend
+
+LOCK_FILENAME = ".httprequest-lego-provider.lock"
+
+
+class ZoneFileBackend(DnsBackend):
+    """Backend editing the zone files of a local directory, such as the one served by BIND.
+
+    The zone files have the same name and format as in the git repository and are expected to
+    exist already.
+    """
+
+    def present(self, fqdn: str, value: str) -> None:
+        """Add the ACME challenge record of a FQDN, replacing the existing one.
+
+        Args:
+            fqdn: the FQDN for which to add a record.
+            value: ACME challenge for DNS record to add.
+        """
+        self.batch([RecordChange(fqdn, value)])
+
+    def cleanup(self, fqdn: str) -> None:
+        """Remove the ACME challenge record of a FQDN if it exists.
+
+        Args:
+            fqdn: the FQDN for which to remove the record.
+        """
+        self.batch([RecordChange(fqdn)])
+
+    def batch(self, changes: Collection[RecordChange]) -> None:
+        """Apply several record changes, reading and writing each zone file once.
+
+        The changes of each zone file written are resolved, so an error raised only applies to
+        the changes of the zone file that could not be written and of the zone files left.
+
+        Args:
+            changes: the changes to apply.
+
+        Raises:
+            DnsSourceUpdateError: if the directory is not configured or a zone file is missing.
+        """
+        if not ZONE_FILE_DIR:
+            raise DnsSourceUpdateError("No zone file directory configured")
+        directory = Path(ZONE_FILE_DIR)
+        try:
+            with open(directory / LOCK_FILENAME, "a", encoding="utf-8") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                for filename, subdomain_changes in group_changes_by_filename(changes).items():
+                    edit_zone_files(directory, {filename: subdomain_changes})
+                    for change in subdomain_changes.values():
+                        change.resolve()
+        except OSError as exc:
+            raise DnsSourceUpdateError from exc
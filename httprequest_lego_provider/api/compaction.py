@@ -0,0 +1,228 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Compaction of the history of the DNS records branch."""
+
+import itertools
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List, NamedTuple
+
+from git import Commit, GitCommandError, PushInfo, Repo
+from git.objects.util import altz_to_utctz_str
+
+from .dns import DnsSourceUpdateError, parse_repository_url
+from .mirror import BareRepositoryMirror
+from .settings import GIT_SSH_CONTROL_DIR, GIT_SSH_CONTROL_PERSIST
+from .ssh import get_ssh_master
+
+logger = logging.getLogger(__name__)
+
+# Messages of the commits created by the record writers, see writer._commit_message, and of the
+# snapshot commits created by a previous compaction.
+RECORD_COMMIT_PATTERN = re.compile(
+    r"(?:(?:Add|Remove) \S+ record"
+    r"|Update \d+ records\n\n(?:(?:Add|Remove) \S+ record\n?)+"
+    r"|Squash \d+ record commits\n\n.*)\n?",
+    re.DOTALL,
+)
+
+
+class CompactionResult(NamedTuple):
+    """Outcome of a compaction of the history.
+
+    Attributes:
+        squashed: the number of record commits squashed into snapshot commits.
+        snapshots: the number of snapshot commits replacing them.
+        old_tip: the tip of the branch before the compaction.
+        new_tip: the tip of the branch after the compaction.
+        archive_ref: the ref the previous history was pushed to, if any.
+    """
+
+    squashed: int
+    snapshots: int
+    old_tip: str
+    new_tip: str
+    archive_ref: str | None
+
+
+def is_record_commit(commit: Commit) -> bool:
+    """Check whether a commit only changes ACME challenge records.
+
+    Args:
+        commit: the commit.
+
+    Returns:
+        whether the commit was created by a record writer or a previous compaction.
+    """
+    return len(commit.parents) <= 1 and bool(RECORD_COMMIT_PATTERN.fullmatch(commit.message))
+
+
+def _copy_commit(repo: Repo, commit: Commit, parent: Commit | None) -> Commit:
+    """Copy a commit on top of a new parent, keeping its tree, message, authorship and dates.
+
+    Args:
+        repo: the repository.
+        commit: the commit to copy.
+        parent: the new parent, or None for a root commit.
+
+    Returns:
+        the copy, identical to the commit if its first parent is unchanged.
+    """
+    return Commit.create_from_tree(
+        repo,
+        commit.tree,
+        commit.message,
+        [parent] if parent else [],
+        author=commit.author,
+        committer=commit.committer,
+        author_date=f"{commit.authored_date} {altz_to_utctz_str(commit.author_tz_offset)}",
+        commit_date=f"{commit.committed_date} {altz_to_utctz_str(commit.committer_tz_offset)}",
+    )
+
+
+def _snapshot(repo: Repo, commits: List[Commit], parent: Commit | None) -> Commit:
+    """Squash consecutive record commits into a snapshot of the tree of the last one.
+
+    Args:
+        repo: the repository.
+        commits: the record commits, oldest first.
+        parent: the parent of the snapshot, or None for a root commit.
+
+    Returns:
+        the snapshot commit.
+    """
+    first, last = commits[0].committed_datetime, commits[-1].committed_datetime
+    message = (
+        f"Squash {len(commits)} record commits\n\n"
+        f"Snapshot of the records from {first.isoformat()} to {last.isoformat()}.\n"
+    )
+    return Commit.create_from_tree(
+        repo,
+        commits[-1].tree,
+        message,
+        [parent] if parent else [],
+        author_date=f"{commits[-1].committed_date} +0000",
+        commit_date=f"{commits[-1].committed_date} +0000",
+    )
+
+
+def rewrite_history(repo: Repo, tip: Commit, cutoff: datetime) -> tuple[Commit, int, int]:
+    """Squash the runs of record commits older than a cutoff, and copy the newer commits.
+
+    The first-parent history is rewritten: every run of consecutive record commits committed
+    before the cutoff is replaced by a single snapshot commit with the tree of the last commit
+    of the run. Other commits, such as the edits of the zones, keep their message and
+    authorship. Merge commits are kept with their first parent only.
+
+    Args:
+        repo: the repository.
+        tip: the tip of the branch to rewrite.
+        cutoff: the date before which the record commits are squashed.
+
+    Returns:
+        the new tip, the number of commits squashed and the number of snapshots replacing them.
+    """
+    commits = list(repo.iter_commits(tip, first_parent=True))[::-1]
+    parent: Commit | None = None
+    squashed = snapshots = 0
+    for squashable, group in itertools.groupby(
+        commits, key=lambda commit: commit.committed_datetime < cutoff and is_record_commit(commit)
+    ):
+        run = list(group)
+        if squashable and len(run) > 1:
+            parent = _snapshot(repo, run, parent)
+            squashed, snapshots = squashed + len(run), snapshots + 1
+            continue
+        for commit in run:
+            parent = _copy_commit(repo, commit, parent)
+    return parent or tip, squashed, snapshots
+
+
+def _push(repo: Repo, refspec: str, **kwargs) -> None:
+    """Push a refspec to the origin remote.
+
+    Args:
+        repo: the repository.
+        refspec: the refspec to push.
+        kwargs: the options of the push.
+
+    Raises:
+        DnsSourceUpdateError: if the push was rejected.
+    """
+    try:
+        push_infos = repo.remote(name="origin").push(refspec, **kwargs)
+    except GitCommandError as exc:
+        raise DnsSourceUpdateError(f"Push of {refspec} rejected: {exc.stderr.strip()}") from exc
+    for push_info in push_infos:
+        if push_info.flags & (PushInfo.ERROR | PushInfo.REJECTED | PushInfo.REMOTE_REJECTED):
+            raise DnsSourceUpdateError(f"Push of {refspec} rejected: {push_info.summary.strip()}")
+
+
+def compact_history(
+    repository_url: str,
+    retention: timedelta,
+    archive_ref: str | None = None,
+    dry_run: bool = False,
+) -> CompactionResult:
+    """Squash the record commits older than the retention window and force push the branch.
+
+    The branch is only updated if it did not move since it was fetched, so the record changes
+    pushed concurrently are not lost: the compaction fails instead and can be run again.
+
+    Args:
+        repository_url: the repository's connection string.
+        retention: the age below which the record commits are kept as is.
+        archive_ref: the ref to push the previous history to before rewriting it, if any. A
+            "{date}" placeholder is replaced by the current date and time.
+        dry_run: whether to only compute the compaction, without pushing anything.
+
+    Returns:
+        the outcome of the compaction.
+
+    Raises:
+        DnsSourceUpdateError: if the repository could not be read or updated.
+    """
+    user, base_url, branch = parse_repository_url(repository_url)
+    now = datetime.now(timezone.utc)
+    if archive_ref:
+        archive_ref = archive_ref.format(date=now.strftime("%Y%m%d%H%M%S"))
+    with TemporaryDirectory() as tmp_dir:
+        mirror = BareRepositoryMirror(
+            base_url,
+            branch,
+            Path(tmp_dir, "repository"),
+            user,
+            ssh=get_ssh_master(base_url, Path(GIT_SSH_CONTROL_DIR), GIT_SSH_CONTROL_PERSIST),
+        )
+        try:
+            with mirror.checkout() as repo:
+                tracking_branch = mirror.tracking_branch(repo)
+                old_tip = tracking_branch.commit
+                start = time.perf_counter()
+                new_tip, squashed, snapshots = rewrite_history(repo, old_tip, now - retention)
+                logger.info(
+                    "Squashed %s commits into %s snapshots in %.2fs",
+                    squashed,
+                    snapshots,
+                    time.perf_counter() - start,
+                )
+                result = CompactionResult(
+                    squashed, snapshots, old_tip.hexsha, new_tip.hexsha, archive_ref
+                )
+                if dry_run or not squashed:
+                    return result
+                ref = f"refs/heads/{tracking_branch.remote_head}"
+                if archive_ref:
+                    _push(repo, f"{old_tip.hexsha}:{archive_ref}")
+                _push(
+                    repo,
+                    f"{new_tip.hexsha}:{ref}",
+                    force_with_lease=f"{ref}:{old_tip.hexsha}",
+                )
+                return result
+        except (GitCommandError, ValueError) as exc:
+            raise DnsSourceUpdateError(f"Failed to compact the history: {exc}") from exc
@@ -2,27 +2,55 @@
 # See LICENSE file for licensing details.
 """DNS utiilities."""
 
-import io
+import hashlib
 import logging
-from collections.abc import Iterable
+import threading
+from collections.abc import Collection
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
-from git import GitCommandError, Repo
+from git import GitCommandError
 
-from .settings import GIT_REPO_URL
+from .locks import zone_locks
+from .metrics import get_zone_label, observe_phase
+from .mirror import BareRepositoryMirror, RepositoryMirror
+from .settings import (
+    GIT_CLONE_MODE,
+    GIT_COMMIT_WINDOW,
+    GIT_MIRROR_DIR,
+    GIT_PUSH_BACKOFF,
+    GIT_PUSH_RETRIES,
+    GIT_REPO_URL,
+    GIT_SSH_CONTROL_DIR,
+    GIT_SSH_CONTROL_PERSIST,
+    ZONE_STREAMING_THRESHOLD,
+)
+from .ssh import get_ssh_master
+from .writer import BareRecordWriter, RecordChange, RecordWriter, group_changes_by_filename
+from .zone import (
+    FILENAME_TEMPLATE,
+    ZoneFile,
+    cache_zone_file,
+    get_domain_and_subdomain_from_fqdn,
+    pop_cached_zone_file,
+    read_zone_stream_txt_values,
+    zone_repositories,
+)
 
 logger = logging.getLogger(__name__)
 
-FILENAME_TEMPLATE = "{domain}.domain"
-RECORD_CONTENT = "{record} 600 IN TXT \042{value}\042\n"
+_writers: Dict[Path, RecordWriter] = {}
+_writers_lock = threading.Lock()
 
 
 class DnsSourceUpdateError(Exception):
     """Exception for DNS update errors."""
 
 
+class RecordChangeCancelledError(DnsSourceUpdateError):
+    """Exception raised when a record change is superseded by a later one before being pushed."""
+
+
 def parse_repository_url(repository_url: str) -> Tuple[str, str, str | None]:
     """Get the parsed connection details from the repository connection string.
 
@@ -39,54 +67,204 @@ def parse_repository_url(repository_url: str) -> Tuple[str, str, str | None]:
     return user, base_url, branch
 
 
-def _get_domain_and_subdomain_from_fqdn(fqdn: str) -> Tuple[str, str]:
-    """Get the domain and subdomain for the FQDN record provided.
+def _get_writer(repository_url: str) -> RecordWriter:
+    """Get the writer for a repository, creating it and its mirror on first use.
 
     Args:
-        fqdn: Fully qualified domain name.
+        repository_url: the repository's connection string.
 
     Returns:
-        the domain and subdomain for the FQDN provided.
+        the writer for the repository.
     """
-    splitted_record = fqdn.split(".")
-    return (
-        ".".join(splitted_record[-2:]),
-        ".".join(splitted_record[:-2]) if len(splitted_record) > 2 else ".",
-    )
+    mirror_key = f"{GIT_CLONE_MODE}:{repository_url}"
+    path = Path(GIT_MIRROR_DIR) / hashlib.sha256(mirror_key.encode("utf-8")).hexdigest()[:16]
+    with _writers_lock:
+        if path not in _writers:
+            user, base_url, branch = parse_repository_url(repository_url)
+            ssh = get_ssh_master(base_url, Path(GIT_SSH_CONTROL_DIR), GIT_SSH_CONTROL_PERSIST)
+            writer_class = RecordWriter
+            if GIT_CLONE_MODE == "bare":
+                writer_class = BareRecordWriter
+                mirror = BareRepositoryMirror(base_url, branch, path, user, ssh=ssh)
+            else:
+                mirror = RepositoryMirror(
+                    base_url, branch, path, user, sparse=GIT_CLONE_MODE == "sparse", ssh=ssh
+                )
+            _writers[path] = writer_class(
+                mirror, GIT_COMMIT_WINDOW, GIT_PUSH_RETRIES, GIT_PUSH_BACKOFF, zone_locks
+            )
+        return _writers[path]
 
 
-def _line_matches_subdomain(line: str, subdomain: str) -> bool:
-    """Check if the line in bind9 format corresponds to a given subdomain.
+def get_repository_url(zone: str) -> str:
+    """Get the URL of the repository holding the zone file of a zone.
 
     Args:
-        line: the line in bind9 format.
-        subdomain: the subdomain to compare with.
+        zone: the zone name.
 
     Returns:
-        true if the subdomain matches the line.
+        the repository registered for the zone, or the default repository.
     """
-    return not line.strip().startswith(";") and bool(line.split()) and line.split()[0] == subdomain
+    return zone_repositories.get(zone) or GIT_REPO_URL
+
 
+def _check_zone_files(
+    mirror: RepositoryMirror, changes: Collection[RecordChange]
+) -> List[RecordChange]:
+    """Fail the changes to the zone files missing from a repository, before queuing the others.
 
-def _remove_subdomain_entries_from_file_content(
-    content: Iterable[str], subdomain: str
-) -> List[str]:
-    """Remove from the file the entries matching a subdomain.
+    The mirror as last fetched is checked first, and only fetched again if a file is missing
+    from it, in case the file was added since.
 
     Args:
-        content: the file content.
-        subdomain: the subdomain for which to filter out the entries.
+        mirror: the mirror of the repository.
+        changes: the changes to the records of the repository.
 
     Returns:
-        the content excluding the entries for the  subdomain.
+        the changes to the zone files found in the repository.
+    """
+    changes_by_filename = group_changes_by_filename(changes)
+    missing = mirror.get_missing_files(changes_by_filename.keys())
+    if not missing:
+        return list(changes)
+    errors: Dict[str, Exception]
+    try:
+        with mirror.checkout(missing):
+            missing = mirror.get_missing_files(missing)
+    except (GitCommandError, IndexError, OSError, ValueError) as exc:
+        errors = dict.fromkeys(missing, exc)
+    else:
+        errors = {
+            filename: DnsSourceUpdateError(f"Zone file {filename} does not exist")
+            for filename in missing
+        }
+    for filename, error in errors.items():
+        for change in changes_by_filename[filename].values():
+            change.resolve(error)
+    return [change for change in changes if not change.done]
+
+
+def push_dns_record_changes(changes: Collection[RecordChange]) -> None:
+    """Queue record changes and wait for them to be pushed, in a single batch if possible.
+
+    The changes are queued to the writer of the repository of their zone, so the changes to
+    different repositories are pushed in parallel. The time spent waiting, batching included,
+    is measured as the wait phase. The error of each change, if any, is set on the change
+    instead of being raised, so the changes pushed are told from the failed ones.
+
+    Args:
+        changes: the changes to apply.
+    """
+    changes_by_url: Dict[str, List[RecordChange]] = {}
+    for change in changes:
+        domain, _ = get_domain_and_subdomain_from_fqdn(change.fqdn)
+        changes_by_url.setdefault(get_repository_url(domain), []).append(change)
+    with observe_phase("wait", get_zone_label(group_changes_by_filename(changes).keys())):
+        for repository_url, repository_changes in changes_by_url.items():
+            writer = _get_writer(repository_url)
+            writer.submit_all(_check_zone_files(writer.mirror, repository_changes))
+        for change in changes:
+            change.wait()
+
+
+def apply_dns_record_changes(changes: Collection[RecordChange]) -> None:
+    """Queue record changes and wait for them to be pushed, failing if any of them failed.
+
+    Args:
+        changes: the changes to apply.
+
+    Raises:
+        DnsSourceUpdateError: if an error while updating the repository occurs.
     """
-    new_content = []
-    for line in content:
-        if not _line_matches_subdomain(line, subdomain):
-            new_content.append(line)
-        else:
-            logging.error("Subdomain %s already present as a DNS record.", subdomain)
-    return new_content
+    push_dns_record_changes(changes)
+    errors = [change.error for change in changes if change.error]
+    if errors:
+        raise DnsSourceUpdateError(str(errors[0])) from errors[0]
+
+
+def _read_repository_records(
+    repository_url: str, fqdns_by_filename: Dict[str, Dict[str, str]]
+) -> Dict[str, List[str]]:
+    """Read the DNS records at the tip of the branch of a repository.
+
+    Zone files larger than the streaming threshold, and not already parsed, are scanned line by
+    line instead of being parsed.
+
+    Args:
+        repository_url: the repository's connection string.
+        fqdns_by_filename: the FQDNs for which to read the records, with their subdomain, by
+            zone filename.
+
+    Returns:
+        the values of the TXT records of each FQDN.
+    """
+    mirror = _get_writer(repository_url).mirror
+    values: Dict[str, List[str]] = {}
+    with observe_phase("read", get_zone_label(fqdns_by_filename.keys())), mirror.checkout(
+        fqdns_by_filename.keys()
+    ) as repo:
+        tree = mirror.tip(repo).tree
+        for filename, subdomains in fqdns_by_filename.items():
+            try:
+                blob = tree / filename
+            except KeyError:
+                values.update((fqdn, []) for fqdn in subdomains)
+                continue
+            zone_file = pop_cached_zone_file(blob.hexsha)
+            if zone_file is None and blob.size > ZONE_STREAMING_THRESHOLD:
+                owner_values = read_zone_stream_txt_values(
+                    blob.data_stream.read, subdomains.values()
+                )
+                values.update(
+                    (fqdn, owner_values[subdomain]) for fqdn, subdomain in subdomains.items()
+                )
+                continue
+            zone_file = zone_file or ZoneFile(blob.data_stream.read().decode("utf-8"))
+            cache_zone_file(blob.hexsha, zone_file)
+            for fqdn, subdomain in subdomains.items():
+                values[fqdn] = zone_file.get_txt_values(subdomain)
+    return values
+
+
+def read_dns_records(fqdns: Collection[str]) -> Dict[str, List[str]]:
+    """Read the DNS records at the tip of the repository branches.
+
+    Args:
+        fqdns: the FQDNs for which to read the records.
+
+    Returns:
+        the values of the TXT records of each FQDN.
+
+    Raises:
+        DnsSourceUpdateError: if an error while reading the repository occurs.
+    """
+    fqdns_by_url: Dict[str, Dict[str, Dict[str, str]]] = {}
+    for fqdn in fqdns:
+        domain, subdomain = get_domain_and_subdomain_from_fqdn(fqdn)
+        fqdns_by_filename = fqdns_by_url.setdefault(get_repository_url(domain), {})
+        fqdns_by_filename.setdefault(FILENAME_TEMPLATE.format(domain=domain), {})[fqdn] = subdomain
+    values: Dict[str, List[str]] = {}
+    try:
+        for repository_url, fqdns_by_filename in fqdns_by_url.items():
+            values.update(_read_repository_records(repository_url, fqdns_by_filename))
+    except (GitCommandError, IndexError, OSError, ValueError) as exc:
+        raise DnsSourceUpdateError from exc
+    return values
+
+
+def _apply_dns_record_change(change: RecordChange) -> None:
+    """Apply a record change, failing if a later change to the record superseded it.
+
+    Args:
+        change: the change to apply.
+
+    Raises:
+        DnsSourceUpdateError: if an error while updating the repository occurs.
+        RecordChangeCancelledError: if a later change to the record superseded the change.
+    """
+    apply_dns_record_changes([change])
+    if change.cancelled:
+        raise RecordChangeCancelledError(f"{change.message} superseded by a later change")
 
 
 def write_dns_record(fqdn: str, value: str) -> None:
@@ -98,28 +276,9 @@ def write_dns_record(fqdn: str, value: str) -> None:
 
     Raises:
         DnsSourceUpdateError: if an error while updating the repository occurs.
+        RecordChangeCancelledError: if a later change to the record superseded the addition.
     """
-    user, base_url, branch = parse_repository_url(GIT_REPO_URL)
-    with TemporaryDirectory() as tmp_dir:
-        try:
-            repo = Repo.clone_from(base_url, tmp_dir, branch=branch)
-            config_writer = repo.config_writer()
-            config_writer.set_value("user", "name", user)
-            config_writer.release()
-            domain, subdomain = _get_domain_and_subdomain_from_fqdn(fqdn)
-            filename = FILENAME_TEMPLATE.format(domain=domain)
-            dns_record_file = Path(f"{repo.working_tree_dir}/{filename}")
-            content = dns_record_file.read_text("utf-8")
-            new_content = _remove_subdomain_entries_from_file_content(
-                io.StringIO(content), subdomain
-            )
-            new_content.append(RECORD_CONTENT.format(record=subdomain, value=value))
-            dns_record_file.write_text("".join(new_content), encoding="utf-8")
-            repo.index.add([filename])
-            repo.git.commit("-m", f"Add {fqdn} record")
-            repo.remote(name="origin").push()
-        except (GitCommandError, ValueError) as ex:
-            raise DnsSourceUpdateError from ex
+    _apply_dns_record_change(RecordChange(fqdn, value))
 
 
 def remove_dns_record(fqdn: str) -> None:
@@ -130,24 +289,6 @@ def remove_dns_record(fqdn: str) -> None:
 
     Raises:
         DnsSourceUpdateError: if an error while updating the repository occurs.
+        RecordChangeCancelledError: if a later change to the record superseded the removal.
     """
-    user, base_url, branch = parse_repository_url(GIT_REPO_URL)
-    with TemporaryDirectory() as tmp_dir:
-        try:
-            repo = Repo.clone_from(base_url, tmp_dir, branch=branch)
-            config_writer = repo.config_writer()
-            config_writer.set_value("user", "name", user)
-            config_writer.release()
-            domain, subdomain = _get_domain_and_subdomain_from_fqdn(fqdn)
-            filename = FILENAME_TEMPLATE.format(domain=domain)
-            dns_record_file = Path(f"{repo.working_tree_dir}/{filename}")
-            content = dns_record_file.read_text("utf-8")
-            new_content = _remove_subdomain_entries_from_file_content(
-                io.StringIO(content), subdomain
-            )
-            dns_record_file.write_text("".join(new_content), encoding="utf-8")
-            repo.index.add([filename])
-            repo.git.commit("-m", f"Remove {fqdn} record")
-            repo.remote(name="origin").push()
-        except (GitCommandError, ValueError) as ex:
-            raise DnsSourceUpdateError from ex
+    _apply_dns_record_change(RecordChange(fqdn))
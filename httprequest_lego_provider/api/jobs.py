@@ -0,0 +1,117 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Background processing of record changes."""
+
+import logging
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+from typing import Tuple
+
+from django.contrib.auth.models import AbstractBaseUser
+from django.db import close_old_connections
+from django.utils import timezone
+from opentelemetry import context
+
+from .authorization import DomainGrant
+from .dns import DnsSourceUpdateError
+from .models import RecordChangeJob
+from .records import apply_record_change
+from .settings import RECORD_JOB_TIMEOUT, RECORD_JOB_WORKERS
+
+STALE_JOB_ERROR = "Abandoned, the process running the job stopped"
+
+logger = logging.getLogger(__name__)
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the executor running the jobs, creating it on first use.
+
+    Returns:
+        the executor.
+    """
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=RECORD_JOB_WORKERS, thread_name_prefix="record-job"
+            )
+        return _executor
+
+
+def _run_job(job_id: uuid.UUID, backend: str, trace_context: context.Context) -> str:
+    """Push the record change of a job and record the outcome.
+
+    Args:
+        job_id: the job identifier.
+        backend: the name of the backend to push the record change to.
+        trace_context: the tracing context of the request submitting the job.
+
+    Returns:
+        the final status of the job.
+    """
+    close_old_connections()
+    token = context.attach(trace_context)
+    try:
+        job = RecordChangeJob.objects.get(id=job_id)
+        try:
+            apply_record_change(
+                job.fqdn, backend, job.value if job.action == RecordChangeJob.PRESENT else None
+            )
+            job.status = RecordChangeJob.PUSHED
+        except DnsSourceUpdateError as ex:
+            logger.exception("Record change job %s failed", job_id)
+            job.status = RecordChangeJob.FAILED
+            job.error = str(ex.__cause__ or ex)
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            # Any failure has to be recorded, or the job would be reported as queued forever.
+            logger.exception("Record change job %s failed unexpectedly", job_id)
+            job.status = RecordChangeJob.FAILED
+            job.error = f"Unexpected error: {type(ex).__name__}"
+        job.save(update_fields=["status", "error", "updated_at"])
+        return job.status
+    finally:
+        context.detach(token)
+        close_old_connections()
+
+
+def submit_job(
+    user: AbstractBaseUser, domain: DomainGrant, value: str, action: str
+) -> Tuple[RecordChangeJob, Future]:
+    """Record a record change job and queue it for background processing.
+
+    Jobs still queued when the process stops are lost, they are not resumed. They are marked as
+    failed by fail_stale_jobs once older than the job timeout, so clients stop polling them.
+
+    Args:
+        user: the user requesting the change.
+        domain: the domain of the record, as granted to the user.
+        value: the ACME challenge of the record.
+        action: whether to add or remove the record.
+
+    Returns:
+        the job and a future resolving to its final status.
+    """
+    job = RecordChangeJob.objects.create(user=user, fqdn=domain.fqdn, value=value, action=action)
+    return job, _get_executor().submit(_run_job, job.id, domain.backend, context.get_current())
+
+
+def fail_stale_jobs(timeout: float = RECORD_JOB_TIMEOUT) -> int:
+    """Mark as failed the jobs queued for longer than the timeout.
+
+    Such jobs were lost when the process running them stopped.
+
+    Args:
+        timeout: the time in seconds after which a queued job is considered lost.
+
+    Returns:
+        the number of jobs marked as failed.
+    """
+    now = timezone.now()
+    return RecordChangeJob.objects.filter(
+        status=RecordChangeJob.QUEUED, created_at__lt=now - timedelta(seconds=timeout)
+    ).update(status=RecordChangeJob.FAILED, error=STALE_JOB_ERROR, updated_at=now)
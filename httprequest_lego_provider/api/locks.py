@@ -0,0 +1,93 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Zone locks shared by all the units through PostgreSQL advisory locks."""
+
+import hashlib
+import logging
+import time
+from collections.abc import Collection, Iterator
+from contextlib import contextmanager, suppress
+from typing import List
+
+from django.db import DatabaseError, connection
+
+from .metrics import LOCK_WAIT_DURATION, get_zone_label
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY_TEMPLATE = "httprequest-lego-provider:{filename}"
+
+
+def get_lock_key(filename: str) -> int:
+    """Derive the advisory lock key of a zone file.
+
+    Args:
+        filename: the zone filename.
+
+    Returns:
+        the key, as a signed 64 bits integer.
+    """
+    digest = hashlib.sha256(LOCK_KEY_TEMPLATE.format(filename=filename).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+def _record_wait(filename: str, wait: float) -> None:
+    """Record the time spent waiting for a zone lock.
+
+    Args:
+        filename: the zone filename.
+        wait: the wait time in seconds.
+    """
+    LOCK_WAIT_DURATION.labels(zone=get_zone_label([filename])).observe(wait)
+    logger.info("Waited %.3fs for the lock of zone %s", wait, filename)
+
+
+def _release_locks(keys: List[int]) -> None:
+    """Release advisory locks, closing the database connection if that fails.
+
+    Closing the connection ends the session, which releases its locks, and errors are logged
+    rather than raised so they do not hide the exception raised while the locks were held.
+
+    Args:
+        keys: the keys of the locks, in the order they were taken.
+    """
+    try:
+        with connection.cursor() as cursor:
+            for key in reversed(keys):
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [key])
+    except DatabaseError:
+        logger.exception("Failed to release the zone locks, closing the database connection")
+        with suppress(DatabaseError):
+            connection.close()
+
+
+@contextmanager
+def zone_locks(filenames: Collection[str]) -> Iterator[None]:
+    """Hold the locks of the zone files, so no other unit edits them at the same time.
+
+    The locks are session level advisory locks, taken in a consistent order to avoid deadlocks
+    and released when leaving the context or if the database connection is lost. Nothing is
+    locked when the database is not PostgreSQL.
+
+    Args:
+        filenames: the zone filenames to lock.
+
+    Yields:
+        once all the locks are held.
+    """
+    if connection.vendor != "postgresql":
+        yield
+        return
+    connection.close_if_unusable_or_obsolete()
+    keys = []
+    try:
+        with connection.cursor() as cursor:
+            for filename in sorted(set(filenames)):
+                key = get_lock_key(filename)
+                start = time.monotonic()
+                cursor.execute("SELECT pg_advisory_lock(%s)", [key])
+                keys.append(key)
+                _record_wait(filename, time.monotonic() - start)
+        yield
+    finally:
+        _release_locks(keys)
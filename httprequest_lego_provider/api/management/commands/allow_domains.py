@@ -6,7 +6,8 @@
 # pylint:disable=duplicate-code,imported-auth-user
 
 from api.forms import FQDN_PREFIX
-from api.models import Domain, DomainUserPermission
+from api.models import Domain, DomainUserPermission, Zone
+from api.queries import count_command_queries
 from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand, CommandError
 
@@ -29,6 +30,7 @@ class Command(BaseCommand):
         parser.add_argument("username", nargs=None, type=str)
         parser.add_argument("domains", nargs="+", type=str)
 
+    @count_command_queries
     def handle(self, *args, **options):
         """Command handler.
 
@@ -37,7 +39,7 @@ class Command(BaseCommand):
             options: options.
 
         Raises:
-            CommandError: if the user is not found.
+            CommandError: if the user is not found or no zone is registered for a domain.
         """
         username = options["username"]
         domains = options["domains"]
@@ -45,12 +47,16 @@ class Command(BaseCommand):
             user = User.objects.get(username=username)
         except User.DoesNotExist as exc:
             raise CommandError(f'User "{username}" does not exist') from exc
-        for domain_name in domains:
-            fqdn = (
-                domain_name
-                if domain_name.startswith(FQDN_PREFIX)
-                else f"{FQDN_PREFIX}{domain_name}"
-            )
+        fqdns = [
+            domain_name if domain_name.startswith(FQDN_PREFIX) else f"{FQDN_PREFIX}{domain_name}"
+            for domain_name in domains
+        ]
+        existing = set(Domain.objects.filter(fqdn__in=fqdns).values_list("fqdn", flat=True))
+        if missing := [
+            fqdn for fqdn in fqdns if fqdn not in existing and Zone.for_fqdn(fqdn) is None
+        ]:
+            raise CommandError(f'No zone registered for "{", ".join(missing)}"')
+        for fqdn in fqdns:
             domain, _ = Domain.objects.get_or_create(fqdn=fqdn)
             DomainUserPermission.objects.get_or_create(domain=domain, user=user)
 
@@ -0,0 +1,119 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Compact history module."""
+
+import time
+from datetime import timedelta
+
+from api.compaction import compact_history
+from api.dns import DnsSourceUpdateError, parse_repository_url
+from api.queries import QueryCounter, get_command_label
+from api.registry import get_repository_urls
+from api.settings import (
+    GIT_COMPACTION_ARCHIVE_REF,
+    GIT_COMPACTION_INTERVAL,
+    GIT_COMPACTION_RETENTION,
+)
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """Command to squash the old record commits of the DNS records branch.
+
+    Attrs:
+        help: help message to display.
+    """
+
+    help = "Squash the record commits older than the retention window into snapshot commits."
+
+    def add_arguments(self, parser):
+        """Argument parser.
+
+        Args:
+            parser: the cmd line parser.
+        """
+        parser.add_argument(
+            "--retention-days",
+            type=float,
+            default=GIT_COMPACTION_RETENTION,
+            help="Age in days below which the record commits are kept as is.",
+        )
+        parser.add_argument(
+            "--archive-ref",
+            default=GIT_COMPACTION_ARCHIVE_REF,
+            help=(
+                "Ref to push the previous history to before rewriting it, such as "
+                "refs/archive/{date}, where {date} is replaced by the current date and time."
+            ),
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the commits that would be squashed.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help=(
+                "Compact periodically, every DJANGO_GIT_COMPACTION_INTERVAL seconds. Exits "
+                "immediately if the interval is 0."
+            ),
+        )
+
+    def _compact(self, options) -> None:
+        """Compact the history of every repository once.
+
+        Args:
+            options: options.
+
+        Raises:
+            DnsSourceUpdateError: if the history of a repository could not be compacted, once
+                the other repositories are compacted.
+        """
+        error = None
+        for repository_url in get_repository_urls():
+            _, base_url, _ = parse_repository_url(repository_url)
+            try:
+                result = compact_history(
+                    repository_url,
+                    timedelta(days=options["retention_days"]),
+                    options["archive_ref"] or None,
+                    options["dry_run"],
+                )
+            except DnsSourceUpdateError as exc:
+                self.stderr.write(f"{base_url}: {exc}")
+                error = exc
+                continue
+            message = f"Squashed {result.squashed} commits into {result.snapshots} snapshots"
+            if options["dry_run"]:
+                message = f"Would have squashed {result.squashed} commits"
+            elif result.squashed and result.archive_ref:
+                message += f", previous history pushed to {result.archive_ref}"
+            self.stdout.write(self.style.SUCCESS(f"{base_url}: {message}"))
+        if error:
+            raise error
+
+    def handle(self, *args, **options):
+        """Command handler, recording the database queries of each iteration.
+
+        Args:
+            args: args.
+            options: options.
+
+        Raises:
+            CommandError: if the history could not be compacted.
+        """
+        if options["loop"] and GIT_COMPACTION_INTERVAL <= 0:
+            self.stdout.write("History compaction is disabled")
+            return
+        while True:
+            try:
+                with QueryCounter(get_command_label(__name__)):
+                    self._compact(options)
+            except DnsSourceUpdateError as exc:
+                # The errors are already reported for each repository.
+                if not options["loop"]:
+                    raise CommandError(str(exc)) from exc
+            if not options["loop"]:
+                return
+            time.sleep(GIT_COMPACTION_INTERVAL)
@@ -5,6 +5,7 @@
 # imported-auth-user has to be disable as the conflicting import is needed for typing
 # pylint:disable=imported-auth-user
 
+from api.queries import count_command_queries
 from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
 
@@ -27,6 +28,7 @@ class Command(BaseCommand):
         parser.add_argument("username", nargs=None, type=str)
         parser.add_argument("password", nargs=None, type=str)
 
+    @count_command_queries
     def handle(self, *args, **options):
         """Command handler.
 
@@ -6,8 +6,12 @@
 # pylint:disable=imported-auth-user
 
 from api.models import DomainUserPermission
+from api.queries import count_command_queries
 from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+
+USERS_CHUNK_SIZE = 500
 
 
 class Command(BaseCommand):
@@ -27,6 +31,7 @@ class Command(BaseCommand):
         """
         parser.add_argument("username", nargs=None, type=str)
 
+    @count_command_queries
     def handle(self, *args, **options):
         """Command handler.
 
@@ -39,10 +44,16 @@ class Command(BaseCommand):
         """
         username = options["username"]
         if username == "*":
+            users = User.objects.prefetch_related(
+                Prefetch(
+                    "domainuserpermission_set",
+                    queryset=DomainUserPermission.objects.select_related("domain"),
+                )
+            )
             output = []
-            for user in User.objects.iterator():
+            for user in users.iterator(chunk_size=USERS_CHUNK_SIZE):
                 output.append(f"{user}:")
-                dups = DomainUserPermission.objects.filter(user=user)
+                dups = user.domainuserpermission_set.all()
                 output.append(", ".join([dup.domain.fqdn for dup in dups]))
             self.stdout.write(self.style.SUCCESS("\n".join(output)))
         else:
@@ -50,6 +61,8 @@ class Command(BaseCommand):
                 user = User.objects.get(username=username)
             except User.DoesNotExist as exc:
                 raise CommandError(f'User "{username}" does not exist') from exc
-            dups = DomainUserPermission.objects.filter(user=user)
+            fqdns = DomainUserPermission.objects.filter(user=user).values_list(
+                "domain__fqdn", flat=True
+            )
 
-            self.stdout.write(self.style.SUCCESS(", ".join([dup.domain.fqdn for dup in dups])))
+            self.stdout.write(self.style.SUCCESS(", ".join(fqdns)))
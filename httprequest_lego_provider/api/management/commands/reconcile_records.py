@@ -0,0 +1,70 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Reconcile records module."""
+
+import time
+
+from api.dns import DnsSourceUpdateError
+from api.jobs import fail_stale_jobs
+from api.queries import QueryCounter, get_command_label
+from api.records import reconcile_records
+from api.settings import RECORD_RECONCILE_INTERVAL
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """Command to reconcile the last pushed record values with the repository.
+
+    Record change jobs lost by a stopped process are marked as failed along the way.
+
+    Attrs:
+        help: help message to display.
+    """
+
+    help = "Reconcile the last pushed record values with the repository."
+
+    def add_arguments(self, parser):
+        """Argument parser.
+
+        Args:
+            parser: the cmd line parser.
+        """
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Reconcile periodically, every DJANGO_RECORD_RECONCILE_INTERVAL seconds.",
+        )
+
+    def _reconcile(self, options) -> None:
+        """Reconcile the records and fail the stale jobs once.
+
+        Args:
+            options: options.
+
+        Raises:
+            CommandError: if the repository could not be read, unless looping.
+        """
+        try:
+            updated = reconcile_records()
+        except DnsSourceUpdateError as exc:
+            if not options["loop"]:
+                raise CommandError(f"Failed to read the repository: {exc.__cause__}") from exc
+            self.stderr.write(f"Failed to read the repository: {exc.__cause__}")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Reconciled {len(updated)} records"))
+        if failed := fail_stale_jobs():
+            self.stdout.write(f"Marked {failed} stale jobs as failed")
+
+    def handle(self, *args, **options):
+        """Command handler, recording the database queries of each iteration.
+
+        Args:
+            args: args.
+            options: options.
+        """
+        while True:
+            with QueryCounter(get_command_label(__name__)):
+                self._reconcile(options)
+            if not options["loop"]:
+                return
+            time.sleep(RECORD_RECONCILE_INTERVAL)
@@ -7,6 +7,7 @@
 
 from api.forms import FQDN_PREFIX
 from api.models import Domain, DomainUserPermission
+from api.queries import count_command_queries
 from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand, CommandError
 
@@ -31,6 +32,7 @@ class Command(BaseCommand):
         parser.add_argument("username", nargs=None, type=str)
         parser.add_argument("domains", nargs="+", type=str)
 
+    @count_command_queries
     def handle(self, *args, **options):
         """Command handler.
 
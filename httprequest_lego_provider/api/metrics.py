@@ -0,0 +1,175 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Prometheus metrics and OpenTelemetry spans of the record changes."""
+
+import os
+import time
+from collections.abc import Collection, Iterator
+from contextlib import contextmanager
+from typing import Tuple
+
+from opentelemetry import trace
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from .zone import FILENAME_TEMPLATE
+
+MULTIPLE_ZONES = "multiple"
+UNKNOWN_ZONE = "unknown"
+PHASE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+PHASE_DURATION = Histogram(
+    "httprequest_lego_provider_phase_duration_seconds",
+    "Duration of each phase of the record changes.",
+    ["phase", "zone", "outcome"],
+    buckets=PHASE_BUCKETS,
+)
+tracer = trace.get_tracer(__name__)
+
+RECORD_CHANGES = Counter(
+    "httprequest_lego_provider_record_changes_total",
+    "Record changes requested, by outcome.",
+    ["action", "zone", "outcome"],
+)
+
+AUTHORIZATION_CACHE = Counter(
+    "httprequest_lego_provider_authorization_cache_total",
+    "Lookups of the authorization index, by whether they were served from memory, from the "
+    "shared cache or from the database.",
+    ["result"],
+)
+
+CREDENTIAL_CACHE = Counter(
+    "httprequest_lego_provider_credential_cache_total",
+    "Basic authentications, by whether the credentials were verified recently.",
+    ["result"],
+)
+
+LOCK_WAIT_DURATION = Histogram(
+    "httprequest_lego_provider_zone_lock_wait_seconds",
+    "Time spent waiting for the locks of the zone files shared by all the units.",
+    ["zone"],
+    buckets=PHASE_BUCKETS,
+)
+
+SSH_HANDSHAKE_DURATION = Histogram(
+    "httprequest_lego_provider_ssh_handshake_seconds",
+    "Duration of the handshakes starting the master SSH connections to the git host.",
+    ["outcome"],
+    buckets=PHASE_BUCKETS,
+)
+
+SSH_CONNECTIONS = Counter(
+    "httprequest_lego_provider_ssh_connections_total",
+    "Uses of the master SSH connection to the git host, by whether it was reused.",
+    ["outcome"],
+)
+
+ADMISSION_REJECTIONS = Counter(
+    "httprequest_lego_provider_admission_rejections_total",
+    "Record changes rejected by the admission control, by limit exceeded.",
+    ["reason"],
+)
+
+DB_QUERIES = Histogram(
+    "httprequest_lego_provider_db_queries",
+    "Database queries run by each request, by view, or by each management command.",
+    ["path"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+
+QUERY_BUDGET_EXCEEDED = Counter(
+    "httprequest_lego_provider_query_budget_exceeded_total",
+    "Requests running more database queries than their budget, by view.",
+    ["path"],
+)
+
+PENDING_RECORD_CHANGES = Gauge(
+    "httprequest_lego_provider_pending_record_changes",
+    "Record changes admitted and not yet applied.",
+    multiprocess_mode="livesum",
+)
+
+
+class PhaseObservation:
+    """Outcome of a phase being observed.
+
+    Attributes:
+        span: the span tracing the phase.
+        outcome: the outcome of the phase, "error" if it raised an exception, "success" unless
+            overridden otherwise.
+    """
+
+    def __init__(self, span: trace.Span):
+        """Initialize the observation.
+
+        Args:
+            span: the span tracing the phase.
+        """
+        self.span = span
+        self.outcome = "success"
+
+
+@contextmanager
+def observe_phase(phase: str, zone: str) -> Iterator[PhaseObservation]:
+    """Measure the duration of a phase of a record change and trace it as a span.
+
+    Args:
+        phase: the name of the phase.
+        zone: the zone the phase applies to.
+
+    Yields:
+        the observation, whose outcome can be overridden.
+    """
+    with tracer.start_as_current_span(phase, attributes={"zone": zone}) as span:
+        observation = PhaseObservation(span)
+        start = time.perf_counter()
+        try:
+            yield observation
+        except BaseException:
+            observation.outcome = "error"
+            raise
+        finally:
+            PHASE_DURATION.labels(phase=phase, zone=zone, outcome=observation.outcome).observe(
+                time.perf_counter() - start
+            )
+            span.set_attribute("outcome", observation.outcome)
+
+
+def get_zone_label(filenames: Collection[str]) -> str:
+    """Get the zone label of a batch of changes.
+
+    Args:
+        filenames: the zone files changed by the batch.
+
+    Returns:
+        the zone of the changes if they all apply to the same one, "multiple" otherwise.
+    """
+    if len(filenames) != 1:
+        return MULTIPLE_ZONES
+    suffix = FILENAME_TEMPLATE.format(domain="")
+    return next(iter(filenames)).removesuffix(suffix)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Render the metrics in the Prometheus text format.
+
+    The metrics of all the processes are aggregated when the Prometheus multiprocess mode is
+    enabled.
+
+    Returns:
+        the metrics and their content type.
+    """
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_recordchangejob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="domain",
+            name="backend",
+            field=models.CharField(
+                choices=[("git", "Git"), ("zonefile", "Zone file"), ("rfc2136", "RFC 2136")],
+                default="git",
+                max_length=16,
+            ),
+        ),
+    ]
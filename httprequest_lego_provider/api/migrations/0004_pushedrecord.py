@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_domain_backend"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PushedRecord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("fqdn", models.CharField(max_length=255, unique=True)),
+                ("value", models.TextField(blank=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
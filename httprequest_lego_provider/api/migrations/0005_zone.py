@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def assign_zones(apps, schema_editor):
+    """Assign the existing domains to the zone of their last two labels, in lower case.
+
+    The zone files of the existing domains were named after their last two labels, so these
+    zones are registered for the existing domains to keep working.
+
+    Args:
+        apps: the historical application registry.
+        schema_editor: the schema editor.
+    """
+    Domain = apps.get_model("api", "Domain")
+    Zone = apps.get_model("api", "Zone")
+    for domain in Domain.objects.filter(zone__isnull=True):
+        labels = domain.fqdn.rstrip(".").lower().split(".")
+        zone, _ = Zone.objects.get_or_create(name=".".join(labels[-2:]))
+        domain.zone = zone
+        domain.save(update_fields=["zone"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_pushedrecord"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Zone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("name", models.CharField(max_length=253, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="domain",
+            name="zone",
+            field=models.ForeignKey(
+                blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to="api.zone"
+            ),
+        ),
+        migrations.RunPython(assign_zones, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:16
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_zone"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="zone",
+            name="repository",
+            field=models.CharField(
+                blank=True,
+                default="",
+                max_length=2048,
+                validators=[
+                    django.core.validators.RegexValidator(
+                        code="invalid_repository",
+                        message="Enter a repository URL as scheme://user@host/path@branch.",
+                        regex="^[a-z+]+://[^@/\\s]+@[^@\\s]+(@[^@\\s]+)?$",
+                    )
+                ],
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_zone_repository"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuthorizationGeneration",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,344 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Local mirror of the DNS records repository."""
+
+import fcntl
+import logging
+import shutil
+from collections.abc import Collection, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+from git import (
+    Commit,
+    GitCommandError,
+    InvalidGitRepositoryError,
+    NoSuchPathError,
+    RemoteReference,
+    Repo,
+)
+from opentelemetry import trace
+
+from .ssh import SshMaster
+
+logger = logging.getLogger(__name__)
+
+
+def get_objects_size(path: Path) -> int:
+    """Get the size of the objects of a repository, to estimate the amount of data fetched.
+
+    Args:
+        path: the repository directory.
+
+    Returns:
+        the size of the loose and packed objects in bytes, or 0 if there is no repository.
+    """
+    try:
+        counts = dict(
+            line.split(": ", 1) for line in Repo(path).git.count_objects("-v").splitlines()
+        )
+    except (GitCommandError, InvalidGitRepositoryError, NoSuchPathError):
+        return 0
+    return (int(counts.get("size", 0)) + int(counts.get("size-pack", 0))) * 1024
+
+
+class RepositoryMirror:
+    """Long-lived working copy of a remote repository.
+
+    The working copy is shared by all the workers in a unit and access to it is serialized with
+    a file lock, so it is never modified by two requests at the same time.
+
+    A sparse mirror only fetches the tip of the branch, without file contents, and checks out
+    only the files about to be edited. The missing contents are fetched on demand by git.
+
+    Attributes:
+        url: the remote repository URL.
+        branch: the remote branch to track, or None for the remote default branch.
+        path: the directory holding the working copy.
+        user: the user name to commit as.
+        sparse: whether to use a shallow, blob-filtered and sparse working copy.
+        ssh: the master SSH connection the git commands go through, if any.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        url: str,
+        branch: str | None,
+        path: Path,
+        user: str,
+        sparse: bool = False,
+        ssh: SshMaster | None = None,
+    ):
+        """Initialize the mirror.
+
+        Args:
+            url: the remote repository URL.
+            branch: the remote branch to track, or None for the remote default branch.
+            path: the directory holding the working copy.
+            user: the user name to commit as.
+            sparse: whether to use a shallow, blob-filtered and sparse working copy.
+            ssh: the master SSH connection the git commands go through, if any.
+        """
+        self.url = url
+        self.branch = branch
+        self.path = path
+        self.user = user
+        self.sparse = sparse
+        self.ssh = ssh
+
+    @property
+    def environment(self) -> Dict[str, str]:
+        """Get the environment of the git commands run against the remote repository.
+
+        Returns:
+            the environment variables.
+        """
+        if self.ssh is None:
+            return {}
+        return {"GIT_SSH_COMMAND": self.ssh.command}
+
+    @contextmanager
+    def checkout(self, filenames: Collection[str] = ()) -> Iterator[Repo]:
+        """Lock the mirror and bring it up to date with the remote branch.
+
+        Args:
+            filenames: the files to check out, in addition to the rest of the tree unless the
+                mirror is sparse.
+
+        Yields:
+            the repository, with its working tree matching the tip of the remote branch.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{self.path}.lock", "a", encoding="utf-8") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                span = trace.get_current_span()
+                if not span.is_recording():
+                    yield self._sync(filenames)
+                    return
+                size = get_objects_size(self.path)
+                repo = self._sync(filenames)
+                span.set_attribute(
+                    "git.received_bytes", max(get_objects_size(self.path) - size, 0)
+                )
+                yield repo
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def tip(self, repo: Repo) -> Commit:
+        """Get the commit at the tip of the remote branch, as last fetched.
+
+        Args:
+            repo: the repository, as yielded by checkout.
+
+        Returns:
+            the commit.
+        """
+        return repo.head.commit
+
+    def get_missing_files(self, filenames: Collection[str]) -> List[str]:
+        """Find the files missing from the tip of the remote branch, as last fetched.
+
+        The mirror is neither locked nor updated, so the files added to the remote branch since
+        the last fetch are reported as missing.
+
+        Args:
+            filenames: the files to look up.
+
+        Returns:
+            the files missing, all of them if the mirror is missing or unusable.
+        """
+        try:
+            tree = self.tip(Repo(self.path)).tree
+        except (InvalidGitRepositoryError, NoSuchPathError, TypeError, ValueError):
+            return list(filenames)
+        missing = []
+        for filename in filenames:
+            try:
+                tree / filename  # pylint: disable=pointless-statement
+            except KeyError:
+                missing.append(filename)
+        return missing
+
+    def _sync(self, filenames: Collection[str]) -> Repo:
+        """Update the working copy, cloning it again if it is missing or corrupted.
+
+        Args:
+            filenames: the files to check out when the mirror is sparse.
+
+        Returns:
+            the up to date repository.
+        """
+        if self.ssh is not None:
+            self.ssh.ensure()
+        if self.path.exists():
+            try:
+                return self._update(filenames)
+            except (
+                GitCommandError,
+                InvalidGitRepositoryError,
+                NoSuchPathError,
+                TypeError,
+                ValueError,
+            ):
+                logger.warning("Mirror %s is unusable, rebuilding it.", self.path, exc_info=True)
+                shutil.rmtree(self.path, ignore_errors=True)
+        repo = self._clone()
+        self._reset(repo, filenames)
+        return repo
+
+    def _clone(self) -> Repo:
+        """Clone the remote repository into the mirror directory.
+
+        Returns:
+            the cloned repository.
+        """
+        if self.sparse:
+            repo = Repo.clone_from(
+                self.url,
+                self.path,
+                env=self.environment,
+                branch=self.branch,
+                depth=1,
+                filter="blob:none",
+                no_checkout=True,
+            )
+        else:
+            repo = Repo.clone_from(self.url, self.path, env=self.environment, branch=self.branch)
+        repo.git.update_environment(**self.environment)
+        config_writer = repo.config_writer()
+        config_writer.set_value("user", "name", self.user)
+        if self.sparse:
+            config_writer.set_value("core", "sparseCheckout", "true")
+            config_writer.set_value("core", "sparseCheckoutCone", "false")
+        config_writer.release()
+        return repo
+
+    def _update(self, filenames: Collection[str]) -> Repo:
+        """Fetch the remote branch and hard reset the working copy to it.
+
+        Args:
+            filenames: the files to check out when the mirror is sparse.
+
+        Returns:
+            the updated repository.
+        """
+        repo = self._open()
+        if self.sparse:
+            repo.remote(name="origin").fetch(depth=1)
+        else:
+            repo.remote(name="origin").fetch()
+        self._reset(repo, filenames)
+        return repo
+
+    def _open(self) -> Repo:
+        """Open the mirror, running its git commands in the environment of the remote repository.
+
+        Returns:
+            the repository.
+        """
+        repo = Repo(self.path)
+        repo.git.update_environment(**self.environment)
+        return repo
+
+    def _reset(self, repo: Repo, filenames: Collection[str]) -> None:
+        """Hard reset the working copy to the remote branch.
+
+        Args:
+            repo: the repository.
+            filenames: the files to check out when the mirror is sparse.
+
+        Raises:
+            ValueError: if the local branch does not track a remote branch.
+        """
+        tracking_branch = repo.active_branch.tracking_branch()
+        if tracking_branch is None:
+            raise ValueError(f"Branch {repo.active_branch} does not track a remote branch")
+        if self.sparse:
+            # Written directly rather than with `git sparse-checkout set --no-cone`, which is not
+            # available in the git version shipped with Ubuntu 22.04.
+            sparse_checkout_file = Path(repo.git_dir, "info", "sparse-checkout")
+            sparse_checkout_file.parent.mkdir(exist_ok=True)
+            sparse_checkout_file.write_text(
+                "".join(f"/{filename}\n" for filename in sorted(filenames)), encoding="utf-8"
+            )
+        repo.git.reset("--hard", tracking_branch.name)
+        repo.git.clean("-xdf")
+
+
+class BareRepositoryMirror(RepositoryMirror):
+    """Long-lived bare copy of a remote repository, without working tree nor index.
+
+    The remote branches are fetched as remote-tracking branches, and commits are meant to be
+    created directly in the object database on top of them.
+    """
+
+    def tracking_branch(self, repo: Repo) -> RemoteReference:
+        """Get the remote-tracking branch of the tracked remote branch.
+
+        Args:
+            repo: the repository.
+
+        Returns:
+            the remote-tracking branch.
+
+        Raises:
+            ValueError: if the remote branch has not been fetched.
+        """
+        branch = self.branch or repo.head.reference.name
+        try:
+            return repo.remote(name="origin").refs[branch]
+        except IndexError as exc:
+            raise ValueError(f"Remote branch {branch} has not been fetched") from exc
+
+    def tip(self, repo: Repo) -> Commit:
+        """Get the commit at the tip of the remote branch, as last fetched.
+
+        Args:
+            repo: the repository, as yielded by checkout.
+
+        Returns:
+            the commit.
+        """
+        return self.tracking_branch(repo).commit
+
+    def _clone(self) -> Repo:
+        """Clone the remote repository into the mirror directory and fetch its branches.
+
+        Returns:
+            the cloned repository.
+        """
+        repo = Repo.clone_from(
+            self.url, self.path, env=self.environment, branch=self.branch, bare=True
+        )
+        repo.git.update_environment(**self.environment)
+        config_writer = repo.config_writer()
+        config_writer.set_value("user", "name", self.user)
+        config_writer.set_value('remote "origin"', "fetch", "+refs/heads/*:refs/remotes/origin/*")
+        config_writer.release()
+        repo.remote(name="origin").fetch()
+        return repo
+
+    def _update(self, filenames: Collection[str]) -> Repo:
+        """Fetch the remote branches.
+
+        Args:
+            filenames: unused, as there is no working tree to check out.
+
+        Returns:
+            the updated repository.
+        """
+        repo = self._open()
+        repo.remote(name="origin").fetch()
+        self._reset(repo, filenames)
+        return repo
+
+    def _reset(self, repo: Repo, filenames: Collection[str]) -> None:
+        """Check that the remote branch has been fetched.
+
+        Args:
+            repo: the repository.
+            filenames: unused, as there is no working tree to check out.
+        """
+        self.tracking_branch(repo)
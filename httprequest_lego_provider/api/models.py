@@ -2,18 +2,122 @@
 # See LICENSE file for licensing details.
 """Models."""
 
+import uuid
+
 from django.contrib import auth
 from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models.functions import Length
+
+from .zone import FILENAME_TEMPLATE, zone_repositories, zone_trie
+
+
+class Zone(models.Model):
+    """DNS zone, stored in its own zone file.
+
+    Zones are kept in the in-memory zone trie of the process when saved or deleted.
+
+    Attributes:
+        name: name of the zone.
+        repository: URL of the repository holding the zone file, in the same format as the
+            git-repo configuration, or empty for the default repository.
+    """
+
+    name = models.CharField(max_length=253, unique=True)
+    repository = models.CharField(
+        max_length=2048,
+        blank=True,
+        default="",
+        validators=[
+            RegexValidator(
+                regex=r"^[a-z+]+://[^@/\s]+@[^@\s]+(@[^@\s]+)?$",
+                message="Enter a repository URL as scheme://user@host/path@branch.",
+                code="invalid_repository",
+            ),
+        ],
+    )
+
+    @property
+    def filename(self) -> str:
+        """Get the name of the zone file.
+
+        Returns:
+            the zone filename.
+        """
+        return FILENAME_TEMPLATE.format(domain=self.name)
+
+    @classmethod
+    def for_fqdn(cls, fqdn: str) -> "Zone | None":
+        """Get the registered zone of a FQDN.
+
+        Args:
+            fqdn: the FQDN.
+
+        Returns:
+            the longest registered zone the FQDN is part of, or None if there is none.
+        """
+        labels = fqdn.rstrip(".").lower().split(".")
+        suffixes = [".".join(labels[index:]) for index in range(len(labels))]
+        return cls.objects.filter(name__in=suffixes).order_by(Length("name").desc()).first()
+
+    def save(self, *args, **kwargs):
+        """Save the zone and move the domains it contains from their parent zone.
+
+        The name is normalized to lower case, as the FQDNs are matched against it.
+
+        Args:
+            args: positional arguments for Model.save.
+            kwargs: keyword arguments for Model.save.
+        """
+        self.name = self.name.rstrip(".").lower()
+        super().save(*args, **kwargs)
+        zone_trie.add(self.name)
+        if self.repository:
+            zone_repositories[self.name] = self.repository
+        else:
+            zone_repositories.pop(self.name, None)
+        domains = Domain.objects.filter(
+            models.Q(fqdn=self.name) | models.Q(fqdn__endswith=f".{self.name}")
+        ).select_related("zone")
+        for domain in domains:
+            if domain.zone is None or len(domain.zone.name) < len(self.name):
+                domain.zone = self
+                domain.save(update_fields=["zone"])
+
+    def delete(self, *args, **kwargs):
+        """Delete the zone.
+
+        Args:
+            args: positional arguments for Model.delete.
+            kwargs: keyword arguments for Model.delete.
+
+        Returns:
+            the number of objects deleted, by type.
+        """
+        name = self.name
+        deleted = super().delete(*args, **kwargs)
+        zone_trie.remove(name)
+        zone_repositories.pop(name, None)
+        return deleted
 
 
 class Domain(models.Model):
     """DNS domain.
 
     Attributes:
+        GIT: backend committing the records to the git repository.
+        ZONE_FILE: backend writing the records to local zone files.
+        RFC2136: backend sending the records with RFC 2136 dynamic updates.
         fqdn: fully-qualified domain name.
+        backend: backend the records of the domain are written to.
+        zone: zone the records of the domain are stored in, found when the domain is created.
+            The records of a domain without a registered zone cannot be changed.
     """
 
+    GIT = "git"
+    ZONE_FILE = "zonefile"
+    RFC2136 = "rfc2136"
+
     fqdn = models.CharField(
         max_length=200,
         unique=True,
@@ -25,6 +129,23 @@ class Domain(models.Model):
             ),
         ],
     )
+    backend = models.CharField(
+        max_length=16,
+        choices=[(GIT, "Git"), (ZONE_FILE, "Zone file"), (RFC2136, "RFC 2136")],
+        default=GIT,
+    )
+    zone = models.ForeignKey(Zone, on_delete=models.PROTECT, null=True, blank=True)
+
+    def save(self, *args, **kwargs):
+        """Save the domain, assigning it to its registered zone, if any, when created.
+
+        Args:
+            args: positional arguments for Model.save.
+            kwargs: keyword arguments for Model.save.
+        """
+        if self.zone_id is None:
+            self.zone = Zone.for_fqdn(self.fqdn)
+        super().save(*args, **kwargs)
 
 
 class DomainUserPermission(models.Model):
@@ -39,3 +160,71 @@ class DomainUserPermission(models.Model):
     domain = models.ForeignKey(Domain, on_delete=models.CASCADE)
     user = models.ForeignKey(auth.get_user_model(), on_delete=models.CASCADE)
     text = models.TextField()
+
+
+class AuthorizationGeneration(models.Model):
+    """Generation of the authorization index, shared by all the processes and units.
+
+    A single row, moved to a new generation by any change to the domains, zones or permissions,
+    whichever process makes it.
+
+    Attributes:
+        value: the generation.
+    """
+
+    value = models.BigIntegerField(default=0)
+
+
+class RecordChangeJob(models.Model):
+    """Record change processed in the background.
+
+    Attributes:
+        PRESENT: action adding the record.
+        CLEANUP: action removing the record.
+        QUEUED: status of a job waiting to be pushed.
+        PUSHED: status of a job pushed to the repository.
+        FAILED: status of a job that could not be pushed.
+        id: job identifier.
+        user: user that requested the change.
+        fqdn: fully-qualified domain name of the record.
+        value: ACME challenge of the record.
+        action: whether the record is added or removed.
+        status: processing status.
+        error: details on the failure, if any.
+        created_at: creation time.
+        updated_at: last update time.
+    """
+
+    PRESENT = "present"
+    CLEANUP = "cleanup"
+    QUEUED = "queued"
+    PUSHED = "pushed"
+    FAILED = "failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(auth.get_user_model(), on_delete=models.CASCADE)
+    fqdn = models.CharField(max_length=255)
+    value = models.TextField(blank=True)
+    action = models.CharField(max_length=10, choices=[(PRESENT, "Present"), (CLEANUP, "Cleanup")])
+    status = models.CharField(
+        max_length=10,
+        choices=[(QUEUED, "Queued"), (PUSHED, "Pushed"), (FAILED, "Failed")],
+        default=QUEUED,
+    )
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class PushedRecord(models.Model):
+    """ACME challenge record value last pushed for a FQDN.
+
+    Attributes:
+        fqdn: fully-qualified domain name of the record.
+        value: ACME challenge of the record, or empty if there is no record.
+        updated_at: last update time.
+    """
+
+    fqdn = models.CharField(max_length=255, unique=True)
+    value = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
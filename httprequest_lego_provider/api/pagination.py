@@ -0,0 +1,49 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Pagination of the REST API list endpoints."""
+
+from rest_framework import pagination
+
+from .settings import API_MAX_PAGE_SIZE, API_PAGE_SIZE
+
+
+class IdCursorPagination(pagination.CursorPagination):
+    """Cursor pagination ordered by the primary key.
+
+    The pages are fetched by keyset, without counting the rows, so the cost of a page does not
+    grow with the table. The primary key never changes, so the rows inserted or deleted while
+    paginating do not shift the following pages.
+
+    Attributes:
+        ordering: the field the rows are ordered by.
+        page_size: the default number of rows in a page.
+        page_size_query_param: the query parameter selecting the number of rows in a page.
+        max_page_size: the maximum number of rows in a page.
+    """
+
+    ordering = "id"
+    page_size = API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = API_MAX_PAGE_SIZE
+
+
+class CreatedAtCursorPagination(IdCursorPagination):
+    """Cursor pagination listing the most recently created rows first.
+
+    Attributes:
+        ordering: the field the rows are ordered by.
+    """
+
+    ordering = "-created_at"
+
+
+class DateJoinedCursorPagination(IdCursorPagination):
+    """Cursor pagination listing the most recently joined users first.
+
+    The primary key orders the users who joined at the same time.
+
+    Attributes:
+        ordering: the fields the rows are ordered by.
+    """
+
+    ordering = ("-date_joined", "-id")
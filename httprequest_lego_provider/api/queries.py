@@ -0,0 +1,185 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Count of the database queries run by the requests and management commands."""
+
+import functools
+import logging
+from contextlib import ExitStack
+from typing import Callable, List
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+from .metrics import DB_QUERIES, QUERY_BUDGET_EXCEEDED
+from .settings import REQUEST_QUERY_BUDGET
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_PATH = "unmatched"
+
+
+class QueryCounter:
+    """Context manager counting the database queries run by the current thread.
+
+    The count is recorded under the label of the code path, if any, when leaving the context.
+    Exceeding the budget is recorded and logged, not raised, so a slow path is still served.
+
+    Attributes:
+        label: the code path the queries are recorded for, or None to only count them.
+        budget: the number of queries the code path is expected to run at most, 0 for no budget.
+        queries: the SQL of the queries run.
+    """
+
+    def __init__(self, label: str | None = None, budget: int = 0):
+        """Initialize the counter.
+
+        Args:
+            label: the code path the queries are recorded for, or None to only count them.
+            budget: the number of queries the code path is expected to run at most, 0 for no
+                budget.
+        """
+        self.label = label
+        self.budget = budget
+        self.queries: List[str] = []
+        self._exit_stack = ExitStack()
+
+    @property
+    def count(self) -> int:
+        """Get the number of queries run.
+
+        Returns:
+            the number of queries.
+        """
+        return len(self.queries)
+
+    @property
+    def exceeded(self) -> bool:
+        """Check whether more queries than the budget were run.
+
+        Returns:
+            whether the budget was exceeded.
+        """
+        return bool(self.budget) and self.count > self.budget
+
+    def __call__(self, execute, sql, params, many, context):
+        """Count a query, as an execute wrapper of the database connections.
+
+        Args:
+            execute: the function executing the query.
+            sql: the SQL of the query.
+            params: the parameters of the query.
+            many: whether the query is run for several sets of parameters.
+            context: the context of the query.
+
+        Returns:
+            the result of the query.
+        """
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __enter__(self) -> "QueryCounter":
+        """Start counting the queries.
+
+        Returns:
+            the counter.
+        """
+        for connection in connections.all():
+            self._exit_stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *_) -> None:
+        """Stop counting the queries and record their number."""
+        self._exit_stack.close()
+        if self.label is None:
+            return
+        DB_QUERIES.labels(path=self.label).observe(self.count)
+        if self.exceeded:
+            QUERY_BUDGET_EXCEEDED.labels(path=self.label).inc()
+            logger.warning(
+                "%s ran %d database queries, over its budget of %d",
+                self.label,
+                self.count,
+                self.budget,
+            )
+
+
+def get_command_label(module: str) -> str:
+    """Get the code path the database queries of a management command are recorded for.
+
+    Args:
+        module: the module of the command.
+
+    Returns:
+        the code path.
+    """
+    return f"command:{module.rsplit('.', 1)[-1]}"
+
+
+def count_command_queries(handle: Callable) -> Callable:
+    """Decorate the handler of a one-shot management command to record its database queries.
+
+    The commands running in a loop count the queries of each iteration instead, the handler
+    never returning.
+
+    Args:
+        handle: the handler of the command.
+
+    Returns:
+        the decorated handler.
+    """
+
+    @functools.wraps(handle)
+    def wrapper(self, *args, **options):
+        """Run the handler, counting its database queries.
+
+        Args:
+            self: the command.
+            args: args.
+            options: options.
+
+        Returns:
+            the result of the handler.
+        """
+        with QueryCounter(get_command_label(self.__module__)):
+            return handle(self, *args, **options)
+
+    return wrapper
+
+
+class QueryCountMiddleware:
+    """Middleware recording the database queries run by each request, by view.
+
+    Only the synchronous requests are counted. The queries of the asynchronous views run in
+    other threads, on their own connections.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable):
+        """Initialize the middleware.
+
+        Args:
+            get_response: the next middleware or view.
+        """
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Handle a request, counting its database queries.
+
+        Args:
+            request: the HTTP request.
+
+        Returns:
+            the HTTP response.
+        """
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+        with QueryCounter(budget=REQUEST_QUERY_BUDGET) as counter:
+            response = self.get_response(request)
+            match = getattr(request, "resolver_match", None)
+            counter.label = match.view_name if match else UNMATCHED_PATH
+        return response
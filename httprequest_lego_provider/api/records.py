@@ -0,0 +1,241 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Desired state of the ACME challenge records, to skip the changes already applied."""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from collections.abc import Callable, Collection, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, TypeVar
+
+from django.db import close_old_connections
+
+from .backends import get_backend
+from .dns import DnsSourceUpdateError, RecordChangeCancelledError, read_dns_records
+from .models import Domain, PushedRecord
+from .registry import load_zones, resolve_zone
+from .settings import RECORD_APPLY_WORKERS
+from .writer import RecordChange
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def is_record_applied(fqdn: str, value: str | None) -> bool:
+    """Check whether the record of a FQDN is known to already have a value.
+
+    Args:
+        fqdn: the FQDN of the record.
+        value: the expected ACME challenge, or None if the record is expected to be absent.
+
+    Returns:
+        whether the last pushed value of the record matches.
+    """
+    return PushedRecord.objects.filter(fqdn=fqdn, value=value or "").exists()
+
+
+def record_applied(fqdn: str, value: str | None) -> None:
+    """Store the value of the record of a FQDN once pushed.
+
+    Args:
+        fqdn: the FQDN of the record.
+        value: the pushed ACME challenge, or None if the record was removed.
+    """
+    PushedRecord.objects.update_or_create(fqdn=fqdn, defaults={"value": value or ""})
+
+
+def get_applied_records(fqdns: Collection[str]) -> Dict[str, str]:
+    """Get the last pushed values of the records of several FQDNs, in a single query.
+
+    Args:
+        fqdns: the FQDNs of the records.
+
+    Returns:
+        the last pushed value of each record, empty if it was removed, for the FQDNs known.
+    """
+    return dict(PushedRecord.objects.filter(fqdn__in=fqdns).values_list("fqdn", "value"))
+
+
+def forget_record(fqdn: str) -> None:
+    """Forget the value of the record of a FQDN, when it is unknown after a failure.
+
+    Args:
+        fqdn: the FQDN of the record.
+    """
+    PushedRecord.objects.filter(fqdn=fqdn).delete()
+
+
+def apply_record_change(fqdn: str, backend: str, value: str | None) -> None:
+    """Apply a record change and store the value of the record once pushed.
+
+    The value of a record whose change was superseded by a later change is forgotten rather
+    than stored, the later change storing the value once pushed.
+
+    Args:
+        fqdn: the FQDN of the record.
+        backend: the name of the backend the record is written to.
+        value: the ACME challenge of the record, or None to remove the record.
+
+    Raises:
+        DnsSourceUpdateError: if no zone is registered for the FQDN or the change could not be
+            applied.
+    """
+    resolve_zone(fqdn)
+    try:
+        if value is None:
+            get_backend(backend).cleanup(fqdn)
+        else:
+            get_backend(backend).present(fqdn, value)
+    except RecordChangeCancelledError:
+        logger.info("Change of the %s record superseded by a later change", fqdn)
+        forget_record(fqdn)
+        return
+    except DnsSourceUpdateError:
+        forget_record(fqdn)
+        raise
+    record_applied(fqdn, value)
+
+
+def apply_record_changes(backend: str, changes: Collection[RecordChange]) -> None:
+    """Apply several record changes to a backend together, storing the values once pushed.
+
+    The git backend pushes the changes in a single commit per repository. The errors are set on
+    the changes instead of being raised, so the outcome of each change can be reported. An error
+    raised by the backend only applies to the changes it did not resolve.
+
+    Args:
+        backend: the name of the backend the records are written to.
+        changes: the changes to apply, at most one per FQDN.
+    """
+    resolved = []
+    for change in changes:
+        try:
+            resolve_zone(change.fqdn)
+            resolved.append(change)
+        except DnsSourceUpdateError as exc:
+            change.error = exc
+    if resolved:
+        try:
+            get_backend(backend).batch(resolved)
+        except DnsSourceUpdateError as exc:
+            for change in resolved:
+                if not change.done:
+                    change.resolve(exc)
+    PushedRecord.objects.filter(
+        fqdn__in=[change.fqdn for change in resolved if change.error or change.cancelled]
+    ).delete()
+    PushedRecord.objects.bulk_create(
+        [
+            PushedRecord(fqdn=change.fqdn, value=change.value or "")
+            for change in resolved
+            if not change.error and not change.cancelled
+        ],
+        update_conflicts=True,
+        unique_fields=["fqdn"],
+        update_fields=["value", "updated_at"],
+    )
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the executor running the record operations of the asynchronous views.
+
+    Returns:
+        the executor.
+    """
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=RECORD_APPLY_WORKERS, thread_name_prefix="record-apply"
+            )
+        return _executor
+
+
+def _call_with_connections(func: Callable[..., T], *args) -> T:
+    """Call a function using the database, closing the connections of the thread unused.
+
+    Args:
+        func: the function.
+        args: the arguments of the function.
+
+    Returns:
+        the result of the function.
+    """
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_record_operation(func: Callable[..., T], *args) -> T:
+    """Run a blocking record operation on the bounded pool of threads.
+
+    The operations reading or writing the DNS records wait on git or the DNS servers. Running
+    them on a bounded pool lets the event loop serve many requests concurrently, while bounding
+    the number of threads and database connections.
+
+    Args:
+        func: the operation, such as apply_record_change.
+        args: the arguments of the operation.
+
+    Returns:
+        the result of the operation.
+    """
+    # The context is copied for the tracing spans to be attached to the request.
+    call = functools.partial(contextvars.copy_context().run, _call_with_connections, func, *args)
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), call)
+
+
+def _reconcile(fqdn: str, values: List[str]) -> bool:
+    """Reconcile the stored value of the record of a FQDN with the values found.
+
+    Args:
+        fqdn: the FQDN of the record.
+        values: the values of the record in the repository.
+
+    Returns:
+        whether the stored value was updated.
+    """
+    if len(values) > 1:
+        deleted, _ = PushedRecord.objects.filter(fqdn=fqdn).delete()
+        return bool(deleted)
+    value = values[0] if values else ""
+    if PushedRecord.objects.filter(fqdn=fqdn, value=value).exists():
+        return False
+    PushedRecord.objects.update_or_create(fqdn=fqdn, defaults={"value": value})
+    return True
+
+
+def reconcile_records(fqdns: Iterable[str] | None = None) -> Dict[str, List[str]]:
+    """Reconcile the stored values of the records with the git repository.
+
+    Only the domains using the git backend are reconciled. Records with several values are
+    forgotten, so the next change is applied.
+
+    Args:
+        fqdns: the FQDNs to reconcile, or None for all the domains using the git backend.
+
+    Returns:
+        the values found in the repository for the FQDNs whose stored value was updated.
+
+    Raises:
+        DnsSourceUpdateError: if the repository could not be read.
+    """
+    if fqdns is None:
+        fqdns = Domain.objects.filter(backend=Domain.GIT).values_list("fqdn", flat=True)
+    load_zones()
+    values_by_fqdn = read_dns_records(list(fqdns))
+    updated = {}
+    for fqdn, values in values_by_fqdn.items():
+        if _reconcile(fqdn, values):
+            logger.info("Reconciled record %s with values %s", fqdn, values)
+            updated[fqdn] = values
+    return updated
@@ -0,0 +1,72 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Registry of the zones, mirrored from the database in the in-memory zone trie."""
+
+import threading
+import time
+from typing import List
+
+from .dns import DnsSourceUpdateError
+from .models import Zone
+from .settings import GIT_REPO_URL, ZONE_REGISTRY_TTL
+from .zone import replace_zone_repositories, zone_trie
+
+_loaded_at: float | None = None
+_lock = threading.Lock()
+
+
+def load_zones(force: bool = False) -> None:
+    """Load the registered zones into the zone trie, unless they were loaded recently.
+
+    The zones saved by this process are added to the trie, with their repository, right away;
+    the ones saved by the other units and workers are picked up when the trie is reloaded.
+
+    Args:
+        force: whether to reload the zones even if they were loaded recently.
+    """
+    global _loaded_at  # pylint: disable=global-statement
+    with _lock:
+        if (
+            not force
+            and _loaded_at is not None
+            and time.monotonic() - _loaded_at < ZONE_REGISTRY_TTL
+        ):
+            return
+        zones = list(Zone.objects.values_list("name", "repository"))
+        zone_trie.replace(name for name, _ in zones)
+        replace_zone_repositories({name: repository for name, repository in zones if repository})
+        _loaded_at = time.monotonic()
+
+
+def resolve_zone(fqdn: str) -> str:
+    """Find the registered zone of a FQDN, before touching the DNS records.
+
+    Args:
+        fqdn: the FQDN.
+
+    Returns:
+        the longest registered zone the FQDN is part of.
+
+    Raises:
+        DnsSourceUpdateError: if no zone is registered for the FQDN.
+    """
+    load_zones()
+    zone = zone_trie.find(fqdn)
+    if zone is None:
+        load_zones(force=True)
+        zone = zone_trie.find(fqdn)
+    if zone is None:
+        raise DnsSourceUpdateError(f"No zone registered for {fqdn}")
+    return zone
+
+
+def get_repository_urls() -> List[str]:
+    """Get the URLs of all the repositories holding zone files.
+
+    Returns:
+        the default repository URL, if configured, followed by the repositories of the zones.
+    """
+    urls = [GIT_REPO_URL] if GIT_REPO_URL else []
+    repositories = Zone.objects.exclude(repository="").values_list("repository", flat=True)
+    urls.extend(url for url in sorted(set(repositories)) if url not in urls)
+    return urls
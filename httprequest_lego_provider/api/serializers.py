@@ -10,11 +10,71 @@ from django.contrib.auth.models import User
 from rest_framework import serializers
 
 from .forms import FQDN_PREFIX
-from .models import Domain, DomainUserPermission
+from .models import Domain, DomainUserPermission, RecordChangeJob, Zone
 
+FIELDS_QUERY_PARAM = "fields"
 
-class DomainSerializer(serializers.ModelSerializer):
-    """Serializer for the Domain objects."""
+
+class SparseFieldsMixin:  # pylint: disable=too-few-public-methods
+    """Serializer mixin restricting the fields read to those of the `fields` query parameter.
+
+    The parameter is a comma-separated list of field names, and only applies to the read
+    requests, so the writes are still fully validated.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the serializer, dropping the fields not requested.
+
+        Args:
+            args: positional arguments of the serializer.
+            kwargs: keyword arguments of the serializer.
+
+        Raises:
+            ValidationError: if a requested field does not exist.
+        """
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in ("GET", "HEAD"):
+            return
+        requested = request.query_params.get(FIELDS_QUERY_PARAM)
+        if not requested:
+            return
+        names = {name.strip() for name in requested.split(",") if name.strip()}
+        readable = {name for name, field in self.fields.items() if not field.write_only}
+        if unknown := names - readable:
+            raise serializers.ValidationError(
+                {
+                    FIELDS_QUERY_PARAM: f"Unknown fields {', '.join(sorted(unknown))}, "
+                    f"expected some of {', '.join(sorted(readable))}"
+                }
+            )
+        for name in set(self.fields) - names:
+            self.fields.pop(name)
+
+
+class ZoneSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for the Zone objects."""
+
+    class Meta:
+        """Serializer configuration.
+
+        Attributes:
+            model: the model to serialize.
+            fields: fields to serialize.
+        """
+
+        model = Zone
+        fields = ["id", "name", "repository"]
+
+
+class DomainSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for the Domain objects.
+
+    Attributes:
+        zone: the name of the zone of the domain, found when the domain is created.
+    """
+
+    zone = serializers.SlugRelatedField(slug_field="name", read_only=True)
 
     class Meta:
         """Serializer configuration.
@@ -27,6 +87,22 @@ class DomainSerializer(serializers.ModelSerializer):
         model = Domain
         fields = "__all__"
 
+    def validate_fqdn(self, value: str) -> str:
+        """Check that a zone is registered for the FQDN.
+
+        Args:
+            value: the FQDN.
+
+        Returns:
+            the FQDN.
+
+        Raises:
+            ValidationError: if no zone is registered for the FQDN.
+        """
+        if Zone.for_fqdn(value) is None:
+            raise serializers.ValidationError(f"No zone registered for {value}")
+        return value
+
     def create(self, validated_data):
         """Override default ModelSerializer create call to add the FQDN prefix.
 
@@ -40,7 +116,7 @@ class DomainSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class DomainUserPermissionSerializer(serializers.ModelSerializer):
+class DomainUserPermissionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for the DomainUserPermission objects."""
 
     class Meta:
@@ -55,7 +131,22 @@ class DomainUserPermissionSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class UserSerializer(serializers.ModelSerializer):
+class RecordChangeJobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer for the RecordChangeJob objects."""
+
+    class Meta:
+        """Serializer configuration.
+
+        Attributes:
+            model: the model to serialize.
+            fields: fields to serialize.
+        """
+
+        model = RecordChangeJob
+        fields = ["id", "fqdn", "action", "status", "error", "created_at", "updated_at"]
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for the User objects."""
 
     class Meta:
@@ -84,3 +175,17 @@ class UserSerializer(serializers.ModelSerializer):
         """
         validated_data["password"] = make_password(validated_data["password"])
         return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        """Override default ModelSerializer update call to hash the password.
+
+        Arguments:
+            instance: the User object to update.
+            validated_data: Serializer validated data
+
+        Returns:
+            The updated User object.
+        """
+        if "password" in validated_data:
+            validated_data["password"] = make_password(validated_data["password"])
+        return super().update(instance, validated_data)
@@ -3,7 +3,59 @@
 """Settings."""
 
 import os
+import tempfile
 
 GIT_REPO_URL = os.getenv("DJANGO_GIT_REPO", default="")
 GIT_SSH_KEY = os.getenv("DJANGO_GIT_SSH_KEY", default="")
+GIT_MIRROR_DIR = os.getenv(
+    "DJANGO_GIT_MIRROR_DIR",
+    default=os.path.join(tempfile.gettempdir(), "httprequest-lego-provider"),
+)
+GIT_SSH_CONTROL_DIR = os.getenv(
+    "DJANGO_GIT_SSH_CONTROL_DIR",
+    default=os.path.join(tempfile.gettempdir(), "httprequest-lego-provider-ssh"),
+)
+GIT_SSH_CONTROL_PERSIST = int(os.getenv("DJANGO_GIT_SSH_CONTROL_PERSIST", default="600"))
+GIT_CLONE_MODE = os.getenv("DJANGO_GIT_CLONE_MODE", default="full")
+GIT_COMMIT_WINDOW = float(os.getenv("DJANGO_GIT_COMMIT_WINDOW", default="0.5"))
+GIT_PUSH_RETRIES = int(os.getenv("DJANGO_GIT_PUSH_RETRIES", default="5"))
+GIT_PUSH_BACKOFF = float(os.getenv("DJANGO_GIT_PUSH_BACKOFF", default="0.2"))
+GIT_COMPACTION_RETENTION = float(os.getenv("DJANGO_GIT_COMPACTION_RETENTION", default="30"))
+GIT_COMPACTION_INTERVAL = float(os.getenv("DJANGO_GIT_COMPACTION_INTERVAL", default="0"))
+GIT_COMPACTION_ARCHIVE_REF = os.getenv("DJANGO_GIT_COMPACTION_ARCHIVE_REF", default="")
+AUTHORIZATION_CACHE_SIZE = int(os.getenv("DJANGO_AUTHORIZATION_CACHE_SIZE", default="4096"))
+AUTHORIZATION_CACHE_TTL = float(os.getenv("DJANGO_AUTHORIZATION_CACHE_TTL", default="60"))
+AUTHORIZATION_GENERATION_TTL = float(os.getenv("DJANGO_AUTHORIZATION_GENERATION_TTL", default="1"))
+CREDENTIAL_CACHE_SIZE = int(os.getenv("DJANGO_CREDENTIAL_CACHE_SIZE", default="1024"))
+CREDENTIAL_CACHE_TTL = float(os.getenv("DJANGO_CREDENTIAL_CACHE_TTL", default="30"))
+ZONE_CACHE_SIZE = int(os.getenv("DJANGO_ZONE_CACHE_SIZE", default="32"))
+ZONE_STREAMING_THRESHOLD = int(os.getenv("DJANGO_ZONE_STREAMING_THRESHOLD", default="4194304"))
+ZONE_REGISTRY_TTL = float(os.getenv("DJANGO_ZONE_REGISTRY_TTL", default="60"))
+ZONE_FILE_DIR = os.getenv("DJANGO_ZONE_FILE_DIR", default="")
+RFC2136_NAMESERVER = os.getenv("DJANGO_RFC2136_NAMESERVER", default="")
+RFC2136_PORT = int(os.getenv("DJANGO_RFC2136_PORT", default="53"))
+RFC2136_TSIG_KEY_NAME = os.getenv("DJANGO_RFC2136_TSIG_KEY_NAME", default="")
+RFC2136_TSIG_KEY_SECRET = os.getenv("DJANGO_RFC2136_TSIG_KEY_SECRET", default="")
+RFC2136_TSIG_ALGORITHM = os.getenv("DJANGO_RFC2136_TSIG_ALGORITHM", default="hmac-sha256")
+RFC2136_TIMEOUT = float(os.getenv("DJANGO_RFC2136_TIMEOUT", default="10"))
+RECORD_CHANGES_ASYNC = os.getenv("DJANGO_ASYNC_RECORD_CHANGES", default="").lower() == "true"
+RECORD_JOB_WAIT = float(os.getenv("DJANGO_RECORD_JOB_WAIT", default="0"))
+RECORD_JOB_WORKERS = int(os.getenv("DJANGO_RECORD_JOB_WORKERS", default="4"))
+RECORD_JOB_TIMEOUT = float(os.getenv("DJANGO_RECORD_JOB_TIMEOUT", default="900"))
+RECORD_BATCH_MAX_SIZE = int(os.getenv("DJANGO_RECORD_BATCH_MAX_SIZE", default="100"))
+RECORD_APPLY_WORKERS = int(os.getenv("DJANGO_RECORD_APPLY_WORKERS", default="16"))
+USER_RATE_LIMIT = float(os.getenv("DJANGO_USER_RATE_LIMIT", default="0"))
+USER_RATE_BURST = float(os.getenv("DJANGO_USER_RATE_BURST", default="20"))
+USER_CONCURRENCY_LIMIT = int(os.getenv("DJANGO_USER_CONCURRENCY_LIMIT", default="0"))
+MAX_PENDING_RECORD_CHANGES = int(os.getenv("DJANGO_MAX_PENDING_RECORD_CHANGES", default="0"))
+RECORD_CHANGES_DRAIN_WINDOW = float(os.getenv("DJANGO_RECORD_CHANGES_DRAIN_WINDOW", default="60"))
+ASYNC_RECORD_VIEWS = os.getenv("DJANGO_ASYNC_RECORD_VIEWS", default="").lower() == "true"
+RECORD_RECONCILE_INTERVAL = float(os.getenv("DJANGO_RECORD_RECONCILE_INTERVAL", default="600"))
+API_PAGE_SIZE = int(os.getenv("DJANGO_API_PAGE_SIZE", default="100"))
+API_MAX_PAGE_SIZE = int(os.getenv("DJANGO_API_MAX_PAGE_SIZE", default="1000"))
+METRICS_ALLOWED_NETWORKS = os.getenv(
+    "DJANGO_METRICS_ALLOWED_NETWORKS",
+    default="127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,fc00::/7",
+)
+REQUEST_QUERY_BUDGET = int(os.getenv("DJANGO_REQUEST_QUERY_BUDGET", default="20"))
 LOGIN_REDIRECT_URL = "/"
@@ -0,0 +1,167 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Multiplexed SSH connection to the git host, shared by the fetches and pushes."""
+
+import fcntl
+import hashlib
+import logging
+import shlex
+import subprocess  # nosec B404
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from .metrics import SSH_CONNECTIONS, SSH_HANDSHAKE_DURATION, tracer
+
+logger = logging.getLogger(__name__)
+
+SSH_SCHEMES = ("ssh", "git+ssh", "ssh+git")
+SSH_TIMEOUT = 30
+
+
+class SshMaster:
+    """Master SSH connection to a host, reused by the git commands through its control socket.
+
+    The master connection is started on first use, checked before each use and started again if
+    it died. It stays open in the background for the persist time after its last use.
+
+    Attributes:
+        destination: the user and host to connect to.
+        port: the port to connect to, or None for the default port.
+        persist: the number of seconds the master connection stays open when unused.
+        control_path: the control socket of the master connection.
+        command: the SSH command for git to connect through the master connection.
+    """
+
+    def __init__(self, destination: str, port: int | None, control_dir: Path, persist: int):
+        """Initialize the master connection, without connecting.
+
+        Args:
+            destination: the user and host to connect to.
+            port: the port to connect to, or None for the default port.
+            control_dir: the directory holding the control sockets.
+            persist: the number of seconds the master connection stays open when unused.
+        """
+        self.destination = destination
+        self.port = port
+        self.persist = persist
+        # Unix socket paths are limited to about a hundred characters, so the name is hashed.
+        key = hashlib.sha256(f"{destination}:{port}".encode("utf-8")).hexdigest()[:16]
+        self.control_path = control_dir / key
+        self.command = shlex.join(["ssh", *self._options()])
+
+    def _options(self) -> list[str]:
+        """Get the SSH options sharing the master connection.
+
+        Returns:
+            the options.
+        """
+        options = [
+            "-o",
+            "BatchMode=yes",
+            "-o",
+            "ControlMaster=auto",
+            "-o",
+            f"ControlPath={self.control_path}",
+            "-o",
+            f"ControlPersist={self.persist}",
+        ]
+        if self.port:
+            options.extend(["-p", str(self.port)])
+        return options
+
+    def _ssh(self, *args: str, **kwargs) -> subprocess.CompletedProcess:
+        """Run SSH with the options of the master connection.
+
+        Args:
+            args: the additional arguments, before the destination.
+            kwargs: keyword arguments for subprocess.run.
+
+        Returns:
+            the completed process.
+        """
+        return subprocess.run(  # nosec B603
+            ["ssh", *self._options(), *args, self.destination],
+            stdin=subprocess.DEVNULL,
+            check=False,
+            timeout=SSH_TIMEOUT,
+            **kwargs,
+        )
+
+    def is_alive(self) -> bool:
+        """Check whether the master connection is running.
+
+        Returns:
+            whether the master connection accepts new sessions.
+        """
+        if not self.control_path.exists():
+            return False
+        try:
+            return self._ssh("-O", "check", capture_output=True).returncode == 0
+        except subprocess.TimeoutExpired:
+            return False
+
+    def ensure(self) -> None:
+        """Start the master connection unless it is already running.
+
+        Failures are only logged: the git commands then connect on their own.
+        """
+        self.control_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{self.control_path}.lock", "a", encoding="utf-8") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if self.is_alive():
+                    SSH_CONNECTIONS.labels(outcome="reused").inc()
+                    return
+                self._connect()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _connect(self) -> None:
+        """Start the master connection in the background, measuring the handshake."""
+        self.control_path.unlink(missing_ok=True)
+        outcome = "error"
+        with tracer.start_as_current_span(
+            "ssh_handshake", attributes={"host": self.destination}
+        ) as span, tempfile.TemporaryFile() as stderr:
+            start = time.perf_counter()
+            try:
+                # The master goes to the background once authenticated, still holding the
+                # standard streams, so they must not be pipes.
+                process = self._ssh("-M", "-N", "-f", stdout=subprocess.DEVNULL, stderr=stderr)
+                if process.returncode == 0:
+                    outcome = "established"
+                else:
+                    stderr.seek(0)
+                    logger.warning(
+                        "SSH connection to %s failed: %s",
+                        self.destination,
+                        stderr.read().decode("utf-8", errors="replace").strip(),
+                    )
+            except subprocess.TimeoutExpired:
+                logger.warning("SSH connection to %s timed out", self.destination)
+            finally:
+                SSH_HANDSHAKE_DURATION.labels(outcome=outcome).observe(time.perf_counter() - start)
+                SSH_CONNECTIONS.labels(outcome=outcome).inc()
+                span.set_attribute("outcome", outcome)
+
+
+def get_ssh_master(url: str, control_dir: Path, persist: int) -> SshMaster | None:
+    """Get the master connection for a repository URL.
+
+    Args:
+        url: the repository URL.
+        control_dir: the directory holding the control sockets.
+        persist: the number of seconds the master connection stays open when unused, 0 to
+            disable the multiplexing.
+
+    Returns:
+        the master connection, or None if the repository is not accessed over SSH or the
+        multiplexing is disabled.
+    """
+    parts = urlsplit(url)
+    if persist <= 0 or parts.scheme not in SSH_SCHEMES or not parts.hostname:
+        return None
+    destination = f"{parts.username}@{parts.hostname}" if parts.username else parts.hostname
+    return SshMaster(destination, parts.port, control_dir, persist)
@@ -7,11 +7,70 @@
 
 import base64
 import secrets
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from pathlib import Path
+from unittest.mock import patch
 
 import pytest
+from api.admission import AdmissionController, admission_controller
+from api.authentication import CredentialCache, credential_cache
+from api.authorization import AuthorizationIndex, authorization_index
 from api.forms import FQDN_PREFIX
-from api.models import Domain, DomainUserPermission
+from api.models import Domain, DomainUserPermission, Zone
+from api.queries import QueryCounter
+from api.zone import zone_repositories
 from django.contrib.auth.models import User
+from git import Repo
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+_span_exporter = InMemorySpanExporter()
+
+
+@pytest.fixture(autouse=True, name="zone_repositories")
+def zone_repositories_fixture() -> Iterator[dict[str, str]]:
+    """Forget the repositories of the zones registered by each test."""
+    yield zone_repositories
+    zone_repositories.clear()
+
+
+@pytest.fixture(autouse=True, name="authorization_index")
+def authorization_index_fixture() -> Iterator[AuthorizationIndex]:
+    """Forget the permissions cached by each test, as the database is rolled back."""
+    yield authorization_index
+    authorization_index.clear()
+
+
+@pytest.fixture(autouse=True, name="admission_controller")
+def admission_controller_fixture() -> Iterator[AdmissionController]:
+    """Forget the record changes admitted by each test."""
+    yield admission_controller
+    admission_controller.clear()
+
+
+@pytest.fixture(autouse=True, name="credential_cache")
+def credential_cache_fixture() -> Iterator[CredentialCache]:
+    """Forget the credentials verified by each test, as the database is rolled back."""
+    yield credential_cache
+    credential_cache.clear()
+
+
+@pytest.fixture(name="query_budget")
+def query_budget_fixture() -> Callable[[int], AbstractContextManager[QueryCounter]]:
+    """Fail the test when the code run in the context exceeds a budget of database queries."""
+
+    @contextmanager
+    def query_budget(budget: int) -> Iterator[QueryCounter]:
+        with QueryCounter(budget=budget) as counter:
+            yield counter
+        assert (
+            not counter.exceeded
+        ), f"{counter.count} queries over the budget of {budget}:\n" + "\n".join(counter.queries)
+
+    return query_budget
 
 
 @pytest.fixture(scope="module", name="username")
@@ -84,14 +143,20 @@ def fqdn_fixture() -> str:
     return "example.com"
 
 
+@pytest.fixture(scope="function", name="zones")
+def zones_fixture(fqdn: str, fqdns: list[str]) -> list[Zone]:
+    """Register the zones of the FQDNs provided."""
+    return [Zone.objects.get_or_create(name=name)[0] for name in dict.fromkeys([fqdn, *fqdns])]
+
+
 @pytest.fixture(scope="function", name="domain")
-def domain_fixture(fqdn: str) -> Domain:
+def domain_fixture(fqdn: str, zones: list[Zone]) -> Domain:
     """Provide a valid domain."""
     return Domain.objects.create(fqdn=f"{FQDN_PREFIX}{fqdn}")
 
 
 @pytest.fixture(scope="function", name="domains")
-def domains_fixture(fqdns: list) -> list:
+def domains_fixture(fqdns: list, zones: list[Zone]) -> list:
     """Create all domains and return the list of Domain objects."""
     domains = []
     for fqdn in fqdns:
@@ -112,7 +177,9 @@ def fqdns_fixture() -> list[str]:
 
 
 @pytest.fixture(scope="function", name="domain_user_permissions")
-def domain_user_permissions_fixture(fqdns: list[str], user: User) -> list[DomainUserPermission]:
+def domain_user_permissions_fixture(
+    fqdns: list[str], user: User, zones: list[Zone]
+) -> list[DomainUserPermission]:
     """Provide list of valid domain user permissions."""
     domains = []
     for fqdn in fqdns:
@@ -123,3 +190,49 @@ def domain_user_permissions_fixture(fqdns: list[str], user: User) -> list[Domain
         dup = DomainUserPermission.objects.create(domain=domain, user=user)
         dups.append(dup)
     return dups
+
+
+@pytest.fixture(scope="module", name="zone_content")
+def zone_content_fixture() -> str:
+    """Provide the initial content of the example.com zone file."""
+    return (
+        "site2 600 IN TXT \042sometoken\042\n"
+        "sïte1 600 IN TXT \042sometoken\042\n"
+        "site3 600 IN TXT \042sometoken\042\n"
+    )
+
+
+@pytest.fixture(scope="function", name="git_remote")
+def git_remote_fixture(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, zone_content: str) -> Repo:
+    """Provide a local bare repository containing the example.com zone file."""
+    monkeypatch.setenv("GIT_AUTHOR_EMAIL", "user@example.com")
+    monkeypatch.setenv("GIT_COMMITTER_EMAIL", "user@example.com")
+    remote = Repo.init(tmp_path / "remote.git", bare=True, initial_branch="main")
+    seed = Repo.init(tmp_path / "seed", initial_branch="main")
+    (tmp_path / "seed" / "example.com.domain").write_text(zone_content, encoding="utf-8")
+    seed.index.add(["example.com.domain"])
+    seed.index.commit("Initial commit")
+    seed.create_remote("origin", remote.git_dir).push("main")
+    return remote
+
+
+@pytest.fixture(scope="function", name="git_repo_url")
+def git_repo_url_fixture(git_remote: Repo, tmp_path: Path) -> Iterator[str]:
+    """Point the dns module to the local bare repository."""
+    url = f"file://user@localhost{git_remote.git_dir}@main"
+    with patch("api.dns.GIT_REPO_URL", url), patch(
+        "api.dns.GIT_MIRROR_DIR", str(tmp_path / "mirrors")
+    ), patch("api.dns.GIT_COMMIT_WINDOW", 0):
+        yield url
+
+
+@pytest.fixture(scope="function", name="span_exporter")
+def span_exporter_fixture() -> Iterator[InMemorySpanExporter]:
+    """Record the spans in memory, the tracer provider being set once per process."""
+    if not isinstance(trace.get_tracer_provider(), TracerProvider):
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(_span_exporter))
+        trace.set_tracer_provider(provider)
+    _span_exporter.clear()
+    yield _span_exporter
+    _span_exporter.clear()
@@ -7,14 +7,14 @@
 
 import pytest
 from api.forms import FQDN_PREFIX
-from api.models import DomainUserPermission
+from api.models import Domain, DomainUserPermission, Zone
 from django.contrib.auth.models import User
 from django.core.management import call_command
 from django.core.management.base import CommandError
 
 
 @pytest.mark.django_db
-def test_allow_domains(user: User, fqdns: list[str]):
+def test_allow_domains(user: User, fqdns: list[str], zones: list[Zone]):
     """
     arrange: given a user.
     act: call the allow_domains command.
@@ -37,3 +37,17 @@ def test_allow_domains_raises_exception(fqdns: list[str]):
     """
     with pytest.raises(CommandError):
         call_command("allow_domains", "non-existing-user", *fqdns)
+
+
+@pytest.mark.django_db
+def test_allow_domains_without_zone(user: User, zones: list[Zone]):
+    """
+    arrange: given a user, and a domain without registered zone.
+    act: call the allow_domains command for the domain and a domain with a registered zone.
+    assert: a CommandError exception is raised and no domain is allowed.
+    """
+    with pytest.raises(CommandError, match="No zone registered"):
+        call_command("allow_domains", user.username, "example.com", "example.org")
+
+    assert not Domain.objects.exists()
+    assert not DomainUserPermission.objects.exists()
@@ -0,0 +1,64 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the compact_history module."""
+
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from api.models import Zone
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from git import Repo
+
+
+@pytest.mark.django_db
+def test_compact_history(git_repo_url: str, git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a default repository and a zone stored in another repository, both with only
+        recent commits.
+    act: call the compact_history command.
+    assert: both repositories are compacted and nothing is squashed.
+    """
+    other_remote = Repo.clone_from(git_remote.git_dir, tmp_path / "other.git", bare=True)
+    other_url = f"file://user@localhost{other_remote.git_dir}@main"
+    Zone.objects.create(name="other.com", repository=other_url)
+    out = StringIO()
+
+    with patch("api.registry.GIT_REPO_URL", git_repo_url):
+        call_command("compact_history", "--retention-days", "30", stdout=out)
+
+    lines = out.getvalue().splitlines()
+    assert lines == [
+        f"file://user@localhost{git_remote.git_dir}: Squashed 0 commits into 0 snapshots",
+        f"file://user@localhost{other_remote.git_dir}: Squashed 0 commits into 0 snapshots",
+    ]
+
+
+@pytest.mark.django_db
+def test_compact_history_raises_exception(tmp_path: Path):
+    """
+    arrange: given a non existing repository.
+    act: call the compact_history command.
+    assert: a CommandError exception is raised.
+    """
+    url = f"file://user@localhost{tmp_path}/missing.git@main"
+
+    with patch("api.registry.GIT_REPO_URL", url), pytest.raises(CommandError):
+        call_command("compact_history")
+
+
+def test_compact_history_loop_disabled():
+    """
+    arrange: given a compaction interval of 0.
+    act: call the compact_history command in a loop.
+    assert: the command exits without compacting the history.
+    """
+    out = StringIO()
+
+    with patch("api.management.commands.compact_history.compact_history") as compact_patch:
+        call_command("compact_history", "--loop", stdout=out)
+
+    compact_patch.assert_not_called()
+    assert "disabled" in out.getvalue()
@@ -6,6 +6,7 @@ from io import StringIO
 
 import pytest
 from api.models import DomainUserPermission
+from django.contrib.auth.models import User
 from django.core.management import call_command
 from django.core.management.base import CommandError
 
@@ -42,6 +43,27 @@ def test_list_domains_all_users(domain_user_permissions: list[DomainUserPermissi
     assert expected_output in out.getvalue()
 
 
+@pytest.mark.django_db
+def test_list_domains_all_users_query_budget(
+    domain_user_permissions: list[DomainUserPermission], query_budget
+):
+    """
+    arrange: given many users, allowed several domains.
+    act: call the list_domains command for all the users.
+    assert: the users and their domains are loaded in two queries.
+    """
+    for index in range(10):
+        user = User.objects.create_user(f"user{index}")
+        for dup in domain_user_permissions:
+            DomainUserPermission.objects.create(domain=dup.domain, user=user)
+    out = StringIO()
+
+    with query_budget(2):
+        call_command("list_domains", "*", stdout=out)
+
+    assert out.getvalue().count(domain_user_permissions[0].domain.fqdn) == 11
+
+
 @pytest.mark.django_db
 def test_list_domains_raises_exception(fqdns: list[str]):
     """
@@ -0,0 +1,121 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the reconcile_records module."""
+
+# pylint:disable=unused-argument
+
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from api.jobs import STALE_JOB_ERROR
+from api.metrics import DB_QUERIES
+from api.models import Domain, PushedRecord, RecordChangeJob
+from api.settings import RECORD_JOB_TIMEOUT
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+
+@pytest.mark.django_db
+def test_reconcile_records(git_repo_url: str):
+    """
+    arrange: given domains using the git backend whose stored values differ from the repository,
+        and a domain using another backend.
+    act: call the reconcile_records command.
+    assert: the stored values of the git domains match the repository.
+    """
+    Domain.objects.create(fqdn="site2.example.com")
+    Domain.objects.create(fqdn="site4.example.com")
+    Domain.objects.create(fqdn="site5.example.com", backend=Domain.RFC2136)
+    PushedRecord.objects.create(fqdn="site2.example.com", value="stale")
+    PushedRecord.objects.create(fqdn="site5.example.com", value="value")
+    out = StringIO()
+
+    call_command("reconcile_records", stdout=out)
+
+    assert "Reconciled 2 records" in out.getvalue()
+    assert dict(PushedRecord.objects.values_list("fqdn", "value")) == {
+        "site2.example.com": "sometoken",
+        "site4.example.com": "",
+        "site5.example.com": "value",
+    }
+
+
+@pytest.mark.django_db
+def test_reconcile_records_fails_stale_jobs(git_repo_url: str, user: User):
+    """
+    arrange: given a job queued long ago, and a job queued recently.
+    act: call the reconcile_records command.
+    assert: the old job is marked as failed, the recent one is still queued.
+    """
+    stale_job = RecordChangeJob.objects.create(
+        user=user, fqdn="site2.example.com", value="value", action=RecordChangeJob.PRESENT
+    )
+    RecordChangeJob.objects.filter(id=stale_job.id).update(
+        created_at=timezone.now() - timedelta(seconds=RECORD_JOB_TIMEOUT + 1)
+    )
+    job = RecordChangeJob.objects.create(
+        user=user, fqdn="site2.example.com", value="value", action=RecordChangeJob.PRESENT
+    )
+    out = StringIO()
+
+    call_command("reconcile_records", stdout=out)
+
+    assert "Marked 1 stale jobs as failed" in out.getvalue()
+    stale_job.refresh_from_db()
+    assert stale_job.status == RecordChangeJob.FAILED
+    assert stale_job.error == STALE_JOB_ERROR
+    job.refresh_from_db()
+    assert job.status == RecordChangeJob.QUEUED
+
+
+@pytest.mark.django_db
+def test_reconcile_records_raises_exception(tmp_path: Path, git_repo_url: str):
+    """
+    arrange: given a domain using the git backend and a non existing repository.
+    act: call the reconcile_records command.
+    assert: a CommandError exception is raised.
+    """
+    Domain.objects.create(fqdn="site2.example.com")
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(
+            "api.dns.GIT_REPO_URL", f"file://user@localhost{tmp_path}/missing.git@main"
+        )
+        with pytest.raises(CommandError):
+            call_command("reconcile_records")
+
+
+@pytest.mark.django_db
+def test_reconcile_records_loop_records_queries(git_repo_url: str):
+    """
+    arrange: given a domain using the git backend.
+    act: call the reconcile_records command in a loop, stopped after two iterations.
+    assert: the database queries of each iteration are recorded once it completes.
+    """
+    Domain.objects.create(fqdn="site2.example.com")
+    observations = (
+        REGISTRY.get_sample_value(
+            "httprequest_lego_provider_db_queries_count", {"path": "command:reconcile_records"}
+        )
+        or 0
+    )
+
+    with patch(
+        "api.management.commands.reconcile_records.time.sleep",
+        side_effect=[None, KeyboardInterrupt],
+    ), pytest.raises(KeyboardInterrupt):
+        call_command("reconcile_records", "--loop", stdout=StringIO())
+
+    assert (
+        REGISTRY.get_sample_value(
+            "httprequest_lego_provider_db_queries_count", {"path": "command:reconcile_records"}
+        )
+        == observations + 2
+    )
+    assert DB_QUERIES.labels(path="command:reconcile_records")._sum.get() > 0
@@ -0,0 +1,158 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the admission module."""
+
+from unittest.mock import patch
+
+import pytest
+from api.admission import AdmissionController, AdmissionRejected, admission_controller
+
+
+def test_check_rate():
+    """
+    arrange: given a controller allowing a burst of two changes, then one per second.
+    act: request changes as a user, as another user, then a second later.
+    assert: the third change of the user is rejected until a second elapsed, the other user is
+        limited independently.
+    """
+    controller = AdmissionController(1, 2, 0, 0, 60)
+
+    with patch("api.admission.time.monotonic", return_value=100.0) as monotonic_patch:
+        controller.check_rate(1)
+        controller.check_rate(1)
+        with pytest.raises(AdmissionRejected) as exc_info:
+            controller.check_rate(1)
+        controller.check_rate(2)
+        monotonic_patch.return_value = 101.0
+        controller.check_rate(1)
+
+    assert exc_info.value.reason == "rate"
+    assert exc_info.value.retry_after == 1
+
+
+def test_check_rate_disabled():
+    """
+    arrange: given a controller without rate limit.
+    act: request many changes as a user.
+    assert: all the changes are admitted.
+    """
+    controller = AdmissionController(0, 1, 0, 0, 60)
+
+    for _ in range(100):
+        controller.check_rate(1)
+
+
+def test_limits_disabled_by_default():
+    """
+    arrange: given the controller of the process, with the default settings.
+    act: request many changes as a user, holding their slots.
+    assert: all the changes are admitted.
+    """
+    slots = []
+    for _ in range(100):
+        admission_controller.check_rate(1)
+        slots.append(admission_controller.acquire(1))
+
+    assert admission_controller.pending == 100
+    for slot in slots:
+        slot.release()
+
+
+def test_acquire_user_concurrency():
+    """
+    arrange: given a controller allowing a single pending change per user.
+    act: acquire slots for a user, for another user, then release the slot of the first user.
+    assert: the second slot of the user is rejected until the first one is released.
+    """
+    controller = AdmissionController(0, 1, 1, 0, 60)
+
+    slot = controller.acquire(1)
+    with pytest.raises(AdmissionRejected) as exc_info:
+        controller.acquire(1)
+    controller.acquire(2)
+    slot.release()
+    controller.acquire(1)
+
+    assert exc_info.value.reason == "user_concurrency"
+    assert controller.pending == 2
+
+
+def test_acquire_pending_retry_after_drain_rate():
+    """
+    arrange: given a controller allowing two pending changes, over a 10 seconds drain window.
+    act: acquire slots when no change completed, then after five changes completed.
+    assert: the retry time is the drain window, then computed from the completion rate.
+    """
+    controller = AdmissionController(0, 1, 0, 2, 10)
+
+    with patch("api.admission.time.monotonic", return_value=100.0):
+        controller.acquire(1)
+        slot = controller.acquire(2)
+        with pytest.raises(AdmissionRejected) as first_exc_info:
+            controller.acquire(3)
+        slot.release()
+        for _ in range(4):
+            controller.acquire(4).release()
+        controller.acquire(2)
+        with pytest.raises(AdmissionRejected) as second_exc_info:
+            controller.acquire(3)
+
+    assert first_exc_info.value.reason == second_exc_info.value.reason == "pending"
+    assert first_exc_info.value.retry_after == 10
+    # Five changes completed in 10 seconds: one slot frees up every 2 seconds.
+    assert second_exc_info.value.retry_after == 2
+
+
+def test_drain_rate_window():
+    """
+    arrange: given a controller with changes completed more than a drain window ago.
+    act: acquire a slot over the limit.
+    assert: the old completions are not counted in the drain rate.
+    """
+    controller = AdmissionController(0, 1, 0, 1, 10)
+
+    with patch("api.admission.time.monotonic", return_value=100.0) as monotonic_patch:
+        for _ in range(5):
+            controller.acquire(1).release()
+        controller.acquire(1)
+        monotonic_patch.return_value = 111.0
+        with pytest.raises(AdmissionRejected) as exc_info:
+            controller.acquire(2)
+
+    assert exc_info.value.retry_after == 10
+
+
+def test_slot_released_once():
+    """
+    arrange: given a slot held by a user.
+    act: release it when leaving its context, then again.
+    assert: the slot is only released once.
+    """
+    controller = AdmissionController(0, 1, 0, 0, 60)
+    controller.acquire(1)
+
+    with controller.acquire(1) as slot:
+        assert controller.pending == 2
+    slot.release()
+
+    assert controller.pending == 1
+
+
+def test_clear():
+    """
+    arrange: given a slot held by a user and the rate limit of the user exceeded.
+    act: clear the controller, then release the slot.
+    assert: the user is admitted again, and the late release is ignored.
+    """
+    controller = AdmissionController(1, 1, 1, 0, 60)
+    controller.check_rate(1)
+    slot = controller.acquire(1)
+
+    controller.clear()
+    controller.check_rate(1)
+    other_slot = controller.acquire(1)
+    slot.release()
+
+    assert controller.pending == 1
+    other_slot.release()
+    assert controller.pending == 0
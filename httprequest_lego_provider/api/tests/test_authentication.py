@@ -0,0 +1,159 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the authentication module."""
+
+# imported-auth-user has to be disable as the conflicting import is needed for typing
+# pylint:disable=imported-auth-user
+
+import base64
+from unittest.mock import patch
+
+import pytest
+from api.authentication import CachedBasicAuthentication, CredentialCache
+from api.serializers import UserSerializer
+from django.contrib.auth.hashers import check_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import RequestFactory
+from rest_framework.exceptions import AuthenticationFailed
+
+
+def _authenticate(username: str, password: str) -> User:
+    """Authenticate a request with Basic credentials.
+
+    Args:
+        username: the username.
+        password: the password.
+
+    Returns:
+        the authenticated user.
+    """
+    credentials = base64.b64encode(f"{username}:{password}".encode("utf-8")).decode("utf-8")
+    request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Basic {credentials}")
+    user, _ = CachedBasicAuthentication().authenticate(request)
+    return user
+
+
+@pytest.mark.django_db
+def test_authenticate_caches_credentials(user: User, username: str, user_password: str):
+    """
+    arrange: given a user.
+    act: authenticate twice with its credentials, then once with a wrong password.
+    assert: the password is only hashed the first time, and the wrong password is rejected.
+    """
+    with patch("django.contrib.auth.base_user.check_password", wraps=check_password) as check:
+        assert _authenticate(username, user_password) == user
+        assert _authenticate(username, user_password) == user
+        with pytest.raises(AuthenticationFailed):
+            _authenticate(username, "wrong")
+
+    assert check.call_count == 2
+
+
+@pytest.mark.django_db
+def test_password_change_forgets_credentials(user: User, username: str, user_password: str):
+    """
+    arrange: given a user whose credentials were verified.
+    act: change its password with the create_user command.
+    assert: the previous password is rejected and the new one accepted.
+    """
+    _authenticate(username, user_password)
+
+    call_command("create_user", username, "new-password")
+
+    with pytest.raises(AuthenticationFailed):
+        _authenticate(username, user_password)
+    assert _authenticate(username, "new-password") == user
+
+
+@pytest.mark.django_db
+def test_password_change_from_other_process_forgets_credentials(
+    user: User, username: str, user_password: str
+):
+    """
+    arrange: given a user whose credentials were verified.
+    act: change its password without the signals of the process, as another process would.
+    assert: the previous password is rejected and the new one accepted.
+    """
+    _authenticate(username, user_password)
+    other_user = User(pk=user.pk)
+    other_user.set_password("new-password")
+
+    User.objects.filter(pk=user.pk).update(password=other_user.password)
+
+    with pytest.raises(AuthenticationFailed):
+        _authenticate(username, user_password)
+    assert _authenticate(username, "new-password") == user
+
+
+@pytest.mark.django_db
+def test_deactivation_from_other_process_forgets_credentials(
+    user: User, username: str, user_password: str
+):
+    """
+    arrange: given a user whose credentials were verified.
+    act: deactivate the user without the signals of the process, as another process would.
+    assert: the credentials are rejected.
+    """
+    _authenticate(username, user_password)
+
+    User.objects.filter(pk=user.pk).update(is_active=False)
+
+    with pytest.raises(AuthenticationFailed):
+        _authenticate(username, user_password)
+
+
+def test_credential_cache_expires_and_evicts():
+    """
+    arrange: given a cache of one credential, and a cache whose credentials expire immediately.
+    act: add credentials.
+    assert: only the last credential of the first cache is kept, and none of the second one.
+    """
+    user = User(pk=1, username="user")
+    cache, expiring_cache = CredentialCache(1, 60), CredentialCache(1, 0)
+
+    cache.add("first", user, cache.generation)
+    cache.add("second", user, cache.generation)
+    expiring_cache.add("first", user, expiring_cache.generation)
+
+    assert cache.get("first") is None
+    assert cache.get("second") == user
+    assert expiring_cache.get("first") is None
+
+
+def test_credential_cache_ignores_concurrent_verification():
+    """
+    arrange: given credentials being verified while the user is changed.
+    act: add the credentials once verified.
+    assert: the credentials are not cached.
+    """
+    user = User(pk=1, username="user")
+    cache = CredentialCache(1, 60)
+    generation = cache.generation
+
+    cache.forget_user(user.pk)
+    cache.add("key", user, generation)
+
+    assert cache.get("key") is None
+
+
+@pytest.mark.django_db
+def test_serializer_password_change_forgets_credentials(
+    user: User, username: str, user_password: str
+):
+    """
+    arrange: given a user whose credentials were verified.
+    act: change its password through the user serializer.
+    assert: the password is hashed, the previous one rejected and the new one accepted.
+    """
+    _authenticate(username, user_password)
+    serializer = UserSerializer(
+        user, data={"password": "new-password"}, partial=True, context={"request": None}
+    )
+    serializer.is_valid(raise_exception=True)
+
+    serializer.save()
+
+    with pytest.raises(AuthenticationFailed):
+        _authenticate(username, user_password)
+    assert _authenticate(username, "new-password") == user
@@ -0,0 +1,292 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the authorization module."""
+
+# pylint:disable=unused-argument
+
+from unittest.mock import patch
+
+import pytest
+from api.authorization import AuthorizationIndex, DomainGrant, authorization_index
+from api.forms import FQDN_PREFIX
+from api.models import AuthorizationGeneration, Domain, DomainUserPermission, Zone
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+def test_get_grant(domain_user_permission: DomainUserPermission, other_user: User):
+    """
+    arrange: given a user allowed to manage a domain.
+    act: get the permissions of the user and of another user, twice.
+    assert: the permissions are loaded with a single query each, next to a single read of the
+        generation of the index, then served from memory without any query.
+    """
+    domain = domain_user_permission.domain
+    user = domain_user_permission.user
+
+    with CaptureQueriesContext(connection) as queries:
+        grant = authorization_index.get(user.id, domain.fqdn)
+        denied = authorization_index.get(other_user.id, domain.fqdn)
+    with CaptureQueriesContext(connection) as cached_queries:
+        cached_grant = authorization_index.get(user.id, domain.fqdn)
+        cached_denied = authorization_index.get(other_user.id, domain.fqdn)
+
+    assert grant == cached_grant == DomainGrant(domain.fqdn, Domain.GIT, "example.com")
+    assert denied is None and cached_denied is None
+    assert len(queries) == 3
+    assert not cached_queries
+
+
+@pytest.mark.django_db
+def test_get_many_grants(domain_user_permissions: list[DomainUserPermission], other_user: User):
+    """
+    arrange: given a user allowed to manage several domains, one of them cached.
+    act: get the permissions of the user and of another user on the domains and a missing one.
+    assert: the permissions missing from memory are loaded with a single query per user, the
+        generation of the index being read once, and the cached ones are served without any
+        query.
+    """
+    user = domain_user_permissions[0].user
+    fqdns = [permission.domain.fqdn for permission in domain_user_permissions]
+    authorization_index.get(user.id, fqdns[0])
+
+    with CaptureQueriesContext(connection) as queries:
+        grants = authorization_index.get_many(user.id, [*fqdns, f"{FQDN_PREFIX}missing.com"])
+        denied = authorization_index.get_many(other_user.id, fqdns)
+    with CaptureQueriesContext(connection) as cached_queries:
+        cached_grant = authorization_index.get(user.id, fqdns[1])
+
+    assert [grants[fqdn].fqdn for fqdn in fqdns] == fqdns
+    assert grants[f"{FQDN_PREFIX}missing.com"] is None
+    assert not any(denied.values())
+    assert cached_grant == grants[fqdns[1]]
+    assert len(queries) == 2
+    assert not cached_queries
+
+
+@pytest.mark.django_db
+def test_aget_grant(domain_user_permission: DomainUserPermission, other_user: User):
+    """
+    arrange: given a user allowed to manage a domain.
+    act: get the permissions of the user and of another user asynchronously, then synchronously.
+    assert: the permissions are loaded with a single query each, next to a single read of the
+        generation of the index, then served from memory without any query.
+    """
+    domain = domain_user_permission.domain
+    user = domain_user_permission.user
+
+    with CaptureQueriesContext(connection) as queries:
+        grant = async_to_sync(authorization_index.aget)(user.id, domain.fqdn)
+        denied = async_to_sync(authorization_index.aget)(other_user.id, domain.fqdn)
+    with CaptureQueriesContext(connection) as cached_queries:
+        cached_grant = authorization_index.get(user.id, domain.fqdn)
+        cached_denied = authorization_index.get(other_user.id, domain.fqdn)
+
+    assert grant == cached_grant == DomainGrant(domain.fqdn, Domain.GIT, "example.com")
+    assert denied is None and cached_denied is None
+    assert len(queries) == 3
+    assert not cached_queries
+
+
+@pytest.mark.django_db
+def test_grant_invalidated_by_revoke_domains(domain_user_permission: DomainUserPermission):
+    """
+    arrange: given the cached permission of a user on a domain.
+    act: revoke the domain with the revoke_domains command.
+    assert: the user is no longer allowed to manage the domain.
+    """
+    domain = domain_user_permission.domain
+    user = domain_user_permission.user
+    assert authorization_index.get(user.id, domain.fqdn)
+
+    call_command("revoke_domains", user.username, domain.fqdn)
+
+    assert authorization_index.get(user.id, domain.fqdn) is None
+
+
+@pytest.mark.django_db
+def test_grant_invalidated_in_other_processes_by_revoke_domains(
+    domain_user_permission: DomainUserPermission,
+):
+    """
+    arrange: given the permission of a user on a domain, cached by the index of another process.
+    act: revoke the domain with the revoke_domains command.
+    assert: the user is no longer allowed to manage the domain in the other process.
+    """
+    domain = domain_user_permission.domain
+    user = domain_user_permission.user
+    other_index = AuthorizationIndex(2, 60)
+    assert other_index.get(user.id, domain.fqdn)
+
+    call_command("revoke_domains", user.username, domain.fqdn)
+
+    assert other_index.get(user.id, domain.fqdn) is None
+
+
+@pytest.mark.django_db
+def test_grant_invalidated_by_allow_domains(user: User, fqdn: str, zones: list[Zone]):
+    """
+    arrange: given the cached denial of a user on a domain.
+    act: allow the domain with the allow_domains command.
+    assert: the user is allowed to manage the domain.
+    """
+    fqdn = f"{FQDN_PREFIX}{fqdn}"
+    assert authorization_index.get(user.id, fqdn) is None
+
+    call_command("allow_domains", user.username, fqdn)
+
+    assert authorization_index.get(user.id, fqdn) == DomainGrant(fqdn, Domain.GIT, "example.com")
+
+
+@pytest.mark.django_db
+def test_grant_invalidated_by_domain_change(domain_user_permission: DomainUserPermission):
+    """
+    arrange: given the cached permission of a user on a domain.
+    act: change the backend of the domain, then delete it.
+    assert: the permission follows the changes.
+    """
+    domain = domain_user_permission.domain
+    user = domain_user_permission.user
+    assert authorization_index.get(user.id, domain.fqdn).backend == Domain.GIT
+
+    domain.backend = Domain.RFC2136
+    domain.save()
+    assert authorization_index.get(user.id, domain.fqdn).backend == Domain.RFC2136
+
+    domain.delete()
+    assert authorization_index.get(user.id, domain.fqdn) is None
+
+
+@pytest.mark.django_db
+def test_index_evicts_least_recently_used():
+    """
+    arrange: given an index holding two entries.
+    act: get the permissions on three FQDNs, using the first one again before the third one.
+    assert: the second FQDN is evicted and loaded again.
+    """
+    index = AuthorizationIndex(2, 60)
+
+    with patch("api.authorization._load_grant", return_value=None) as load_patch:
+        for fqdn in ("a.example.com", "b.example.com", "a.example.com", "c.example.com"):
+            index.get(1, fqdn)
+        index.get(1, "a.example.com")
+        index.get(1, "b.example.com")
+
+    assert [call.args[1] for call in load_patch.call_args_list] == [
+        "a.example.com",
+        "b.example.com",
+        "c.example.com",
+        "b.example.com",
+    ]
+
+
+@pytest.mark.django_db
+def test_index_expires_entries():
+    """
+    arrange: given an index whose entries expire immediately.
+    act: get the same permission twice.
+    assert: the permission is loaded twice.
+    """
+    index = AuthorizationIndex(2, 0)
+
+    with patch("api.authorization._load_grant", return_value=None) as load_patch:
+        index.get(1, "a.example.com")
+        index.get(1, "a.example.com")
+
+    assert load_patch.call_count == 2
+
+
+@pytest.mark.django_db
+def test_index_generation_shared_through_database():
+    """
+    arrange: given two processes without shared cache.
+    act: get a permission from both, then invalidate the index of the first one.
+    assert: the second process loads the permission again once the first one invalidated its
+        index.
+    """
+    first, second = AuthorizationIndex(2, 60), AuthorizationIndex(2, 60)
+    grant = DomainGrant("a.example.com", Domain.GIT, "example.com")
+
+    with patch("api.authorization._load_grant", return_value=grant) as load_patch:
+        assert first.get(1, "a.example.com") == grant
+        assert second.get(1, "a.example.com") == grant
+        assert second.get(1, "a.example.com") == grant
+        assert load_patch.call_count == 2
+        first.invalidate()
+        assert second.get(1, "a.example.com") == grant
+        assert load_patch.call_count == 3
+    assert AuthorizationGeneration.objects.get().value == 1
+
+
+@pytest.mark.django_db
+def test_index_generation_read_once_per_interval():
+    """
+    arrange: given two processes without shared cache, reading the generation once per minute.
+    act: get a permission from both, invalidate the index of the first one, then get the
+        permission from the second one before and after the interval elapsed.
+    assert: the generation is not read again within the interval, so the second process keeps
+        its cached permission until the interval elapsed.
+    """
+    first = AuthorizationIndex(2, 3600, generation_ttl=60)
+    second = AuthorizationIndex(2, 3600, generation_ttl=60)
+    grant = DomainGrant("a.example.com", Domain.GIT, "example.com")
+
+    with patch("api.authorization._load_grant", return_value=grant) as load_patch, patch(
+        "api.authorization.time.monotonic", return_value=1000
+    ) as monotonic_patch:
+        assert first.get(1, "a.example.com") == grant
+        assert second.get(1, "a.example.com") == grant
+        first.invalidate()
+        with CaptureQueriesContext(connection) as cached_queries:
+            assert second.get(1, "a.example.com") == grant
+        assert load_patch.call_count == 2
+        monotonic_patch.return_value = 1061
+        assert second.get(1, "a.example.com") == grant
+        assert load_patch.call_count == 3
+
+    assert not cached_queries
+
+
+def test_index_shared_tier():
+    """
+    arrange: given two processes sharing a cache.
+    act: get a permission from both, then invalidate the index of the first one.
+    assert: the second process gets the permission from the shared cache, and loads it again
+        once the first one invalidated its index.
+    """
+    shared = LocMemCache("authorization", {})
+    first, second = AuthorizationIndex(2, 60, shared), AuthorizationIndex(2, 60, shared)
+    grant = DomainGrant("a.example.com", Domain.GIT, "example.com")
+
+    with patch("api.authorization._load_grant", return_value=grant) as load_patch:
+        assert first.get(1, "a.example.com") == grant
+        assert second.get(1, "a.example.com") == grant
+        assert load_patch.call_count == 1
+        first.invalidate()
+        assert second.get(1, "a.example.com") == grant
+        assert load_patch.call_count == 2
+
+
+def test_index_shared_tier_async():
+    """
+    arrange: given two processes sharing a cache.
+    act: get a permission asynchronously from both, then invalidate the index of the first one.
+    assert: the second process gets the permission from the shared cache, and loads it again
+        once the first one invalidated its index.
+    """
+    shared = LocMemCache("authorization-async", {})
+    first, second = AuthorizationIndex(2, 60, shared), AuthorizationIndex(2, 60, shared)
+    grant = DomainGrant("a.example.com", Domain.GIT, "example.com")
+
+    with patch("api.authorization._aload_grant", return_value=grant) as load_patch:
+        assert async_to_sync(first.aget)(1, "a.example.com") == grant
+        assert async_to_sync(second.aget)(1, "a.example.com") == grant
+        assert load_patch.call_count == 1
+        first.invalidate()
+        assert async_to_sync(second.aget)(1, "a.example.com") == grant
+        assert load_patch.call_count == 2
@@ -0,0 +1,164 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the backends module."""
+
+import base64
+import secrets
+import socketserver
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import dns.message
+import dns.query
+import dns.rcode
+import dns.tsigkeyring
+import dns.update
+import pytest
+from api.backends import GitBackend, Rfc2136Backend, ZoneFileBackend, get_backend
+from api.dns import DnsSourceUpdateError
+from api.models import Domain
+from api.writer import RecordChange
+
+TSIG_KEY_NAME = "lego."
+TSIG_KEY_SECRET = base64.b64encode(b"0123456789abcdef0123456789abcdef").decode()
+
+
+class _UpdateHandler(socketserver.BaseRequestHandler):
+    """Stand-in nameserver handler recording the dynamic updates it receives."""
+
+    def handle(self):
+        """Record an update and reply with the response code configured for its zone."""
+        keyring = dns.tsigkeyring.from_text({TSIG_KEY_NAME: TSIG_KEY_SECRET})
+        update, _ = dns.query.receive_tcp(self.request, keyring=keyring)
+        self.server.updates.append(update)  # type: ignore[attr-defined]
+        response = dns.message.make_response(update)
+        rcode = self.server.rcodes.get(  # type: ignore[attr-defined]
+            str(update.zone[0].name), self.server.rcode  # type: ignore[attr-defined]
+        )
+        response.set_rcode(rcode)
+        dns.query.send_tcp(self.request, response)
+
+
+@pytest.fixture(name="nameserver")
+def nameserver_fixture() -> Iterator[socketserver.ThreadingTCPServer]:
+    """Run a stand-in nameserver and point the RFC 2136 backend to it."""
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _UpdateHandler)
+    server.updates = []  # type: ignore[attr-defined]
+    server.rcode = dns.rcode.NOERROR  # type: ignore[attr-defined]
+    server.rcodes = {}  # type: ignore[attr-defined]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with patch("api.backends.rfc2136.RFC2136_NAMESERVER", "127.0.0.1"), patch(
+        "api.backends.rfc2136.RFC2136_PORT", server.server_address[1]
+    ), patch("api.backends.rfc2136.RFC2136_TSIG_KEY_NAME", TSIG_KEY_NAME), patch(
+        "api.backends.rfc2136.RFC2136_TSIG_KEY_SECRET", TSIG_KEY_SECRET
+    ):
+        yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize(
+    "name,backend_class",
+    [
+        (Domain.GIT, GitBackend),
+        (Domain.ZONE_FILE, ZoneFileBackend),
+        (Domain.RFC2136, Rfc2136Backend),
+    ],
+)
+def test_get_backend(name: str, backend_class: type):
+    """
+    arrange: do nothing.
+    act: get the backend by name.
+    assert: the backend matching the name is returned.
+    """
+    assert isinstance(get_backend(name), backend_class)
+
+
+def test_zone_file_backend(tmp_path: Path, zone_content: str):
+    """
+    arrange: given a zone file directory with a zone file.
+    act: add a record, then apply a batch replacing it and removing an existing one.
+    assert: the zone file contains the expected records.
+    """
+    Path(tmp_path, "example.com.domain").write_text(zone_content, encoding="utf-8")
+    token = secrets.token_hex()
+
+    with patch("api.backends.zonefile.ZONE_FILE_DIR", str(tmp_path)):
+        backend = ZoneFileBackend()
+        backend.present("site.example.com", secrets.token_hex())
+        backend.batch([RecordChange("site.example.com", token), RecordChange("site3.example.com")])
+
+    assert Path(tmp_path, "example.com.domain").read_text(encoding="utf-8") == (
+        "site2 600 IN TXT \042sometoken\042\n"
+        "sïte1 600 IN TXT \042sometoken\042\n"
+        f"site 600 IN TXT \042{token}\042\n"
+    )
+
+
+def test_zone_file_backend_missing_zone(tmp_path: Path):
+    """
+    arrange: given an empty zone file directory.
+    act: remove a record.
+    assert: a DnsSourceUpdateError exception is raised.
+    """
+    with patch("api.backends.zonefile.ZONE_FILE_DIR", str(tmp_path)):
+        with pytest.raises(DnsSourceUpdateError):
+            ZoneFileBackend().cleanup("site.example.com")
+
+
+def test_rfc2136_backend(nameserver: socketserver.ThreadingTCPServer):
+    """
+    arrange: given a stand-in nameserver.
+    act: apply a batch of record changes to two zones.
+    assert: one signed update is sent per zone with the expected changes.
+    """
+    token = secrets.token_hex()
+
+    Rfc2136Backend().batch(
+        [
+            RecordChange("site.example.com", token),
+            RecordChange("example.com"),
+            RecordChange("site.example.org", token),
+        ]
+    )
+
+    updates = {str(update.zone[0].name): update for update in nameserver.updates}
+    assert sorted(updates) == ["example.com.", "example.org."]
+    assert all(update.had_tsig for update in updates.values())
+    assert [rrset.to_text() for rrset in updates["example.com."].update] == [
+        "site.example.com. ANY TXT",
+        f'site.example.com. 600 IN TXT "{token}"',
+        "example.com. ANY TXT",
+    ]
+
+
+def test_rfc2136_backend_refused(nameserver: socketserver.ThreadingTCPServer):
+    """
+    arrange: given a stand-in nameserver refusing the updates.
+    act: remove a record.
+    assert: a DnsSourceUpdateError exception is raised.
+    """
+    nameserver.rcode = dns.rcode.REFUSED  # type: ignore[attr-defined]
+
+    with pytest.raises(DnsSourceUpdateError, match="REFUSED"):
+        Rfc2136Backend().cleanup("site.example.com")
+
+
+def test_rfc2136_backend_refused_for_one_zone(nameserver: socketserver.ThreadingTCPServer):
+    """
+    arrange: given a stand-in nameserver refusing the updates of the example.org zone.
+    act: apply a batch of record changes to the example.com zone, then to example.org.
+    assert: a DnsSourceUpdateError exception is raised, and only the change to the updated zone
+        is resolved.
+    """
+    nameserver.rcodes["example.org."] = dns.rcode.REFUSED  # type: ignore[attr-defined]
+    changes = [RecordChange("site.example.com", "token"), RecordChange("site.example.org")]
+
+    with pytest.raises(DnsSourceUpdateError, match="REFUSED"):
+        Rfc2136Backend().batch(changes)
+
+    assert changes[0].done and changes[0].error is None
+    assert not changes[1].done
@@ -0,0 +1,155 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the compaction module."""
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from api.compaction import compact_history, is_record_commit, rewrite_history
+from api.dns import DnsSourceUpdateError
+from git import Repo
+
+
+def _commit(repo: Repo, message: str, days: int) -> None:
+    """Change the example.com zone file and commit it.
+
+    Args:
+        repo: the repository.
+        message: the commit message.
+        days: the age of the commit in days.
+    """
+    date = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%s +0000")
+    path = Path(repo.working_tree_dir, "example.com.domain")
+    path.write_text(f"{path.read_text(encoding='utf-8')}{message}\n", encoding="utf-8")
+    repo.index.add(["example.com.domain"])
+    repo.index.commit(message, author_date=date, commit_date=date)
+
+
+@pytest.fixture(name="history")
+def history_fixture(git_remote: Repo, tmp_path: Path) -> Repo:
+    """Add old and recent record commits around a zone edit to the remote repository."""
+    seed = Repo(tmp_path / "seed")
+    for index in range(3):
+        _commit(seed, f"Add _acme-challenge.site{index}.example.com record", 100 - index)
+    _commit(seed, "Add new records to the zone", 90)
+    _commit(seed, "Update 2 records\n\nAdd a.example.com record\nRemove b.example.com record", 80)
+    _commit(seed, "Remove _acme-challenge.site0.example.com record", 70)
+    _commit(seed, "Add _acme-challenge.site3.example.com record", 1)
+    seed.remote(name="origin").push("main")
+    return git_remote
+
+
+@pytest.mark.parametrize(
+    "message,expected",
+    [
+        ("Add _acme-challenge.example.com record\n", True),
+        ("Update 2 records\n\nAdd a.example.com record\nRemove b.example.com record", True),
+        ("Squash 3 record commits\n\nSnapshot of the records.\n", True),
+        ("Add _acme-challenge.example.com record and a zone\n", False),
+        ("Initial commit", False),
+    ],
+)
+def test_is_record_commit(message: str, expected: bool):
+    """
+    arrange: given a commit with a message.
+    act: check whether it is a record commit.
+    assert: only the commits of the record writers and of the compaction are record commits.
+    """
+    assert is_record_commit(MagicMock(parents=[MagicMock()], message=message)) == expected
+
+
+def test_rewrite_history(history: Repo):
+    """
+    arrange: given a history of old record commits around a zone edit, and a recent one.
+    act: rewrite the history with a retention of 30 days.
+    assert: each run of old record commits is squashed into a snapshot, the other commits are
+        kept with their message and the tree of the tip is unchanged.
+    """
+    tip = history.commit("main")
+
+    new_tip, squashed, snapshots = rewrite_history(
+        history, tip, datetime.now(timezone.utc) - timedelta(days=30)
+    )
+
+    messages = [commit.summary for commit in history.iter_commits(new_tip)][::-1]
+    assert messages == [
+        "Initial commit",
+        "Squash 3 record commits",
+        "Add new records to the zone",
+        "Squash 2 record commits",
+        "Add _acme-challenge.site3.example.com record",
+    ]
+    assert (squashed, snapshots) == (5, 2)
+    assert new_tip.tree == tip.tree
+    assert new_tip.author == tip.author
+    assert new_tip.authored_date == tip.authored_date
+
+
+def test_rewrite_history_is_stable(history: Repo):
+    """
+    arrange: given a compacted history.
+    act: rewrite it again.
+    assert: nothing is squashed and the history is unchanged.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=30)
+    compacted, _, _ = rewrite_history(history, history.commit("main"), cutoff)
+
+    new_tip, squashed, _ = rewrite_history(history, compacted, cutoff)
+
+    assert squashed == 0
+    assert new_tip == compacted
+
+
+@pytest.mark.parametrize("dry_run", [True, False])
+def test_compact_history(history: Repo, git_repo_url: str, dry_run: bool):
+    """
+    arrange: given a remote repository with old record commits.
+    act: compact its history, archiving the previous one.
+    assert: the branch is rewritten and the previous history is archived, unless in dry run.
+    """
+    tip = history.commit("main")
+
+    result = compact_history(git_repo_url, timedelta(days=30), "refs/archive/{date}", dry_run)
+
+    assert result.squashed == 5
+    assert result.old_tip == tip.hexsha
+    assert result.archive_ref.startswith("refs/archive/2")
+    if dry_run:
+        assert history.commit("main") == tip
+        assert not any(ref.path.startswith("refs/archive/") for ref in history.refs)
+    else:
+        assert history.commit("main").hexsha == result.new_tip
+        assert history.commit(result.archive_ref) == tip
+        assert len(list(history.iter_commits("main"))) == 5
+
+
+def test_compact_history_fails_if_branch_moved(history: Repo, git_repo_url: str):
+    """
+    arrange: given a remote branch updated while its history is rewritten.
+    act: compact its history.
+    assert: a DnsSourceUpdateError exception is raised and the concurrent commit is kept.
+    """
+
+    def rewrite_and_race(repo, tip, cutoff):
+        """Rewrite the history while another writer pushes.
+
+        Args:
+            repo: the repository.
+            tip: the tip of the branch.
+            cutoff: the cutoff date.
+
+        Returns:
+            the rewritten history.
+        """
+        seed = Repo(Path(history.git_dir).parent / "seed")
+        _commit(seed, "Add _acme-challenge.site4.example.com record", 0)
+        seed.remote(name="origin").push("main")
+        return rewrite_history(repo, tip, cutoff)
+
+    with patch("api.compaction.rewrite_history", side_effect=rewrite_and_race):
+        with pytest.raises(DnsSourceUpdateError, match="rejected"):
+            compact_history(git_repo_url, timedelta(days=30))
+
+    assert history.commit("main").summary == "Add _acme-challenge.site4.example.com record"
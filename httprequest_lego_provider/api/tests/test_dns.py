@@ -2,35 +2,55 @@
 # See LICENSE file for licensing details.
 """Unit tests for the dns module."""
 
+# pylint:disable=unused-argument
+
+import fcntl
 import secrets
+import threading
 from pathlib import Path
-from unittest.mock import ANY, MagicMock, Mock, patch
+from unittest.mock import patch
 
 import pytest
 from api.dns import (
     DnsSourceUpdateError,
+    _get_writer,
+    apply_dns_record_changes,
     parse_repository_url,
+    push_dns_record_changes,
+    read_dns_records,
     remove_dns_record,
     write_dns_record,
 )
-from git import GitCommandError, Repo
+from api.writer import RecordChange, RecordWriter
+from git import Repo
+
+
+def _read_remote_zone(git_remote: Repo) -> str:
+    """Read the example.com zone file from the tip of the remote branch.
+
+    Args:
+        git_remote: the remote repository.
+
+    Returns:
+        the zone file content.
+    """
+    blob = git_remote.commit("main").tree / "example.com.domain"
+    return blob.data_stream.read().decode("utf-8")
 
 
-@patch.object(Path, "write_text")
-@patch.object(Repo, "clone_from")
-@patch("api.dns.GIT_REPO_URL", "git+ssh://user@git.server/repo_name")
-def test_write_dns_record_raises_exception(repo_patch: Mock, _):
+def test_write_dns_record_raises_exception(tmp_path: Path):
     """
-    arrange: mock the repo so that it raises a GitCommandError.
+    arrange: point the repository URL to a non existing repository.
     act: attempt to write a new DNS record.
     assert: a DnsSourceUpdateError exception is raised.
     """
-    repo_patch.side_effect = GitCommandError("Error executing command")
-
     fqdn = "site.example.com"
 
-    with pytest.raises(DnsSourceUpdateError):
-        write_dns_record(fqdn, secrets.token_hex())
+    with patch("api.dns.GIT_REPO_URL", f"file://user@localhost{tmp_path}/missing.git"), patch(
+        "api.dns.GIT_MIRROR_DIR", str(tmp_path / "mirrors")
+    ):
+        with pytest.raises(DnsSourceUpdateError):
+            write_dns_record(fqdn, secrets.token_hex())
 
 
 @pytest.mark.parametrize(
@@ -42,98 +62,101 @@ def test_write_dns_record_raises_exception(repo_patch: Mock, _):
         ("some.other.site.example.com", "some.other.site 600 IN TXT \042{token}\042\n"),
     ],
 )
-@patch.object(Path, "write_text")
-@patch.object(Path, "read_text")
-@patch.object(Repo, "clone_from")
-@patch("api.dns.GIT_REPO_URL", "git+ssh://user@git.server/repo_name@lego")
 def test_write_dns_record(
-    repo_patch: Mock, read_patch: Mock, write_patch: Mock, fqdn: str, record: str
+    git_remote: Repo, git_repo_url: str, zone_content: str, fqdn: str, record: str
 ):
     """
-    arrange: mock the repo.
+    arrange: given a remote repository containing a zone file.
     act: attempt to write a new DNS record.
-    assert: a new file with filename matching the record is committed and pushed to the repository.
+    assert: the record is appended to the zone file, committed and pushed to the repository.
     """
-    repo_mock = MagicMock(spec=Repo)
-    repo_patch.return_value = repo_mock
     token = secrets.token_hex()
-    read_patch.return_value = (
-        "site2 600 IN TXT \042sometoken\042\n"
-        "sïte1 600 IN TXT \042sometoken\042\n"
-        "site3 600 IN TXT \042sometoken\042\n"
-    )
+
     write_dns_record(fqdn, token)
 
-    repo_patch.assert_called_once_with("git+ssh://user@git.server/repo_name", ANY, branch="lego")
-    repo_mock.config_writer().set_value.assert_called_once_with("user", "name", "user")
-    write_patch.assert_called_once_with(
-        (
-            "site2 600 IN TXT \042sometoken\042\n"
-            "sïte1 600 IN TXT \042sometoken\042\n"
-            "site3 600 IN TXT \042sometoken\042\n" + record
-        ).format(token=token),
-        encoding="utf-8",
-    )
-    repo_mock.index.add.assert_called_with(["example.com.domain"])
-    repo_mock.git.commit.assert_called_once()
-    repo_mock.remote(name="origin").push.assert_called_once()
-
-
-@patch.object(Path, "write_text")
-@patch.object(Repo, "clone_from")
-@patch("api.dns.GIT_REPO_URL", "git+ssh://user@git.server/repo_name")
-def test_remove_dns_record_raises_exception(repo_patch: Mock, _):
-    """
-    arrange: mock the repo so that it raises a GitCommandError.
+    assert _read_remote_zone(git_remote) == zone_content + record.format(token=token)
+    commit = git_remote.commit("main")
+    assert commit.message.strip() == f"Add {fqdn} record"
+    assert commit.author.name == "user"
+
+
+def test_write_dns_record_replaces_existing_record(
+    git_remote: Repo, git_repo_url: str, zone_content: str
+):
+    """
+    arrange: given a remote repository containing a zone file.
+    act: write a record twice for the same FQDN.
+    assert: only the latest record is present in the zone file.
+    """
+    token = secrets.token_hex()
+
+    write_dns_record("site.example.com", secrets.token_hex())
+    write_dns_record("site.example.com", token)
+
+    assert _read_remote_zone(git_remote) == zone_content + f"site 600 IN TXT \042{token}\042\n"
+
+
+def test_remove_dns_record_raises_exception(tmp_path: Path):
+    """
+    arrange: point the repository URL to a non existing repository.
     act: attempt to remove a DNS record.
     assert: a DnsSourceUpdateError exception is raised.
     """
-    repo_patch.side_effect = GitCommandError("Error executing command")
-
     fqdn = "site.example.com"
 
-    with pytest.raises(DnsSourceUpdateError):
-        remove_dns_record(fqdn)
+    with patch("api.dns.GIT_REPO_URL", f"file://user@localhost{tmp_path}/missing.git"), patch(
+        "api.dns.GIT_MIRROR_DIR", str(tmp_path / "mirrors")
+    ):
+        with pytest.raises(DnsSourceUpdateError):
+            remove_dns_record(fqdn)
 
 
 @pytest.mark.parametrize(
-    "fqdn,record",
-    [
-        ("site.example.com", "site 600 IN TXT \042{token}\042\n"),
-        ("sïte.example.com", "sïte 600 IN TXT \042{token}\042\n"),
-        ("example.com", ". 600 IN TXT \042{token}\042\n"),
-        ("some.other.site.example.com", "some.other.site 600 IN TXT \042{token}\042\n"),
-    ],
+    "fqdn",
+    ["site.example.com", "sïte.example.com", "example.com", "some.other.site.example.com"],
 )
-@patch.object(Path, "write_text")
-@patch.object(Path, "read_text")
-@patch.object(Repo, "clone_from")
-@patch("api.dns.GIT_REPO_URL", "git+ssh://user@git.server/repo_name")
-def test_remove_dns_record(
-    repo_patch: Mock, read_patch: Mock, write_patch: Mock, fqdn: str, record: str
-):
+def test_remove_dns_record(git_remote: Repo, git_repo_url: str, zone_content: str, fqdn: str):
     """
-    arrange: mock the repo and filesystem so that the file matching a DNS exists.
-    act: attempt to delete a new DNS record.
-    assert: the file with filename matching the record is emptied and pushed to the repository.
+    arrange: given a remote repository containing a zone file with a record for the FQDN.
+    act: attempt to delete the DNS record.
+    assert: the record is removed from the zone file and the change is pushed to the repository.
     """
-    repo_mock = MagicMock(spec=Repo)
-    repo_patch.return_value = repo_mock
-    read_patch.return_value = (
-        "site1 600 IN TXT \042sometoken\042\n" + record + "site3 600 IN TXT \042sometoken\042\n"
-    )
+    write_dns_record(fqdn, secrets.token_hex())
 
     remove_dns_record(fqdn)
 
-    repo_patch.assert_called_once_with("git+ssh://user@git.server/repo_name", ANY, branch=None)
-    repo_mock.config_writer().set_value.assert_called_once_with("user", "name", "user")
-    write_patch.assert_called_once_with(
-        "site1 600 IN TXT \042sometoken\042\nsite3 600 IN TXT \042sometoken\042\n",
-        encoding="utf-8",
-    )
-    repo_mock.index.add.assert_called_with(["example.com.domain"])
-    repo_mock.git.commit.assert_called_once()
-    repo_mock.remote(name="origin").push.assert_called_once()
+    assert _read_remote_zone(git_remote) == zone_content
+    commit = git_remote.commit("main")
+    assert commit.message.strip() == f"Remove {fqdn} record"
+
+
+def test_dns_records_reuse_mirror(git_remote: Repo, git_repo_url: str, zone_content: str):
+    """
+    arrange: given a remote repository containing a zone file.
+    act: write and remove a DNS record.
+    assert: the repository is cloned only once.
+    """
+    with patch.object(Repo, "clone_from", wraps=Repo.clone_from) as clone_patch:
+        write_dns_record("site.example.com", secrets.token_hex())
+        remove_dns_record("site.example.com")
+
+    clone_patch.assert_called_once()
+    assert _read_remote_zone(git_remote) == zone_content
+
+
+def test_read_dns_records_above_streaming_threshold(git_repo_url: str):
+    """
+    arrange: given a remote repository containing a zone file larger than the streaming threshold.
+    act: read the DNS records of some FQDNs.
+    assert: the zone file is scanned line by line without being parsed, for the record values.
+    """
+    with patch("api.dns.ZONE_STREAMING_THRESHOLD", 0), patch(
+        "api.dns.ZoneFile"
+    ) as zone_file_patch:
+        values = read_dns_records(["sïte1.example.com", "site.example.com"])
+
+    zone_file_patch.assert_not_called()
+    assert values == {"sïte1.example.com": ["sometoken"], "site.example.com": []}
 
 
 def test_parse_repository_url():
@@ -150,3 +173,133 @@ def test_parse_repository_url():
     assert user == "user1"
     assert url == "git+ssh://user1@git.server:8080/repo_name"
     assert branch == "main"
+
+
+def test_remove_missing_dns_record(git_remote: Repo, git_repo_url: str):
+    """
+    arrange: given a remote repository containing a zone file.
+    act: attempt to delete a DNS record that does not exist.
+    assert: no error is raised and nothing is pushed to the repository.
+    """
+    initial_commit = git_remote.commit("main")
+
+    remove_dns_record("missing.example.com")
+
+    assert git_remote.commit("main") == initial_commit
+
+
+def test_push_dns_record_changes_when_zone_file_missing(
+    git_remote: Repo, git_repo_url: str, zone_content: str
+):
+    """
+    arrange: given a remote repository containing a zone file.
+    act: push changes to records of that zone and of a zone without zone file.
+    assert: only the change to the zone without zone file fails, without being queued, and the
+        other one is pushed.
+    """
+    token = secrets.token_hex()
+    changes = [
+        RecordChange(fqdn="site.example.com", value=token),
+        RecordChange(fqdn="site.missing.com", value=secrets.token_hex()),
+    ]
+
+    with patch.object(
+        RecordWriter, "submit_all", autospec=True, side_effect=RecordWriter.submit_all
+    ) as submit_all:
+        push_dns_record_changes(changes)
+
+    assert [change.fqdn for change in submit_all.call_args.args[1]] == ["site.example.com"]
+    assert changes[0].error is None
+    assert str(changes[1].error) == "Zone file missing.com.domain does not exist"
+    assert _read_remote_zone(git_remote) == zone_content + f"site 600 IN TXT \042{token}\042\n"
+
+
+def test_apply_dns_record_changes_when_zone_file_missing(git_remote: Repo, git_repo_url: str):
+    """
+    arrange: given a remote repository containing a zone file.
+    act: apply a change to a record of a zone without zone file.
+    assert: a DnsSourceUpdateError exception is raised and nothing is pushed.
+    """
+    initial_commit = git_remote.commit("main")
+
+    with pytest.raises(DnsSourceUpdateError, match="missing.com.domain does not exist"):
+        apply_dns_record_changes([RecordChange(fqdn="site.missing.com", value="token")])
+
+    assert git_remote.commit("main") == initial_commit
+
+
+@pytest.mark.parametrize("clone_mode", ["sparse", "bare"])
+def test_write_dns_record_with_clone_mode(
+    git_remote: Repo, git_repo_url: str, zone_content: str, clone_mode: str
+):
+    """
+    arrange: given a remote repository containing a zone file and a clone mode.
+    act: write and remove DNS records.
+    assert: the changes are pushed to the repository.
+    """
+    token = secrets.token_hex()
+
+    with patch("api.dns.GIT_CLONE_MODE", clone_mode):
+        write_dns_record("site.example.com", secrets.token_hex())
+        remove_dns_record("site.example.com")
+        write_dns_record("site.example.com", token)
+
+    assert _read_remote_zone(git_remote) == zone_content + f"site 600 IN TXT \042{token}\042\n"
+
+
+@pytest.fixture(name="other_repo_url")
+def other_repo_url_fixture(git_remote: Repo, tmp_path: Path) -> str:
+    """Provide a second remote repository, holding the other.com zone file."""
+    other_remote = Repo.init(tmp_path / "other.git", bare=True, initial_branch="main")
+    seed = Repo.init(tmp_path / "other-seed", initial_branch="main")
+    (tmp_path / "other-seed" / "other.com.domain").write_text("", encoding="utf-8")
+    seed.index.add(["other.com.domain"])
+    seed.index.commit("Initial commit")
+    seed.create_remote("origin", other_remote.git_dir).push("main")
+    return f"file://user@localhost{other_remote.git_dir}@main"
+
+
+def test_dns_records_in_several_repositories(
+    git_remote: Repo, git_repo_url: str, other_repo_url: str, zone_content: str
+):
+    """
+    arrange: given the other.com zone stored in another repository than the default one.
+    act: write records in both zones at once, and read them back.
+    assert: each record is pushed to the repository of its zone.
+    """
+    token = secrets.token_hex()
+
+    with patch.dict("api.dns.zone_repositories", {"other.com": other_repo_url}):
+        apply_dns_record_changes(
+            [RecordChange("site.example.com", token), RecordChange("site.other.com", token)]
+        )
+        values = read_dns_records(["site.example.com", "site.other.com"])
+
+    other_remote = Repo(other_repo_url.split("localhost", 1)[1].rsplit("@", 1)[0])
+    other_zone = (other_remote.commit("main").tree / "other.com.domain").data_stream.read()
+    assert other_zone.decode("utf-8") == f"site 600 IN TXT \042{token}\042\n"
+    assert _read_remote_zone(git_remote) == zone_content + f"site 600 IN TXT \042{token}\042\n"
+    assert "other.com.domain" not in git_remote.commit("main").tree
+    assert values == {"site.example.com": [token], "site.other.com": [token]}
+
+
+def test_dns_records_repositories_are_independent(git_repo_url: str, other_repo_url: str):
+    """
+    arrange: given the other.com zone stored in another repository, and the mirror of the
+        default repository locked by a stalled writer.
+    act: write a record in the other.com zone.
+    assert: the record is pushed without waiting for the default repository.
+    """
+    mirror = _get_writer(git_repo_url).mirror
+    mirror.path.parent.mkdir(parents=True, exist_ok=True)
+    thread = threading.Thread(target=write_dns_record, args=("site.other.com", "token"))
+
+    with patch.dict("api.dns.zone_repositories", {"other.com": other_repo_url}), open(
+        f"{mirror.path}.lock", "a", encoding="utf-8"
+    ) as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        thread.start()
+        thread.join(timeout=30)
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    assert not thread.is_alive()
@@ -0,0 +1,103 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the locks module."""
+
+import logging
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+from api.locks import get_lock_key, zone_locks
+from django.db import OperationalError
+from prometheus_client import REGISTRY
+
+
+def _get_lock_waits(zone: str) -> float:
+    """Get the number of waits for the lock of a zone.
+
+    Args:
+        zone: the zone name.
+
+    Returns:
+        the number of waits observed.
+    """
+    return (
+        REGISTRY.get_sample_value(
+            "httprequest_lego_provider_zone_lock_wait_seconds_count", {"zone": zone}
+        )
+        or 0
+    )
+
+
+def test_get_lock_key():
+    """
+    arrange: do nothing.
+    act: derive the lock keys of two zone files.
+    assert: the keys are stable, distinct and fit in a PostgreSQL bigint.
+    """
+    key = get_lock_key("example.com.domain")
+
+    assert key == get_lock_key("example.com.domain")
+    assert key != get_lock_key("example.org.domain")
+    assert -(2**63) <= key < 2**63
+
+
+def test_zone_locks_on_postgresql():
+    """
+    arrange: mock a PostgreSQL connection.
+    act: hold the locks of two zone files.
+    assert: the advisory locks are taken in order, released in reverse order and the wait time
+        is observed for each zone.
+    """
+    connection = MagicMock(vendor="postgresql")
+    cursor = connection.cursor.return_value.__enter__.return_value
+    first, second = get_lock_key("a.com.domain"), get_lock_key("b.com.domain")
+    count = _get_lock_waits("a.com")
+
+    with patch("api.locks.connection", connection):
+        with zone_locks(["b.com.domain", "a.com.domain", "b.com.domain"]):
+            assert cursor.execute.call_args_list == [
+                call("SELECT pg_advisory_lock(%s)", [first]),
+                call("SELECT pg_advisory_lock(%s)", [second]),
+            ]
+            cursor.execute.reset_mock()
+
+    assert cursor.execute.call_args_list == [
+        call("SELECT pg_advisory_unlock(%s)", [second]),
+        call("SELECT pg_advisory_unlock(%s)", [first]),
+    ]
+    assert _get_lock_waits("a.com") == count + 1
+
+
+def test_zone_locks_when_unlock_fails(caplog: pytest.LogCaptureFixture):
+    """
+    arrange: mock a PostgreSQL connection failing when the locks are released.
+    act: hold the lock of a zone file, raising an exception.
+    assert: the exception raised while holding the lock is propagated, the unlock failure is
+        logged and the connection closed to end the session.
+    """
+    connection = MagicMock(vendor="postgresql")
+    cursor = connection.cursor.return_value.__enter__.return_value
+
+    with patch("api.locks.connection", connection), caplog.at_level(
+        logging.ERROR, logger="api.locks"
+    ), pytest.raises(ValueError):
+        with zone_locks(["a.com.domain"]):
+            cursor.execute.side_effect = OperationalError("connection lost")
+            raise ValueError("push rejected")
+
+    assert "Failed to release the zone locks" in caplog.text
+    connection.close.assert_called_once_with()
+
+
+def test_zone_locks_on_other_databases():
+    """
+    arrange: mock a SQLite connection.
+    act: hold the lock of a zone file.
+    assert: no query is run.
+    """
+    connection = MagicMock(vendor="sqlite")
+
+    with patch("api.locks.connection", connection), zone_locks(["a.com.domain"]):
+        pass
+
+    connection.cursor.assert_not_called()
@@ -0,0 +1,62 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the metrics module."""
+
+import pytest
+from api.metrics import get_zone_label, observe_phase
+from prometheus_client import REGISTRY
+
+
+def _count(phase: str, outcome: str) -> float:
+    """Get the number of observations of a phase.
+
+    Args:
+        phase: the phase.
+        outcome: the outcome of the phase.
+
+    Returns:
+        the number of observations.
+    """
+    return (
+        REGISTRY.get_sample_value(
+            "httprequest_lego_provider_phase_duration_seconds_count",
+            {"phase": phase, "zone": "example.com", "outcome": outcome},
+        )
+        or 0
+    )
+
+
+def test_observe_phase():
+    """
+    arrange: do nothing.
+    act: observe a phase succeeding, a phase overriding its outcome and a phase failing.
+    assert: each phase is observed with its outcome.
+    """
+    counts = [_count("test", outcome) for outcome in ("success", "rejected", "error")]
+
+    with observe_phase("test", "example.com"):
+        pass
+    with observe_phase("test", "example.com") as observation:
+        observation.outcome = "rejected"
+    with pytest.raises(ValueError), observe_phase("test", "example.com"):
+        raise ValueError
+
+    assert [_count("test", outcome) for outcome in ("success", "rejected", "error")] == [
+        count + 1 for count in counts
+    ]
+
+
+@pytest.mark.parametrize(
+    "filenames,expected",
+    [
+        (["example.com.domain"], "example.com"),
+        (["example.com.domain", "example.org.domain"], "multiple"),
+    ],
+)
+def test_get_zone_label(filenames: list[str], expected: str):
+    """
+    arrange: do nothing.
+    act: get the zone label of changes to zone files.
+    assert: the zone is returned when there is a single one.
+    """
+    assert get_zone_label(filenames) == expected
@@ -0,0 +1,111 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the mirror module."""
+
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from api.mirror import RepositoryMirror
+from git import Repo
+
+
+def test_checkout_clones_repository(git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a remote repository and an empty mirror directory.
+    act: checkout the mirror.
+    assert: the repository is cloned with the configured user.
+    """
+    mirror = RepositoryMirror(git_remote.git_dir, "main", tmp_path / "mirror", "user")
+
+    with mirror.checkout() as repo:
+        assert Path(repo.working_tree_dir, "example.com.domain").exists()
+        assert repo.config_reader().get_value("user", "name") == "user"
+
+
+def test_checkout_resets_to_remote_branch(git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a mirror with local changes and a remote updated by another writer.
+    act: checkout the mirror.
+    assert: the working tree matches the tip of the remote branch.
+    """
+    mirror = RepositoryMirror(git_remote.git_dir, "main", tmp_path / "mirror", "user")
+    with mirror.checkout() as repo:
+        Path(repo.working_tree_dir, "example.com.domain").write_text("local", encoding="utf-8")
+        Path(repo.working_tree_dir, "untracked").write_text("untracked", encoding="utf-8")
+    other = Repo.clone_from(git_remote.git_dir, tmp_path / "other", branch="main")
+    Path(other.working_tree_dir, "other.com.domain").write_text("", encoding="utf-8")
+    other.index.add(["other.com.domain"])
+    other.index.commit("Add other.com zone")
+    other.remote(name="origin").push()
+
+    with patch.object(Repo, "clone_from") as clone_patch, mirror.checkout() as repo:
+        clone_patch.assert_not_called()
+        assert repo.head.commit == git_remote.commit("main")
+        assert not repo.is_dirty(untracked_files=True)
+
+
+def test_checkout_rebuilds_corrupted_mirror(git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a mirror whose git directory has been corrupted.
+    act: checkout the mirror.
+    assert: the mirror is cloned again.
+    """
+    mirror = RepositoryMirror(git_remote.git_dir, "main", tmp_path / "mirror", "user")
+    with mirror.checkout():
+        pass
+    Path(tmp_path, "mirror", ".git", "HEAD").write_text("garbage", encoding="utf-8")
+
+    with patch.object(Repo, "clone_from", wraps=Repo.clone_from) as clone_patch:
+        with mirror.checkout() as repo:
+            assert repo.head.commit == git_remote.commit("main")
+
+    clone_patch.assert_called_once()
+
+
+def test_sparse_checkout_only_fetches_requested_files(git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a remote repository with several commits and zone files.
+    act: checkout a sparse mirror for one of the zone files.
+    assert: the mirror is shallow, blob-filtered and only contains the requested zone file.
+    """
+    git_remote.git.config("uploadpack.allowFilter", "true")
+    other = Repo.clone_from(git_remote.git_dir, tmp_path / "other", branch="main")
+    Path(other.working_tree_dir, "other.com.domain").write_text("", encoding="utf-8")
+    other.index.add(["other.com.domain"])
+    other.index.commit("Add other.com zone")
+    other.remote(name="origin").push()
+    url = f"file://{git_remote.git_dir}"
+    mirror = RepositoryMirror(url, "main", tmp_path / "mirror", "user", sparse=True)
+
+    with mirror.checkout(["other.com.domain"]) as repo:
+        assert sorted(path.name for path in Path(repo.working_tree_dir).iterdir()) == [
+            ".git",
+            "other.com.domain",
+        ]
+        assert repo.git.rev_parse("--is-shallow-repository") == "true"
+        assert repo.git.config("remote.origin.partialclonefilter") == "blob:none"
+        assert repo.head.commit == git_remote.commit("main")
+
+    with mirror.checkout(["example.com.domain"]) as repo:
+        assert sorted(path.name for path in Path(repo.working_tree_dir).iterdir()) == [
+            ".git",
+            "example.com.domain",
+        ]
+
+
+def test_checkout_goes_through_ssh_master(git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a mirror accessing its remote through a master SSH connection.
+    act: checkout the mirror twice.
+    assert: the master connection is ensured before each checkout and the git commands of the
+        repository use it.
+    """
+    ssh = MagicMock(command="ssh -o ControlMaster=auto")
+    mirror = RepositoryMirror(git_remote.git_dir, "main", tmp_path / "mirror", "user", ssh=ssh)
+
+    with mirror.checkout() as repo:
+        assert repo.git.environment()["GIT_SSH_COMMAND"] == "ssh -o ControlMaster=auto"
+    with mirror.checkout() as repo:
+        assert repo.git.environment()["GIT_SSH_COMMAND"] == "ssh -o ControlMaster=auto"
+
+    assert ssh.ensure.call_count == 2
@@ -0,0 +1,116 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the pagination module."""
+
+# pylint:disable=unused-argument
+
+from datetime import timedelta
+
+import pytest
+from api.forms import FQDN_PREFIX
+from api.models import Domain, RecordChangeJob
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+def test_domains_cursor_pagination_stable_under_inserts(
+    client: Client, admin_user_auth_token: str, domains: list
+):
+    """
+    arrange: log in an admin user, given several domains.
+    act: list the domains two at a time following the next links, creating a domain after the
+        first page.
+    assert: every domain is listed once, the new one last, without counting the rows.
+    """
+    headers = {"AUTHORIZATION": f"Basic {admin_user_auth_token}"}
+    fqdns = []
+    url = "/api/v1/domains/?page_size=2"
+    with CaptureQueriesContext(connection) as queries:
+        while url:
+            response = client.get(url, headers=headers)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page["results"]) <= 2
+            fqdns.extend(domain["fqdn"] for domain in page["results"])
+            if len(fqdns) == 2:
+                Domain.objects.create(fqdn=f"{FQDN_PREFIX}new.example.com")
+            url = page["next"]
+
+    assert fqdns == [domain.fqdn for domain in domains] + [f"{FQDN_PREFIX}new.example.com"]
+    assert not any("COUNT(" in query["sql"] for query in queries.captured_queries)
+
+
+@pytest.mark.django_db
+def test_page_size_bounded(client: Client, admin_user_auth_token: str, domains: list):
+    """
+    arrange: log in an admin user, given several domains, with a maximum page size of one.
+    act: list the domains with a larger page size.
+    assert: a single domain is returned, with a link to the next page.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr("api.pagination.IdCursorPagination.max_page_size", 1)
+        response = client.get(
+            "/api/v1/domains/?page_size=100",
+            headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"},
+        )
+
+    page = response.json()
+    assert len(page["results"]) == 1
+    assert page["next"]
+
+
+@pytest.mark.django_db
+def test_jobs_listed_most_recent_first(client: Client, user: User, user_auth_token: str):
+    """
+    arrange: log in a user with several jobs.
+    act: list the jobs one at a time.
+    assert: the most recent job is listed first.
+    """
+    jobs = [
+        RecordChangeJob.objects.create(
+            user=user, fqdn=f"{FQDN_PREFIX}example.com", value=str(index), action="present"
+        )
+        for index in range(2)
+    ]
+
+    response = client.get(
+        "/api/v1/jobs/?page_size=1", headers={"AUTHORIZATION": f"Basic {user_auth_token}"}
+    )
+
+    page = response.json()
+    assert [job["id"] for job in page["results"]] == [str(jobs[-1].id)]
+    assert page["next"]
+
+
+@pytest.mark.django_db
+def test_users_listed_most_recent_first(
+    client: Client, admin_user: User, admin_user_auth_token: str, user: User
+):
+    """
+    arrange: log in an admin user, given users who joined at different times and at once.
+    act: list the users one at a time following the next links.
+    assert: the users are listed from the most recently joined, each once.
+    """
+    joined_at = user.date_joined
+    others = [
+        User.objects.create_user(username=f"other-{index}", date_joined=joined_at)
+        for index in range(2)
+    ]
+    User.objects.filter(pk=admin_user.pk).update(date_joined=joined_at - timedelta(days=1))
+    headers = {"AUTHORIZATION": f"Basic {admin_user_auth_token}"}
+    usernames = []
+    url = "/api/v1/users/?page_size=1"
+    while url:
+        page = client.get(url, headers=headers).json()
+        usernames.extend(listed["username"] for listed in page["results"])
+        url = page["next"]
+
+    assert usernames == [
+        others[1].username,
+        others[0].username,
+        user.username,
+        admin_user.username,
+    ]
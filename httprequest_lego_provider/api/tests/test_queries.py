@@ -0,0 +1,102 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the queries module."""
+
+# pylint:disable=unused-argument
+
+import logging
+from io import StringIO
+
+import pytest
+from api.metrics import DB_QUERIES, QUERY_BUDGET_EXCEEDED
+from api.models import Domain
+from api.queries import QueryCounter
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client
+from prometheus_client import REGISTRY
+
+
+def _get_observations(path: str) -> float:
+    """Get the number of observations of the database queries of a code path.
+
+    Args:
+        path: the code path.
+
+    Returns:
+        the number of observations.
+    """
+    return (
+        REGISTRY.get_sample_value("httprequest_lego_provider_db_queries_count", {"path": path})
+        or 0
+    )
+
+
+@pytest.mark.django_db
+def test_query_counter(domains: list):
+    """
+    arrange: given several domains.
+    act: query the domains and their number within the counter, then outside of it.
+    assert: only the queries run within the counter are counted.
+    """
+    with QueryCounter() as counter:
+        list(Domain.objects.all())
+        Domain.objects.count()
+    list(Domain.objects.all())
+
+    assert counter.count == 2
+    assert not counter.exceeded
+
+
+@pytest.mark.django_db
+def test_query_counter_budget_exceeded(domains: list, caplog: pytest.LogCaptureFixture):
+    """
+    arrange: given several domains.
+    act: query the domains one at a time within a counter with a budget of one query.
+    assert: the budget exceeded is logged and counted.
+    """
+    exceeded = QUERY_BUDGET_EXCEEDED.labels(path="test")._value.get()
+
+    with caplog.at_level(logging.WARNING, logger="api.queries"):
+        with QueryCounter("test", budget=1) as counter:
+            for domain in domains:
+                Domain.objects.get(pk=domain.pk)
+
+    assert counter.count == len(domains)
+    assert counter.exceeded
+    assert QUERY_BUDGET_EXCEEDED.labels(path="test")._value.get() == exceeded + 1
+    assert "over its budget of 1" in caplog.text
+
+
+@pytest.mark.django_db
+def test_middleware_records_queries_by_view(
+    client: Client, admin_user_auth_token: str, domains: list
+):
+    """
+    arrange: log in an admin user.
+    act: list the domains.
+    assert: the queries of the request are recorded under the name of the view.
+    """
+    observations = _get_observations("domain-list")
+
+    response = client.get(
+        "/api/v1/domains/", headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"}
+    )
+
+    assert response.status_code == 200
+    assert _get_observations("domain-list") == observations + 1
+
+
+@pytest.mark.django_db
+def test_command_records_queries(user: User):
+    """
+    arrange: given a user.
+    act: call the list_domains command.
+    assert: the queries of the command are recorded under its name.
+    """
+    observations = _get_observations("command:list_domains")
+
+    call_command("list_domains", user.username, stdout=StringIO())
+
+    assert _get_observations("command:list_domains") == observations + 1
+    assert DB_QUERIES.labels(path="command:list_domains")._sum.get() > 0
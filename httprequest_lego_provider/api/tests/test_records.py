@@ -0,0 +1,150 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the records module."""
+
+# pylint:disable=unused-argument
+
+import contextlib
+import secrets
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from api import records
+from api.models import Domain, PushedRecord, Zone
+from api.records import _call_with_connections, apply_record_change, is_record_applied
+from api.writer import RecordWriter
+from git import Repo
+
+
+@contextlib.contextmanager
+def _serialize_record_writes() -> Iterator[None]:
+    """Serialize the writes of the pushed records by concurrent changes.
+
+    The in-memory SQLite database of the tests fails instead of waiting when a table is locked.
+
+    Yields:
+        nothing, the writes being serialized until the context exits.
+    """
+    lock = threading.Lock()
+
+    def _serialized(func: Callable) -> Callable:
+        """Wrap a function to run it under the lock.
+
+        Args:
+            func: the function.
+
+        Returns:
+            the wrapped function.
+        """
+
+        def _call(*args):
+            """Run the function under the lock.
+
+            Args:
+                args: the arguments of the function.
+            """
+            with lock:
+                func(*args)
+
+        return _call
+
+    with patch("api.records.record_applied", _serialized(records.record_applied)), patch(
+        "api.records.forget_record", _serialized(records.forget_record)
+    ):
+        yield
+
+
+@pytest.mark.django_db(transaction=True)
+def test_apply_record_change_when_present_cancelled(git_remote: Repo, git_repo_url: str):
+    """
+    arrange: given a record with a value in the repository, known as pushed.
+    act: add a new value, then remove the record before the addition is pushed.
+    assert: the existing value is removed from the repository, and the new value is not known as
+        pushed, so adding it again is applied.
+    """
+    fqdn = "site2.example.com"
+    Zone.objects.create(name="example.com")
+    Domain.objects.create(fqdn=fqdn)
+    PushedRecord.objects.create(fqdn=fqdn, value="sometoken")
+    value = secrets.token_hex()
+    submitted = threading.Semaphore(0)
+    window = threading.Event()
+    submit_all = RecordWriter.submit_all
+
+    def _submit_all(writer: RecordWriter, changes):
+        """Queue changes, then signal they were queued.
+
+        Args:
+            writer: the writer.
+            changes: the changes to queue.
+        """
+        submit_all(writer, changes)
+        submitted.release()
+
+    with patch.object(RecordWriter, "submit_all", _submit_all), patch(
+        "api.writer.time"
+    ) as writer_time, _serialize_record_writes(), ThreadPoolExecutor(2) as executor:
+        # The batching window only elapses once both changes are queued.
+        writer_time.sleep.side_effect = lambda _: window.wait(30)
+        present = executor.submit(_call_with_connections, apply_record_change, fqdn, "git", value)
+        assert submitted.acquire(timeout=30)
+        cleanup = executor.submit(_call_with_connections, apply_record_change, fqdn, "git", None)
+        assert submitted.acquire(timeout=30)
+        window.set()
+        present.result(timeout=30)
+        cleanup.result(timeout=30)
+
+    blob = git_remote.commit("main").tree / "example.com.domain"
+    zone = blob.data_stream.read().decode("utf-8")
+    assert "site2 " not in zone and value not in zone
+    assert not is_record_applied(fqdn, value)
+    assert set(PushedRecord.objects.filter(fqdn=fqdn).values_list("value", flat=True)) <= {""}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_apply_record_change_when_cleanup_superseded(git_remote: Repo, git_repo_url: str):
+    """
+    arrange: given a record with a value in the repository, known as pushed.
+    act: remove the record, then add a new value before the removal is pushed.
+    assert: the new value is in the repository, and the record is never known as removed, so
+        removing it again is applied.
+    """
+    fqdn = "site2.example.com"
+    Zone.objects.create(name="example.com")
+    Domain.objects.create(fqdn=fqdn)
+    PushedRecord.objects.create(fqdn=fqdn, value="sometoken")
+    value = secrets.token_hex()
+    submitted = threading.Semaphore(0)
+    window = threading.Event()
+    submit_all = RecordWriter.submit_all
+
+    def _submit_all(writer: RecordWriter, changes):
+        """Queue changes, then signal they were queued.
+
+        Args:
+            writer: the writer.
+            changes: the changes to queue.
+        """
+        submit_all(writer, changes)
+        submitted.release()
+
+    with patch.object(RecordWriter, "submit_all", _submit_all), patch(
+        "api.writer.time"
+    ) as writer_time, _serialize_record_writes(), ThreadPoolExecutor(2) as executor:
+        # The batching window only elapses once both changes are queued.
+        writer_time.sleep.side_effect = lambda _: window.wait(30)
+        cleanup = executor.submit(_call_with_connections, apply_record_change, fqdn, "git", None)
+        assert submitted.acquire(timeout=30)
+        present = executor.submit(_call_with_connections, apply_record_change, fqdn, "git", value)
+        assert submitted.acquire(timeout=30)
+        window.set()
+        cleanup.result(timeout=30)
+        present.result(timeout=30)
+
+    blob = git_remote.commit("main").tree / "example.com.domain"
+    assert f"site2 600 IN TXT \042{value}\042" in blob.data_stream.read().decode("utf-8")
+    assert not is_record_applied(fqdn, None)
+    assert set(PushedRecord.objects.filter(fqdn=fqdn).values_list("value", flat=True)) <= {value}
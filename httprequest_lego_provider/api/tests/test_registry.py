@@ -0,0 +1,98 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the registry module."""
+
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import pytest
+from api.dns import DnsSourceUpdateError
+from api.models import Domain, Zone
+from api.records import apply_record_change
+from api.registry import get_repository_urls, load_zones, resolve_zone
+from api.zone import ZoneTrie
+
+
+@pytest.fixture(name="zone_trie")
+def zone_trie_fixture() -> Iterator[ZoneTrie]:
+    """Provide an empty zone trie, not yet loaded from the database."""
+    trie = ZoneTrie()
+    with patch("api.registry.zone_trie", trie), patch("api.models.zone_trie", trie), patch(
+        "api.registry._loaded_at", None
+    ):
+        yield trie
+
+
+@pytest.mark.django_db
+def test_domains_are_assigned_to_their_zone(zone_trie: ZoneTrie):
+    """
+    arrange: given a zone under a public suffix, registered in mixed case.
+    act: create domains inside and outside of it, then register the zone of the outside domain.
+    assert: the domains are assigned to the longest registered zone, no zone is registered for
+        the outside domain until it is registered explicitly.
+    """
+    Zone.objects.create(name="Example.CO.uk")
+
+    inside = Domain.objects.create(fqdn="_acme-challenge.site.example.co.uk")
+    outside = Domain.objects.create(fqdn="_acme-challenge.site.sub.example.com")
+
+    assert inside.zone.name == "example.co.uk"
+    assert outside.zone is None
+    assert not Zone.objects.filter(name="example.com").exists()
+    Zone.objects.create(name="sub.example.com")
+    outside.refresh_from_db()
+    assert outside.zone.name == "sub.example.com"
+    assert zone_trie.find(outside.fqdn) == "sub.example.com"
+
+
+@pytest.mark.django_db
+def test_resolve_zone_reloads_the_registry(zone_trie: ZoneTrie):
+    """
+    arrange: given a zone registered by another process, missing from the trie.
+    act: resolve the zone of a FQDN inside it, and of a FQDN outside of any zone.
+    assert: the zone is found once the trie is reloaded, and an error is raised for the FQDN
+        outside of any zone.
+    """
+    Zone.objects.create(name="example.co.uk")
+    zone_trie.replace([])
+
+    assert resolve_zone("_acme-challenge.site.example.co.uk") == "example.co.uk"
+    with pytest.raises(DnsSourceUpdateError):
+        resolve_zone("_acme-challenge.example.org")
+
+
+@pytest.mark.django_db
+def test_apply_record_change_fails_fast_without_zone(zone_trie: ZoneTrie):
+    """
+    arrange: given no registered zone.
+    act: apply a record change.
+    assert: a DnsSourceUpdateError exception is raised without calling the backend.
+    """
+    with patch("api.backends.repository.write_dns_record") as mocked_dns_write:
+        with pytest.raises(DnsSourceUpdateError, match="No zone registered"):
+            apply_record_change("_acme-challenge.example.org", Domain.GIT, "token")
+
+    mocked_dns_write.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_load_zones_loads_repositories(zone_trie: ZoneTrie, zone_repositories: dict[str, str]):
+    """
+    arrange: given zones stored in other repositories, one of them registered by another process
+        and one of them moved back to the default repository by another process.
+    act: reload the zones.
+    assert: the repositories of the zones match the database, and all the repositories are
+        listed once.
+    """
+    url = "git+ssh://user@git.server/other@main"
+    Zone.objects.create(name="example.co.uk", repository=url)
+    Zone.objects.filter(name="example.co.uk").update(repository="")
+    Zone.objects.bulk_create(
+        [Zone(name="example.org", repository=url), Zone(name="example.net", repository=url)]
+    )
+
+    load_zones(force=True)
+
+    assert zone_repositories == {"example.org": url, "example.net": url}
+    with patch("api.registry.GIT_REPO_URL", "git+ssh://user@git.server/default"):
+        assert get_repository_urls() == ["git+ssh://user@git.server/default", url]
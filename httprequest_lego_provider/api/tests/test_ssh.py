@@ -0,0 +1,139 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the ssh module."""
+
+import subprocess  # nosec B404
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from api.ssh import SshMaster, get_ssh_master
+from prometheus_client import REGISTRY
+
+
+@pytest.mark.parametrize(
+    "url,destination,port",
+    [
+        ("git+ssh://user@git.server/repo_name", "user@git.server", None),
+        ("ssh://user@git.server:2222/repo_name", "user@git.server", 2222),
+        ("ssh://git.server/repo_name", "git.server", None),
+    ],
+)
+def test_get_ssh_master(url: str, destination: str, port: int | None, tmp_path: Path):
+    """
+    arrange: do nothing.
+    act: get the master connection of a repository URL accessed over SSH.
+    assert: the master connection targets the host of the URL, with the persist time in the
+        SSH command.
+    """
+    master = get_ssh_master(url, tmp_path, 600)
+
+    assert master is not None
+    assert master.destination == destination
+    assert master.port == port
+    assert "ControlPersist=600" in master.command
+    assert f"ControlPath={tmp_path}/" in master.command
+
+
+@pytest.mark.parametrize(
+    "url,persist",
+    [("file:///srv/repo_name", 600), ("/srv/repo_name", 600), ("ssh://user@git.server/r", 0)],
+)
+def test_get_ssh_master_disabled(url: str, persist: int, tmp_path: Path):
+    """
+    arrange: do nothing.
+    act: get the master connection of a local repository, or with the multiplexing disabled.
+    assert: there is no master connection.
+    """
+    assert get_ssh_master(url, tmp_path, persist) is None
+
+
+def _get_count(outcome: str) -> float:
+    """Get the number of uses of the master connection with an outcome.
+
+    Args:
+        outcome: the outcome.
+
+    Returns:
+        the number of uses.
+    """
+    return (
+        REGISTRY.get_sample_value(
+            "httprequest_lego_provider_ssh_connections_total", {"outcome": outcome}
+        )
+        or 0
+    )
+
+
+def test_ensure_reuses_running_master(tmp_path: Path):
+    """
+    arrange: given a running master connection.
+    act: ensure the master connection is running.
+    assert: the master connection is checked and reused, without a new handshake.
+    """
+    master = SshMaster("user@git.server", None, tmp_path, 600)
+    master.control_path.touch()
+    reused = _get_count("reused")
+
+    with patch("api.ssh.subprocess.run", return_value=MagicMock(returncode=0)) as run:
+        master.ensure()
+
+    run.assert_called_once()
+    assert run.call_args.args[0][-3:] == ["-O", "check", "user@git.server"]
+    assert _get_count("reused") == reused + 1
+
+
+@pytest.mark.parametrize(
+    "returncode,outcome",
+    [pytest.param(0, "established", id="success"), pytest.param(255, "error", id="failure")],
+)
+def test_ensure_starts_dead_master(returncode: int, outcome: str, tmp_path: Path):
+    """
+    arrange: given a master connection whose control socket is stale.
+    act: ensure the master connection is running.
+    assert: a new master connection is started in the background, and its handshake is
+        measured whether it succeeds or not.
+    """
+    master = SshMaster("user@git.server", 2222, tmp_path, 600)
+    master.control_path.touch()
+    count = _get_count(outcome)
+    handshakes = (
+        REGISTRY.get_sample_value(
+            "httprequest_lego_provider_ssh_handshake_seconds_count", {"outcome": outcome}
+        )
+        or 0
+    )
+
+    with patch(
+        "api.ssh.subprocess.run",
+        side_effect=[MagicMock(returncode=255), MagicMock(returncode=returncode)],
+    ) as run:
+        master.ensure()
+
+    command = run.call_args.args[0]
+    assert command[-4:] == ["-M", "-N", "-f", "user@git.server"]
+    assert command[command.index("-p") + 1] == "2222"
+    assert not master.control_path.exists()
+    assert _get_count(outcome) == count + 1
+    assert (
+        REGISTRY.get_sample_value(
+            "httprequest_lego_provider_ssh_handshake_seconds_count", {"outcome": outcome}
+        )
+        == handshakes + 1
+    )
+
+
+def test_ensure_survives_timeout(tmp_path: Path):
+    """
+    arrange: given no master connection and an unreachable host.
+    act: ensure the master connection is running.
+    assert: no exception is raised, as git connects on its own.
+    """
+    master = SshMaster("user@git.server", None, tmp_path, 600)
+    count = _get_count("error")
+
+    with patch("api.ssh.subprocess.run", side_effect=subprocess.TimeoutExpired("ssh", 30)) as run:
+        master.ensure()
+
+    run.assert_called_once()
+    assert _get_count("error") == count + 1
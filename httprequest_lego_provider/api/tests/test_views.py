@@ -5,17 +5,34 @@
 # imported-auth-user has to be disable as the conflicting import is needed for typing
 # pylint:disable=imported-auth-user
 
+import asyncio
 import base64
 import json
 import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import ModuleType
+from typing import Dict
 from unittest.mock import patch
 
 import pytest
+from api import jobs, urls, views
+from api.admission import AdmissionController
+from api.authorization import _load_grant, _load_grants
+from api.dns import DnsSourceUpdateError
 from api.forms import FQDN_PREFIX
-from api.models import Domain, DomainUserPermission
+from api.models import Domain, DomainUserPermission, PushedRecord, RecordChangeJob, Zone
+from asgiref.sync import async_to_sync
 from django.contrib.auth.hashers import check_password
-from django.contrib.auth.models import User
-from django.test import Client
+from django.contrib.auth.models import Group, User
+from django.http import HttpResponse
+from django.test import AsyncClient, Client
+from django.urls import path
+from git import Repo
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from prometheus_client import REGISTRY
 
 
 @pytest.mark.django_db
@@ -102,7 +119,7 @@ def test_post_present_when_logged_in_and_permission(
     act: submit a POST request for the present URL containing the fqdn above.
     assert: a 204 is returned.
     """
-    with patch("api.views.write_dns_record") as mocked_dns_write:
+    with patch("api.backends.repository.write_dns_record") as mocked_dns_write:
         value = secrets.token_hex()
         response = client.post(
             "/present",
@@ -115,6 +132,32 @@ def test_post_present_when_logged_in_and_permission(
         assert response.status_code == 204
 
 
+@pytest.mark.django_db
+def test_post_present_authorization_cached(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: mock the write_dns_recod method, log in a user and give him permissions on a FQDN.
+    act: submit two POST requests for the present URL containing the fqdn above.
+    assert: both changes are applied, the permission being loaded only for the first one.
+    """
+    fqdn = domain_user_permission.domain.fqdn
+    with patch("api.backends.repository.write_dns_record") as mocked_dns_write, patch(
+        "api.authorization._load_grant", wraps=_load_grant
+    ) as load_patch:
+        for _ in range(2):
+            response = client.post(
+                "/present",
+                data={"fqdn": fqdn, "value": secrets.token_hex()},
+                format="json",
+                headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+            )
+            assert response.status_code == 204
+
+    assert mocked_dns_write.call_count == 2
+    load_patch.assert_called_once()
+
+
 @pytest.mark.django_db
 def test_post_present_when_logged_in_and_permission_with_trailing_dor(
     client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
@@ -124,7 +167,7 @@ def test_post_present_when_logged_in_and_permission_with_trailing_dor(
     act: submit a POST request for the present URL containing the fqdn above.
     assert: a 204 is returned.
     """
-    with patch("api.views.write_dns_record") as mocked_dns_write:
+    with patch("api.backends.repository.write_dns_record") as mocked_dns_write:
         value = secrets.token_hex()
         response = client.post(
             "/present",
@@ -144,7 +187,7 @@ def test_post_present_when_logged_in_and_fqdn_invalid(client: Client, user_auth_
     act: submit a POST request for the present URL containing an invalid FQDN.
     assert: a 400 is returned.
     """
-    with patch("api.views.write_dns_record"):
+    with patch("api.backends.repository.write_dns_record"):
         value = secrets.token_hex()
         response = client.post(
             "/present",
@@ -227,7 +270,7 @@ def test_post_cleanup_when_logged_in_and_permission(
     act: submit a POST request for the cleanup URL containing the fqdn above.
     assert: a 200 is returned.
     """
-    with patch("api.views.remove_dns_record") as mocked_dns_remove:
+    with patch("api.backends.repository.remove_dns_record") as mocked_dns_remove:
         value = secrets.token_hex()
         response = client.post(
             "/cleanup",
@@ -249,7 +292,7 @@ def test_post_cleanup_when_logged_in_and_permission_with_trailing_dot(
     act: submit a POST request for the cleanup URL containing the fqdn above.
     assert: a 200 is returned.
     """
-    with patch("api.views.remove_dns_record") as mocked_dns_remove:
+    with patch("api.backends.repository.remove_dns_record") as mocked_dns_remove:
         value = secrets.token_hex()
         response = client.post(
             "/cleanup",
@@ -269,7 +312,7 @@ def test_post_cleanup_when_logged_in_and_fqdn_invalid(client: Client, user_auth_
     act: submit a POST request for the cleanup URL containing an invalid FQDN.
     assert: a 400 is returned.
     """
-    with patch("api.views.remove_dns_record"):
+    with patch("api.backends.repository.remove_dns_record"):
         value = secrets.token_hex()
         response = client.post(
             "/cleanup",
@@ -308,7 +351,7 @@ def test_test_jwt_token_login(
     )
     token = json.loads(response.content)["access"]
 
-    with patch("api.views.write_dns_record"):
+    with patch("api.backends.repository.write_dns_record"):
         value = secrets.token_hex()
         response = client.post(
             "/present",
@@ -351,7 +394,7 @@ def test_get_domain_when_logged_in_as_admin_user(
         format="json",
         headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"},
     )
-    json = response.json()
+    json = response.json()["results"]
 
     assert response.status_code == 200
     assert len(json) == len(domains)
@@ -369,13 +412,66 @@ def test_get_domain_with_fqdn_filter(client: Client, admin_user_auth_token: str,
         format="json",
         headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"},
     )
-    json = response.json()
+    json = response.json()["results"]
 
     assert response.status_code == 200
     assert len(json) == 1
     assert json[0]["fqdn"] == f"{FQDN_PREFIX}example2.com"
 
 
+@pytest.mark.django_db
+def test_get_domain_with_fields(client: Client, admin_user_auth_token: str, domains: list):
+    """
+    arrange: log in an admin user.
+    act: submit a GET request for the domain URL selecting the fqdn and zone fields.
+    assert: a 200 is returned and the domains only contain the fields selected.
+    """
+    response = client.get(
+        "/api/v1/domains/?fields=fqdn,zone",
+        headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"},
+    )
+
+    assert response.status_code == 200
+    assert [set(domain) for domain in response.json()["results"]] == [{"fqdn", "zone"}] * len(
+        domains
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("fields", ["unknown", "username,password"])
+def test_get_user_with_unknown_fields(client: Client, admin_user_auth_token: str, fields: str):
+    """
+    arrange: log in an admin user.
+    act: submit a GET request for the user URL selecting a missing or write-only field.
+    assert: a 400 is returned.
+    """
+    response = client.get(
+        f"/api/v1/users/?fields={fields}",
+        headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"},
+    )
+
+    assert response.status_code == 400
+    assert "fields" in response.json()
+
+
+@pytest.mark.django_db
+def test_post_domain_with_fields(client: Client, admin_user_auth_token: str, zones: list[Zone]):
+    """
+    arrange: log in an admin user.
+    act: submit a POST request for the domain URL with a fields parameter.
+    assert: the fields parameter is ignored, the domain is created and fully returned.
+    """
+    response = client.post(
+        "/api/v1/domains/?fields=id",
+        data={"fqdn": "example.com"},
+        format="json",
+        headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"},
+    )
+
+    assert response.status_code == 201
+    assert response.json()["fqdn"] == f"{FQDN_PREFIX}example.com"
+
+
 @pytest.mark.django_db
 def test_post_domain_when_logged_in_as_non_admin_user(client: Client, user_auth_token: str):
     """
@@ -396,7 +492,9 @@ def test_post_domain_when_logged_in_as_non_admin_user(client: Client, user_auth_
 
 
 @pytest.mark.django_db
-def test_post_domain_when_logged_in_as_admin_user(client: Client, admin_user_auth_token: str):
+def test_post_domain_when_logged_in_as_admin_user(
+    client: Client, admin_user_auth_token: str, zones: list[Zone]
+):
     """
     arrange: log in an admin user.
     act: submit a POST request for the domain URL.
@@ -413,6 +511,27 @@ def test_post_domain_when_logged_in_as_admin_user(client: Client, admin_user_aut
     assert response.status_code == 201
 
 
+@pytest.mark.django_db
+def test_post_domain_when_logged_in_as_admin_user_and_zone_not_registered(
+    client: Client, admin_user_auth_token: str
+):
+    """
+    arrange: log in an admin user, with no zone registered.
+    act: submit a POST request for the domain URL.
+    assert: a 400 is returned and the domain is not inserted in the database.
+    """
+    response = client.post(
+        "/api/v1/domains/",
+        data={"fqdn": "example.com"},
+        format="json",
+        headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"},
+    )
+
+    assert response.status_code == 400
+    assert "No zone registered" in response.json()["fqdn"][0]
+    assert not Domain.objects.exists()
+
+
 @pytest.mark.django_db
 def test_post_domain_when_logged_in_as_admin_user_and_domain_invalid(
     client: Client, admin_user_auth_token: str
@@ -469,7 +588,7 @@ def test_get_domain_user_permission_when_logged_in_as_admin_user(
         "/api/v1/domain-user-permissions/",
         headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"},
     )
-    json = response.json()
+    json = response.json()["results"]
 
     assert response.status_code == 200
     assert len(json) == len(DomainUserPermission.objects.all())
@@ -493,7 +612,7 @@ def test_get_domain_user_permission_with_filters(
         data={"fqdn": "example2.com", "username": user.username},
         headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"},
     )
-    json = response.json()
+    json = response.json()["results"]
 
     assert response.status_code == 200
     assert len(json) > 0
@@ -610,7 +729,7 @@ def test_get_user_when_logged_in_as_admin_user(
         format="json",
         headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"},
     )
-    json = response.json()
+    json = response.json()["results"]
 
     assert len(User.objects.all()) > 0
     assert response.status_code == 200
@@ -632,7 +751,7 @@ def test_get_user_with_username_filter(client: Client, admin_user_auth_token: st
         format="json",
         headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"},
     )
-    json = response.json()
+    json = response.json()["results"]
 
     assert len(User.objects.all()) > 0
     assert response.status_code == 200
@@ -698,3 +817,888 @@ def test_post_user_when_logged_in_as_admin_user_and_user_invalid(
     )
 
     assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_post_present_when_async_returns_job(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: enable asynchronous record changes and block the DNS record write.
+    act: submit a POST request for the present URL and query the returned job.
+    assert: a 202 is returned and the job is reported as queued, then as pushed.
+    """
+    released = threading.Event()
+    futures = []
+
+    def submit_job(*args):
+        job, future = jobs.submit_job(*args)
+        futures.append(future)
+        return job, future
+
+    with patch("api.views.RECORD_CHANGES_ASYNC", True), patch(
+        "api.views.submit_job", side_effect=submit_job
+    ), patch(
+        "api.backends.repository.write_dns_record", side_effect=lambda *_: released.wait(30)
+    ) as mocked_dns_write:
+        value = secrets.token_hex()
+        response = client.post(
+            "/present",
+            data={"fqdn": domain_user_permission.domain.fqdn, "value": value},
+            format="json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+        assert response["Location"] == f"/api/v1/jobs/{job_id}/"
+        response = client.get(
+            response["Location"], headers={"AUTHORIZATION": f"Basic {user_auth_token}"}
+        )
+        assert response.json()["status"] == RecordChangeJob.QUEUED
+        released.set()
+        assert futures[0].result(timeout=30) == RecordChangeJob.PUSHED
+        response = client.post(
+            "/present?wait=30",
+            data={"fqdn": domain_user_permission.domain.fqdn, "value": value},
+            format="json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+        assert response.status_code == 204
+        assert RecordChangeJob.objects.get(id=job_id).status == RecordChangeJob.PUSHED
+        mocked_dns_write.assert_called_with(domain_user_permission.domain.fqdn, value)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_post_present_when_async_and_unexpected_error(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: enable asynchronous record changes and make the DNS record write fail unexpectedly.
+    act: submit a POST request for the present URL waiting for the job to complete.
+    assert: a 500 is returned and the job is reported as failed.
+    """
+    with patch("api.views.RECORD_CHANGES_ASYNC", True), patch(
+        "api.backends.repository.write_dns_record", side_effect=OSError("disk full")
+    ):
+        response = client.post(
+            "/present?wait=30",
+            data={"fqdn": domain_user_permission.domain.fqdn, "value": secrets.token_hex()},
+            format="json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+
+    assert response.status_code == 500
+    job = RecordChangeJob.objects.get()
+    assert job.status == RecordChangeJob.FAILED
+    assert job.error == "Unexpected error: OSError"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_post_cleanup_when_async_and_waiting(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: enable asynchronous record changes and make the DNS record removal fail.
+    act: submit a POST request for the cleanup URL waiting for the job to complete.
+    assert: a 500 is returned and the job is reported as failed.
+    """
+    with patch("api.views.RECORD_CHANGES_ASYNC", True), patch(
+        "api.backends.repository.remove_dns_record",
+        side_effect=DnsSourceUpdateError("push rejected"),
+    ):
+        response = client.post(
+            "/cleanup?wait=30",
+            data={"fqdn": domain_user_permission.domain.fqdn, "value": secrets.token_hex()},
+            format="json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+
+    assert response.status_code == 500
+    job = RecordChangeJob.objects.get()
+    assert job.status == RecordChangeJob.FAILED
+    assert job.error == "push rejected"
+
+
+@pytest.mark.django_db
+def test_post_present_when_async_and_wait_invalid(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: enable asynchronous record changes.
+    act: submit a POST request for the present URL with an invalid wait parameter.
+    assert: a 400 is returned and no job is recorded.
+    """
+    with patch("api.views.RECORD_CHANGES_ASYNC", True):
+        response = client.post(
+            "/present?wait=forever",
+            data={"fqdn": domain_user_permission.domain.fqdn, "value": secrets.token_hex()},
+            format="json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+
+    assert response.status_code == 400
+    assert not RecordChangeJob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_get_job_when_logged_in_as_other_user(
+    client: Client, user: User, admin_user_auth_token: str, other_user: User
+):
+    """
+    arrange: record a job for a user and log in as another user and as an admin.
+    act: submit a GET request for the job URL.
+    assert: the job is only visible to the admin user.
+    """
+    job = RecordChangeJob.objects.create(
+        user=user, fqdn="example.com", value="value", action=RecordChangeJob.PRESENT
+    )
+    other_user.set_password("test!pw")
+    other_user.save()
+    other_token = base64.b64encode(bytes(f"{other_user.username}:test!pw", "utf-8")).decode()
+
+    other_response = client.get(
+        f"/api/v1/jobs/{job.id}/", headers={"AUTHORIZATION": f"Basic {other_token}"}
+    )
+    admin_response = client.get(
+        f"/api/v1/jobs/{job.id}/", headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"}
+    )
+
+    assert other_response.status_code == 404
+    assert admin_response.status_code == 200
+    assert admin_response.json()["status"] == RecordChangeJob.QUEUED
+
+
+@pytest.mark.django_db
+def test_post_present_when_domain_uses_zone_file_backend(
+    client: Client,
+    user_auth_token: str,
+    domain_user_permission: DomainUserPermission,
+    tmp_path: Path,
+):
+    """
+    arrange: log in a user with permissions on a FQDN whose records are stored in zone files.
+    act: submit a POST request for the present URL containing the fqdn above.
+    assert: a 204 is returned and the record is written to the zone file.
+    """
+    domain = domain_user_permission.domain
+    domain.backend = Domain.ZONE_FILE
+    domain.save()
+    zone_file = tmp_path / "example.com.domain"
+    zone_file.touch()
+    value = secrets.token_hex()
+
+    with patch("api.backends.zonefile.ZONE_FILE_DIR", str(tmp_path)), patch(
+        "api.backends.repository.write_dns_record"
+    ) as mocked_dns_write:
+        response = client.post(
+            "/present",
+            data={"fqdn": domain.fqdn, "value": value},
+            format="json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+
+    assert response.status_code == 204
+    mocked_dns_write.assert_not_called()
+    assert value in zone_file.read_text(encoding="utf-8")
+
+
+@pytest.mark.django_db
+def test_post_present_when_value_already_pushed(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: log in a user with permissions on a FQDN and push a record for it.
+    act: submit a POST request for the present URL with the same value, then another value.
+    assert: the first request returns without writing the record, the second one writes it.
+    """
+    fqdn = domain_user_permission.domain.fqdn
+    value = secrets.token_hex()
+    PushedRecord.objects.create(fqdn=fqdn, value=value)
+    new_value = secrets.token_hex()
+
+    with patch("api.backends.repository.write_dns_record") as mocked_dns_write:
+        for request_value in (value, new_value):
+            response = client.post(
+                "/present",
+                data={"fqdn": fqdn, "value": request_value},
+                format="json",
+                headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+            )
+            assert response.status_code == 204
+
+    mocked_dns_write.assert_called_once_with(fqdn, new_value)
+    assert PushedRecord.objects.get(fqdn=fqdn).value == new_value
+
+
+@pytest.mark.django_db
+def test_post_cleanup_when_record_already_removed(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: log in a user with permissions on a FQDN whose record is known to be removed.
+    act: submit a POST request for the cleanup URL.
+    assert: a 204 is returned without removing the record.
+    """
+    fqdn = domain_user_permission.domain.fqdn
+    PushedRecord.objects.create(fqdn=fqdn, value="")
+
+    with patch("api.backends.repository.remove_dns_record") as mocked_dns_remove:
+        response = client.post(
+            "/cleanup",
+            data={"fqdn": fqdn, "value": secrets.token_hex()},
+            format="json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+
+    assert response.status_code == 204
+    mocked_dns_remove.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_post_cleanup_when_remove_fails(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: log in a user with permissions on a FQDN with a pushed record and make the record
+        removal fail.
+    act: submit a POST request for the cleanup URL.
+    assert: the stored value of the record is forgotten.
+    """
+    fqdn = domain_user_permission.domain.fqdn
+    PushedRecord.objects.create(fqdn=fqdn, value=secrets.token_hex())
+    client.raise_request_exception = False
+
+    with patch("api.backends.repository.remove_dns_record", side_effect=DnsSourceUpdateError):
+        response = client.post(
+            "/cleanup",
+            data={"fqdn": fqdn, "value": secrets.token_hex()},
+            format="json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+
+    assert response.status_code == 500
+    assert not PushedRecord.objects.filter(fqdn=fqdn).exists()
+
+
+@pytest.mark.django_db
+def test_get_metrics_after_record_changes(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: log in a user with permissions on a FQDN.
+    act: add a record, remove it while the removal fails, then get the metrics.
+    assert: the changes are counted by outcome and the phases measured, for the zone of the FQDN.
+    """
+    fqdn = domain_user_permission.domain.fqdn
+    zone = ".".join(fqdn.split(".")[-2:])
+    client.raise_request_exception = False
+
+    def _count(action: str, outcome: str) -> float:
+        """Get the number of record changes counted.
+
+        Args:
+            action: the action of the changes.
+            outcome: the outcome of the changes.
+
+        Returns:
+            the number of changes.
+        """
+        return (
+            REGISTRY.get_sample_value(
+                "httprequest_lego_provider_record_changes_total",
+                {"action": action, "zone": zone, "outcome": outcome},
+            )
+            or 0
+        )
+
+    counts = (_count("present", "success"), _count("cleanup", "error"))
+    with patch("api.backends.repository.write_dns_record"), patch(
+        "api.backends.repository.remove_dns_record", side_effect=DnsSourceUpdateError
+    ):
+        for url in ("/present", "/cleanup"):
+            client.post(
+                url,
+                data={"fqdn": fqdn, "value": secrets.token_hex()},
+                format="json",
+                headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+            )
+    response = client.get("/metrics")
+
+    assert (_count("present", "success"), _count("cleanup", "error")) == (
+        counts[0] + 1,
+        counts[1] + 1,
+    )
+    assert response.status_code == 200
+    assert (
+        "httprequest_lego_provider_phase_duration_seconds_count"
+        f'{{outcome="error",phase="apply",zone="{zone}"}}'
+    ) in response.content.decode("utf-8")
+
+
+@pytest.mark.parametrize(
+    "remote_addr, headers",
+    [
+        pytest.param("203.0.113.10", {}, id="public client"),
+        pytest.param("10.1.0.1", {"X-Forwarded-For": "203.0.113.10"}, id="through ingress"),
+        pytest.param("10.1.0.1", {"Forwarded": "for=203.0.113.10"}, id="forwarded"),
+    ],
+)
+def test_get_metrics_when_client_not_allowed(
+    client: Client, remote_addr: str, headers: Dict[str, str]
+):
+    """
+    arrange: given a client outside the allowed networks or a request forwarded by the ingress.
+    act: get the metrics.
+    assert: the request is forbidden.
+    """
+    response = client.get("/metrics", headers=headers, REMOTE_ADDR=remote_addr)
+
+    assert response.status_code == 403
+
+
+def test_get_metrics_from_cluster(client: Client):
+    """
+    arrange: given a client in a private network, scraping the unit directly.
+    act: get the metrics.
+    assert: the metrics are served.
+    """
+    response = client.get("/metrics", REMOTE_ADDR="10.1.0.1")
+
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_post_present_traces_phases(
+    client: Client,
+    user_auth_token: str,
+    domain_user_permission: DomainUserPermission,
+    span_exporter: InMemorySpanExporter,
+):
+    """
+    arrange: log in a user with permissions on a FQDN.
+    act: submit a POST request for the present URL.
+    assert: the authorization and the record change are traced with the FQDN and its zone.
+    """
+    fqdn = domain_user_permission.domain.fqdn
+
+    with patch("api.backends.repository.write_dns_record"):
+        client.post(
+            "/present",
+            data={"fqdn": fqdn, "value": secrets.token_hex()},
+            format="json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+
+    spans = {span.name: span for span in span_exporter.get_finished_spans()}
+    assert spans["authorize"].attributes["fqdn"] == fqdn
+    assert spans["apply"].attributes["zone"] == ".".join(fqdn.split(".")[-2:])
+    assert spans["apply"].attributes["outcome"] == "success"
+
+
+@pytest.fixture(name="async_views")
+def async_views_fixture(settings):
+    """Route the present and cleanup URLs to the asynchronous views."""
+    urlconf = ModuleType("async_urls")
+    urlconf.urlpatterns = [
+        path("cleanup", views.ahandle_cleanup, name="cleanup"),
+        path("present", views.ahandle_present, name="present"),
+        *urls.urlpatterns,
+    ]
+    settings.ROOT_URLCONF = urlconf
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("async_views")
+def test_async_post_present_when_not_logged_in(client: Client):
+    """
+    arrange: route the present URL to the asynchronous view.
+    act: submit a POST request for the present URL.
+    assert: a 401 is returned, with the authentication scheme to use.
+    """
+    response = client.post("/present")
+
+    assert response.status_code == 401
+    assert response["WWW-Authenticate"] == 'Basic realm="api"'
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("async_views")
+def test_async_get_present_when_logged_in(client: Client, user_auth_token: str):
+    """
+    arrange: route the present URL to the asynchronous view and log in a user.
+    act: submit a GET request for the present URL.
+    assert: a 405 is returned.
+    """
+    response = client.get("/present", headers={"AUTHORIZATION": f"Basic {user_auth_token}"})
+
+    assert response.status_code == 405
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("async_views")
+def test_async_post_present_when_fqdn_invalid(client: Client, user_auth_token: str):
+    """
+    arrange: route the present URL to the asynchronous view and log in a user.
+    act: submit a POST request for the present URL with an invalid FQDN.
+    assert: a 400 is returned.
+    """
+    response = client.post(
+        "/present",
+        data={"fqdn": "example.com", "value": secrets.token_hex()},
+        format="json",
+        headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("async_views")
+def test_async_post_present_when_no_permission(
+    client: Client, user_auth_token: str, domain: Domain
+):
+    """
+    arrange: route the present URL to the asynchronous view and log in a user without
+        permissions on a FQDN.
+    act: submit a POST request for the present URL containing the FQDN, as JSON.
+    assert: a 403 is returned.
+    """
+    response = client.post(
+        "/present",
+        data={"fqdn": domain.fqdn, "value": secrets.token_hex()},
+        content_type="application/json",
+        headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+    )
+
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("async_views")
+def test_async_post_present_and_cleanup(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: route the present and cleanup URLs to the asynchronous views and log in a user with
+        permissions on a FQDN.
+    act: submit a POST request for the present URL, then for the cleanup URL.
+    assert: the record is written then removed on the threads of the record operations.
+    """
+    fqdn = domain_user_permission.domain.fqdn
+    value = secrets.token_hex()
+    threads = []
+    with patch(
+        "api.backends.repository.write_dns_record",
+        side_effect=lambda *_: threads.append(threading.current_thread().name),
+    ) as mocked_dns_write, patch(
+        "api.backends.repository.remove_dns_record",
+        side_effect=lambda *_: threads.append(threading.current_thread().name),
+    ) as mocked_dns_remove:
+        for url in ("/present", "/cleanup"):
+            response = client.post(
+                url,
+                data={"fqdn": fqdn, "value": value},
+                format="json",
+                headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+            )
+            assert response.status_code == 204
+
+    mocked_dns_write.assert_called_once_with(fqdn, value)
+    mocked_dns_remove.assert_called_once_with(fqdn)
+    assert all(name.startswith("record-apply") for name in threads)
+    assert PushedRecord.objects.get(fqdn=fqdn).value == ""
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("async_views")
+def test_async_post_present_concurrently(
+    user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: route the present URL to the asynchronous view, bound the record operations to two
+        threads and make each DNS record write wait for another one.
+    act: submit concurrent POST requests for the present URL.
+    assert: all the records are written, two at a time.
+    """
+    running, peak = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(2, timeout=10)
+
+    def _write(*_) -> None:
+        """Write a record once another one is written, tracking the concurrent writes."""
+        with lock:
+            running.append(None)
+            peak.append(len(running))
+        barrier.wait()
+        time.sleep(0.1)
+        with lock:
+            running.pop()
+
+    async def _post_all() -> list:
+        """Submit the requests concurrently.
+
+        Returns:
+            the responses.
+        """
+        client = AsyncClient()
+        return await asyncio.gather(
+            *(
+                client.post(
+                    "/present",
+                    data={"fqdn": domain_user_permission.domain.fqdn, "value": f"value{i}"},
+                    headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+                )
+                for i in range(6)
+            )
+        )
+
+    # The in-memory SQLite test database locks its tables on concurrent writes.
+    with ThreadPoolExecutor(max_workers=2) as executor, patch(
+        "api.records._executor", executor
+    ), patch("api.records.record_applied"), patch(
+        "api.backends.repository.write_dns_record", side_effect=_write
+    ) as mocked_dns_write:
+        responses = async_to_sync(_post_all)()
+
+    assert [response.status_code for response in responses] == [204] * 6
+    assert mocked_dns_write.call_count == 6
+    assert max(peak) == 2
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("async_views")
+def test_async_post_present_when_async_returns_job(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: route the present URL to the asynchronous view, enable asynchronous record changes
+        and block the DNS record write.
+    act: submit a POST request for the present URL, then release the write and submit it again
+        waiting for the job.
+    assert: a 202 is returned with the queued job, then a 204 once the job is pushed.
+    """
+    released = threading.Event()
+    with patch("api.views.RECORD_CHANGES_ASYNC", True), patch(
+        "api.backends.repository.write_dns_record", side_effect=lambda *_: released.wait(30)
+    ):
+        value = secrets.token_hex()
+        response = client.post(
+            "/present",
+            data={"fqdn": domain_user_permission.domain.fqdn, "value": value},
+            format="json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+        assert response["Location"] == f"/api/v1/jobs/{job_id}/"
+        released.set()
+        response = client.post(
+            "/present?wait=30",
+            data={"fqdn": domain_user_permission.domain.fqdn, "value": value},
+            format="json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+        assert response.status_code == 204
+
+
+@pytest.mark.django_db
+def test_post_present_when_rate_limited(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: allow a single record change per second to each user.
+    act: submit two POST requests for the present URL.
+    assert: the second request is rejected with a 429 telling to retry after a second.
+    """
+    with patch("api.views.admission_controller", AdmissionController(1, 1, 0, 0, 60)), patch(
+        "api.backends.repository.write_dns_record"
+    ) as mocked_dns_write:
+        responses = [
+            client.post(
+                "/present",
+                data={"fqdn": domain_user_permission.domain.fqdn, "value": secrets.token_hex()},
+                format="json",
+                headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+            )
+            for _ in range(2)
+        ]
+
+    assert [response.status_code for response in responses] == [204, 429]
+    assert responses[1]["Retry-After"] == "1"
+    mocked_dns_write.assert_called_once()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_post_present_when_async_and_user_concurrency_exceeded(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: enable asynchronous record changes, allow a single pending change per user and
+        block the DNS record writes.
+    act: submit POST requests for the present URL while the first job is pending, then once it
+        completed.
+    assert: the second request is rejected with a 429 until the first job completed.
+    """
+    controller = AdmissionController(0, 1, 1, 0, 60)
+    released = threading.Event()
+    completed = threading.Event()
+    futures = []
+
+    def submit_job(*args):
+        job, future = jobs.submit_job(*args)
+        futures.append(future)
+        return job, future
+
+    with patch("api.views.RECORD_CHANGES_ASYNC", True), patch(
+        "api.views.admission_controller", controller
+    ), patch("api.views.submit_job", side_effect=submit_job), patch(
+        "api.backends.repository.write_dns_record", side_effect=lambda *_: released.wait(30)
+    ):
+
+        def _post() -> HttpResponse:
+            """Submit a POST request for the present URL.
+
+            Returns:
+                the response.
+            """
+            return client.post(
+                "/present",
+                data={"fqdn": domain_user_permission.domain.fqdn, "value": secrets.token_hex()},
+                format="json",
+                headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+            )
+
+        assert _post().status_code == 202
+        # Called after the callback of the view releasing the admission slot.
+        futures[0].add_done_callback(lambda _: completed.set())
+        response = _post()
+        assert response.status_code == 429
+        assert response["Retry-After"] == "60"
+        released.set()
+        assert completed.wait(30)
+        released.clear()
+        assert _post().status_code == 202
+        released.set()
+        assert futures[1].result(timeout=30) == RecordChangeJob.PUSHED
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("async_views")
+def test_async_post_present_when_pending_exceeded(
+    client: Client, user_auth_token: str, domain_user_permission: DomainUserPermission
+):
+    """
+    arrange: route the present URL to the asynchronous view and allow no pending change.
+    act: submit a POST request for the present URL.
+    assert: a 429 is returned without writing the record, and the rejection is counted.
+    """
+    rejections = (
+        REGISTRY.get_sample_value(
+            "httprequest_lego_provider_admission_rejections_total", {"reason": "pending"}
+        )
+        or 0
+    )
+    controller = AdmissionController(0, 1, 0, 1, 60)
+    controller.acquire(0)
+    with patch("api.views.admission_controller", controller), patch(
+        "api.backends.repository.write_dns_record"
+    ) as mocked_dns_write:
+        response = client.post(
+            "/present",
+            data={"fqdn": domain_user_permission.domain.fqdn, "value": secrets.token_hex()},
+            format="json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+
+    assert response.status_code == 429
+    assert response["Retry-After"] == "60"
+    mocked_dns_write.assert_not_called()
+    assert (
+        REGISTRY.get_sample_value(
+            "httprequest_lego_provider_admission_rejections_total", {"reason": "pending"}
+        )
+        == rejections + 1
+    )
+
+
+@pytest.mark.django_db
+def test_post_present_batch(
+    client: Client, user: User, user_auth_token: str, git_remote: Repo, git_repo_url: str
+):
+    """
+    arrange: log in a user allowed to manage two FQDNs, one of them with a record already pushed.
+    act: submit a POST request for the present batch URL, with the two FQDNs, an invalid FQDN,
+        a FQDN the user is not allowed to manage and a duplicate FQDN.
+    assert: the status of each entry is returned, the permissions are loaded in a single query
+        and the new record is pushed in a single commit.
+    """
+    fqdns = [f"{FQDN_PREFIX}site{index}.example.com" for index in range(2)]
+    for fqdn in fqdns:
+        DomainUserPermission.objects.create(domain=Domain.objects.create(fqdn=fqdn), user=user)
+    denied = Domain.objects.create(fqdn=f"{FQDN_PREFIX}denied.example.com")
+    PushedRecord.objects.create(fqdn=fqdns[1], value="pushed")
+    initial_commit = git_remote.commit("main")
+    entries = [
+        {"fqdn": fqdns[0], "value": "new"},
+        {"fqdn": fqdns[1], "value": "pushed"},
+        {"fqdn": "example.com", "value": "invalid"},
+        {"fqdn": denied.fqdn, "value": "denied"},
+        {"fqdn": fqdns[0], "value": "duplicate"},
+    ]
+
+    with patch("api.authorization._load_grants", wraps=_load_grants) as load_patch:
+        response = client.post(
+            "/present/batch",
+            data=entries,
+            content_type="application/json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["status"] for result in results] == [204, 204, 400, 403, 400]
+    assert results[2]["errors"]["fqdn"]
+    load_patch.assert_called_once()
+    commit = git_remote.commit("main")
+    assert commit.parents == (initial_commit,)
+    assert "site0 600 IN TXT \042new\042" in (
+        commit.tree / "example.com.domain"
+    ).data_stream.read().decode("utf-8")
+    assert PushedRecord.objects.get(fqdn=fqdns[0]).value == "new"
+
+
+@pytest.mark.django_db
+def test_post_cleanup_batch_when_push_fails(
+    client: Client, user_auth_token: str, domain_user_permissions: list[DomainUserPermission]
+):
+    """
+    arrange: log in a user allowed to manage several FQDNs with pushed records, and make the
+        records removal fail.
+    act: submit a POST request for the cleanup batch URL with the FQDNs.
+    assert: the failure is reported for each entry and the pushed values are forgotten.
+    """
+    fqdns = [permission.domain.fqdn for permission in domain_user_permissions]
+    for fqdn in fqdns:
+        PushedRecord.objects.create(fqdn=fqdn, value=secrets.token_hex())
+
+    def push_dns_record_changes(changes):
+        for change in changes:
+            change.resolve(DnsSourceUpdateError("push rejected"))
+
+    with patch(
+        "api.backends.repository.push_dns_record_changes", side_effect=push_dns_record_changes
+    ) as mocked_apply:
+        response = client.post(
+            "/cleanup/batch",
+            data=[{"fqdn": fqdn, "value": secrets.token_hex()} for fqdn in fqdns],
+            content_type="application/json",
+            headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+        )
+
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()] == [500] * len(fqdns)
+    mocked_apply.assert_called_once()
+    assert [change.fqdn for change in mocked_apply.call_args.args[0]] == fqdns
+    assert not PushedRecord.objects.exists()
+
+
+@pytest.mark.django_db
+def test_post_present_batch_when_one_repository_fails(
+    client: Client,
+    user: User,
+    user_auth_token: str,
+    git_remote: Repo,
+    git_repo_url: str,
+    tmp_path: Path,
+):
+    """
+    arrange: log in a user allowed to manage a FQDN of a zone in the default repository and a
+        FQDN of a zone in a missing repository, both with a record already pushed.
+    act: submit a POST request for the present batch URL with the two FQDNs.
+    assert: the record of the default repository is pushed and reported as such, only the
+        other one is reported as failed and has its pushed value forgotten.
+    """
+    Zone.objects.create(name="example.com")
+    Zone.objects.create(
+        name="other.com", repository=f"file://user@localhost{tmp_path}/missing.git@main"
+    )
+    fqdns = [f"{FQDN_PREFIX}site.example.com", f"{FQDN_PREFIX}site.other.com"]
+    for fqdn in fqdns:
+        DomainUserPermission.objects.create(domain=Domain.objects.create(fqdn=fqdn), user=user)
+        PushedRecord.objects.create(fqdn=fqdn, value="pushed")
+
+    response = client.post(
+        "/present/batch",
+        data=[{"fqdn": fqdn, "value": "new"} for fqdn in fqdns],
+        content_type="application/json",
+        headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+    )
+
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()] == [204, 500]
+    assert "site 600 IN TXT \042new\042" in (
+        git_remote.commit("main").tree / "example.com.domain"
+    ).data_stream.read().decode("utf-8")
+    assert PushedRecord.objects.get(fqdn=fqdns[0]).value == "new"
+    assert not PushedRecord.objects.filter(fqdn=fqdns[1]).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("data", [[], {"fqdn": "example.com"}, [{}] * 101])
+def test_post_present_batch_when_content_invalid(
+    client: Client, user_auth_token: str, data: list | dict
+):
+    """
+    arrange: log in a user.
+    act: submit a POST request for the present batch URL with an empty list, an object or too
+        many entries.
+    assert: a 400 is returned.
+    """
+    response = client.post(
+        "/present/batch",
+        data=data,
+        content_type="application/json",
+        headers={"AUTHORIZATION": f"Basic {user_auth_token}"},
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/v1/zones/",
+        "/api/v1/domains/",
+        "/api/v1/domain-user-permissions/",
+        "/api/v1/users/",
+        "/api/v1/jobs/",
+    ],
+)
+def test_list_query_budget(
+    client: Client, admin_user: User, admin_user_auth_token: str, query_budget, url: str
+):
+    """
+    arrange: log in an admin user, given many users in groups, with domains in zones and jobs.
+    act: submit a GET request for the list URL.
+    assert: the number of queries does not depend on the number of objects listed.
+    """
+    group = Group.objects.create(name="lego")
+    for index in range(10):
+        Zone.objects.create(name=f"example{index}.com")
+        domain = Domain.objects.create(fqdn=f"{FQDN_PREFIX}www.example{index}.com")
+        user = User.objects.create_user(f"user{index}", password="password")  # nosec
+        user.groups.add(group)
+        DomainUserPermission.objects.create(domain=domain, user=user)
+        RecordChangeJob.objects.create(
+            user=admin_user, fqdn=domain.fqdn, value="value", action="present"
+        )
+
+    # Authentication, session and a query per related field at most.
+    with query_budget(4):
+        response = client.get(url, headers={"AUTHORIZATION": f"Basic {admin_user_auth_token}"})
+
+    assert response.status_code == 200
+    assert len(response.json()["results"]) >= 10
@@ -0,0 +1,413 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the writer module."""
+
+import secrets
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from api.mirror import BareRepositoryMirror, RepositoryMirror
+from api.writer import BareRecordWriter, PushRejectedError, RecordChange, RecordWriter
+from git import Remote, Repo
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+
+def _read_remote_zone(git_remote: Repo) -> str:
+    """Read the example.com zone file from the tip of the remote branch.
+
+    Args:
+        git_remote: the remote repository.
+
+    Returns:
+        the zone file content.
+    """
+    blob = git_remote.commit("main").tree / "example.com.domain"
+    return blob.data_stream.read().decode("utf-8")
+
+
+def _writer(git_remote: Repo, tmp_path: Path, window: float) -> RecordWriter:
+    """Build a writer for the remote repository.
+
+    Args:
+        git_remote: the remote repository.
+        tmp_path: directory where to create the mirror.
+        window: the batching window in seconds.
+
+    Returns:
+        the writer.
+    """
+    mirror = RepositoryMirror(git_remote.git_dir, "main", tmp_path / "mirror", "user")
+    return RecordWriter(mirror, window)
+
+
+def _push_after_other_writer(git_remote: Repo, tmp_path: Path, times: int):
+    """Build a replacement for Remote.push letting another writer push first.
+
+    Args:
+        git_remote: the remote repository.
+        tmp_path: directory where to create the other writer clone.
+        times: number of pushes to precede with a push from the other writer.
+
+    Returns:
+        the replacement for Remote.push.
+    """
+    other = Repo.clone_from(git_remote.git_dir, tmp_path / "other", branch="main")
+    original_push = Remote.push
+    calls = []
+
+    def push(remote: Remote, *args, **kwargs):
+        """Push a commit from the other writer, then push the remote.
+
+        Args:
+            remote: the remote to push to.
+            args: positional arguments for Remote.push.
+            kwargs: keyword arguments for Remote.push.
+
+        Returns:
+            the result of Remote.push.
+        """
+        calls.append(remote)
+        if len(calls) <= times:
+            Path(other.working_tree_dir, f"other{len(calls)}.com.domain").touch()
+            other.git.add("--all")
+            other.git.commit("-m", "Other writer change")
+            other.git.push("origin", "main")
+        return original_push(remote, *args, **kwargs)
+
+    return push
+
+
+def test_writer_pushes_pending_changes_in_one_commit(
+    git_remote: Repo, tmp_path: Path, zone_content: str
+):
+    """
+    arrange: given a writer with a batching window.
+    act: submit several record changes within the window.
+    assert: all the changes are pushed in a single commit.
+    """
+    writer = _writer(git_remote, tmp_path, 0.5)
+    initial_commit = git_remote.commit("main")
+    tokens = [secrets.token_hex() for _ in range(3)]
+    changes = [
+        RecordChange(f"site{index}.example.com", token) for index, token in enumerate(tokens)
+    ] + [RecordChange("site3.example.com")]
+
+    for change in changes:
+        writer.submit(change)
+    for change in changes:
+        assert change.wait(30)
+        assert change.error is None
+
+    commit = git_remote.commit("main")
+    assert commit.parents == (initial_commit,)
+    assert commit.message.startswith("Update 4 records")
+    assert _read_remote_zone(git_remote) == (
+        "sïte1 600 IN TXT \042sometoken\042\n"
+        f"site0 600 IN TXT \042{tokens[0]}\042\n"
+        f"site1 600 IN TXT \042{tokens[1]}\042\n"
+        f"site2 600 IN TXT \042{tokens[2]}\042\n"
+    )
+
+
+def test_writer_submit_all_pushes_changes_in_one_commit(git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a writer without batching window.
+    act: submit several record changes together.
+    assert: all the changes are pushed in a single commit.
+    """
+    writer = _writer(git_remote, tmp_path, 0)
+    initial_commit = git_remote.commit("main")
+    changes = [RecordChange(f"site{index}.example.com", secrets.token_hex()) for index in range(5)]
+
+    writer.submit_all(changes)
+    for change in changes:
+        assert change.wait(30)
+        assert change.error is None
+
+    commit = git_remote.commit("main")
+    assert commit.parents == (initial_commit,)
+    assert commit.message.startswith("Update 5 records")
+
+
+def test_writer_cancels_present_and_cleanup(git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a writer with a batching window.
+    act: submit the addition and the removal of the same record within the window.
+    assert: the addition is cancelled without waiting for the push, and as the record did not
+        exist, nothing is pushed.
+    """
+    writer = _writer(git_remote, tmp_path, 0.5)
+    initial_commit = git_remote.commit("main")
+    present = RecordChange("site.example.com", secrets.token_hex())
+    cleanup = RecordChange("site.example.com")
+
+    writer.submit(present)
+    writer.submit(cleanup)
+
+    assert present.wait(0)
+    assert present.cancelled and present.error is None
+    assert cleanup.wait(30)
+    assert not cleanup.cancelled and cleanup.error is None
+    assert git_remote.commit("main") == initial_commit
+
+
+def test_writer_cancels_present_and_removes_existing_record(git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a writer with a batching window, and a record with a value in the zone.
+    act: submit the addition of a new value and the removal of the record within the window.
+    assert: the addition is cancelled, and the existing value is removed.
+    """
+    writer = _writer(git_remote, tmp_path, 0.5)
+    present = RecordChange("site2.example.com", secrets.token_hex())
+    cleanup = RecordChange("site2.example.com")
+
+    writer.submit(present)
+    writer.submit(cleanup)
+
+    assert present.wait(0) and present.cancelled
+    assert cleanup.wait(30)
+    assert cleanup.error is None
+    zone = _read_remote_zone(git_remote)
+    assert "site2 " not in zone
+    assert present.value not in zone
+
+
+def test_writer_supersedes_cleanup_by_later_present(git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a writer with a batching window, and a record with a value in the zone.
+    act: submit the removal of the record and the addition of a new value within the window.
+    assert: the removal is flagged as superseded, and only the new value is left in the zone.
+    """
+    writer = _writer(git_remote, tmp_path, 0.5)
+    cleanup = RecordChange("site2.example.com")
+    present = RecordChange("site2.example.com", secrets.token_hex())
+
+    writer.submit(cleanup)
+    writer.submit(present)
+
+    assert present.wait(30) and cleanup.wait(30)
+    assert cleanup.cancelled and cleanup.error is None
+    assert not present.cancelled and present.error is None
+    zone = _read_remote_zone(git_remote)
+    assert f"site2 600 IN TXT \042{present.value}\042" in zone
+    assert zone.count("site2 ") == 1
+
+
+def test_writer_skips_commit_without_changes(git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a writer.
+    act: submit the removal of a record not present in the zone file.
+    assert: the change succeeds and nothing is pushed.
+    """
+    writer = _writer(git_remote, tmp_path, 0)
+    initial_commit = git_remote.commit("main")
+    cleanup = RecordChange("missing.example.com")
+
+    writer.submit(cleanup)
+
+    assert cleanup.wait(30)
+    assert cleanup.error is None
+    assert git_remote.commit("main") == initial_commit
+
+
+def test_writer_reports_errors(tmp_path: Path):
+    """
+    arrange: given a writer for a non existing repository.
+    act: submit a record change.
+    assert: the change is resolved with an error.
+    """
+    mirror = RepositoryMirror(str(tmp_path / "missing.git"), None, tmp_path / "mirror", "user")
+    writer = RecordWriter(mirror, 0)
+    change = RecordChange("site.example.com", secrets.token_hex())
+
+    writer.submit(change)
+
+    assert change.wait(30)
+    assert change.error is not None
+
+
+def test_writer_retries_rejected_push(git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a writer and another writer pushing to the same branch before it twice.
+    act: submit a record change.
+    assert: the change is applied on top of the other writer commits after two retries.
+    """
+    writer = RecordWriter(
+        RepositoryMirror(git_remote.git_dir, "main", tmp_path / "mirror", "user"), 0, 5, 0
+    )
+    token = secrets.token_hex()
+    change = RecordChange("site.example.com", token)
+
+    with patch.object(Remote, "push", _push_after_other_writer(git_remote, tmp_path, 2)):
+        writer.submit(change)
+        assert change.wait(30)
+
+    assert change.error is None
+    assert change.retries == 2
+    commit = git_remote.commit("main")
+    assert commit.parents[0].message.strip() == "Other writer change"
+    assert f"site 600 IN TXT \042{token}\042\n" in _read_remote_zone(git_remote)
+
+
+def test_writer_gives_up_after_retries(git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a writer and another writer always pushing to the same branch before it.
+    act: submit a record change.
+    assert: the change is resolved with an error once the retries are exhausted.
+    """
+    writer = RecordWriter(
+        RepositoryMirror(git_remote.git_dir, "main", tmp_path / "mirror", "user"), 0, 2, 0
+    )
+    change = RecordChange("site.example.com", secrets.token_hex())
+
+    with patch.object(Remote, "push", _push_after_other_writer(git_remote, tmp_path, 10)):
+        writer.submit(change)
+        assert change.wait(30)
+
+    assert isinstance(change.error, PushRejectedError)
+    assert change.retries == 2
+    assert git_remote.commit("main").message.strip() == "Other writer change"
+
+
+def test_writer_holds_zone_lock(git_remote: Repo, tmp_path: Path):
+    """
+    arrange: given a writer with a zone lock.
+    act: submit a record change.
+    assert: the lock of the zone file is held while the change is pushed.
+    """
+    locked = []
+
+    @contextmanager
+    def lock(filenames):
+        """Record the locked zone files and whether the push happened while locked.
+
+        Args:
+            filenames: the zone filenames to lock.
+
+        Yields:
+            once locked.
+        """
+        commit = git_remote.commit("main")
+        yield
+        locked.append((list(filenames), git_remote.commit("main") != commit))
+
+    writer = RecordWriter(
+        RepositoryMirror(git_remote.git_dir, "main", tmp_path / "mirror", "user"), 0, lock=lock
+    )
+    change = RecordChange("site.example.com", secrets.token_hex())
+
+    writer.submit(change)
+
+    assert change.wait(30)
+    assert change.error is None
+    assert locked == [(["example.com.domain"], True)]
+
+
+def test_bare_writer_commits_without_working_tree(
+    git_remote: Repo, tmp_path: Path, zone_content: str
+):
+    """
+    arrange: given a writer for a bare mirror and another writer pushing to the same branch first.
+    act: submit record changes, then a change leaving the zone file as is.
+    assert: the changes are pushed on top of the other writer commit, without working tree nor
+        index, and no commit is pushed for the last change.
+    """
+    writer = BareRecordWriter(
+        BareRepositoryMirror(git_remote.git_dir, "main", tmp_path / "mirror", "user"), 0, 5, 0
+    )
+    token = secrets.token_hex()
+    changes = [RecordChange("site.example.com", token), RecordChange("site3.example.com")]
+
+    with patch.object(Remote, "push", _push_after_other_writer(git_remote, tmp_path, 1)):
+        writer.submit(changes[0])
+        writer.submit(changes[1])
+        for change in changes:
+            assert change.wait(30)
+            assert change.error is None
+    commit = git_remote.commit("main")
+    cleanup = RecordChange("site3.example.com")
+    writer.submit(cleanup)
+    assert cleanup.wait(30)
+
+    assert changes[0].retries == 1
+    assert commit.parents[0].message.strip() == "Other writer change"
+    assert git_remote.commit("main") == commit
+    assert _read_remote_zone(git_remote) == (
+        zone_content.replace("site3 600 IN TXT \042sometoken\042\n", "")
+        + f"site 600 IN TXT \042{token}\042\n"
+    )
+    mirror = Repo(tmp_path / "mirror")
+    assert mirror.bare
+    assert not Path(mirror.git_dir, "index").exists()
+
+
+@pytest.mark.parametrize(
+    "writer_class,mirror_class",
+    [(RecordWriter, RepositoryMirror), (BareRecordWriter, BareRepositoryMirror)],
+)
+def test_writer_streams_large_zone_files(
+    git_remote: Repo, tmp_path: Path, zone_content: str, writer_class: type, mirror_class: type
+):
+    """
+    arrange: given a writer and a streaming threshold below the zone file size.
+    act: submit record changes.
+    assert: the zone file is rewritten line by line without being parsed, with the changes.
+    """
+    writer = writer_class(mirror_class(git_remote.git_dir, "main", tmp_path / "mirror", "user"), 0)
+    token = secrets.token_hex()
+    changes = [RecordChange("site.example.com", token), RecordChange("site3.example.com")]
+
+    with patch("api.zone.ZONE_STREAMING_THRESHOLD", 0), patch(
+        "api.writer.ZONE_STREAMING_THRESHOLD", 0
+    ), patch("api.writer.ZoneFile") as zone_file_patch, patch(
+        "api.zone.ZoneFile"
+    ) as zone_module_patch:
+        for change in changes:
+            writer.submit(change)
+        for change in changes:
+            assert change.wait(30)
+            assert change.error is None
+
+    zone_file_patch.assert_not_called()
+    zone_module_patch.assert_not_called()
+    assert _read_remote_zone(git_remote) == (
+        zone_content.replace("site3 600 IN TXT \042sometoken\042\n", "")
+        + f"site 600 IN TXT \042{token}\042\n"
+    )
+
+
+@pytest.mark.parametrize(
+    "writer_class,mirror_class",
+    [(RecordWriter, RepositoryMirror), (BareRecordWriter, BareRepositoryMirror)],
+)
+def test_writer_traces_batches(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    git_remote: Repo,
+    tmp_path: Path,
+    span_exporter: InMemorySpanExporter,
+    writer_class: type,
+    mirror_class: type,
+):
+    """
+    arrange: given a writer and a span recording the requests.
+    act: submit record changes from within the request span.
+    assert: the batch span links to the request span and has a child span per git operation,
+        with the zone and the amount of data transferred.
+    """
+    writer = writer_class(mirror_class(git_remote.git_dir, "main", tmp_path / "mirror", "user"), 0)
+    with trace.get_tracer(__name__).start_as_current_span("request") as request_span:
+        change = RecordChange("site.example.com", secrets.token_hex())
+        writer.submit(change)
+        assert change.wait(30)
+        assert change.error is None
+
+    spans = {span.name: span for span in span_exporter.get_finished_spans()}
+    batch = spans["push_batch"]
+    assert [link.context for link in batch.links] == [request_span.get_span_context()]
+    for name in ("lock", "sync", "edit", "commit", "push"):
+        assert spans[name].parent.span_id == batch.context.span_id
+        assert spans[name].attributes["zone"] == "example.com"
+    assert spans["sync"].attributes["git.received_bytes"] > 0
+    assert spans["push"].attributes["git.pushed_bytes"] > 0
@@ -0,0 +1,206 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Unit tests for the zone module."""
+
+import io
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from api.zone import (
+    ZoneFile,
+    ZoneTrie,
+    get_blob_sha,
+    get_domain_and_subdomain_from_fqdn,
+    load_zone_file,
+    read_zone_stream_txt_values,
+    rewrite_zone_file,
+    store_zone_file,
+)
+from git import Repo
+
+ZONE_CONTENT = (
+    "; ACME challenges\n"
+    "site1 600 IN TXT \042token1\042\n"
+    "\n"
+    "site2   600 IN TXT \042token2\042 ; site2 comment\n"
+    "site1 600 IN TXT \042token3\042\n"
+    "; site2 600 IN TXT \042commented\042\n"
+    "site3 600 IN TXT \042token4\042"
+)
+
+
+def test_zone_file_preserves_content():
+    """
+    arrange: given a zone file content with comments and irregular spacing.
+    act: parse and render the zone file.
+    assert: the content is preserved, with a trailing new line added.
+    """
+    assert ZoneFile(ZONE_CONTENT).render() == f"{ZONE_CONTENT}\n"
+
+
+def test_zone_file_edits():
+    """
+    arrange: given a parsed zone file.
+    act: remove the records of some owners and add new records.
+    assert: only the records of the owners are removed, comments are kept and the new records
+        are appended.
+    """
+    zone_file = ZoneFile(ZONE_CONTENT)
+
+    zone_file.remove(["site1", "site2", "missing"])
+    zone_file.add("site2", "new2")
+    zone_file.remove(["site3"])
+    zone_file.add("site4", "new4")
+    zone_file.remove(["site4"])
+
+    assert zone_file.render() == (
+        "; ACME challenges\n"
+        "\n"
+        "; site2 600 IN TXT \042commented\042\n"
+        "site2 600 IN TXT \042new2\042\n"
+    )
+
+
+def test_zone_file_repeated_edits_keep_size():
+    """
+    arrange: given a parsed zone file.
+    act: add then remove the record of an owner many times, rendering the zone after each change
+        as when it is stored.
+    assert: the number of lines kept does not grow, and the records are still indexed.
+    """
+    zone_file = ZoneFile(ZONE_CONTENT)
+    zone_file.add("site4", "new4")
+    zone_file.render()
+    size = len(zone_file._lines)  # pylint: disable=protected-access
+
+    for index in range(100):
+        zone_file.remove(["site4"])
+        zone_file.render()
+        zone_file.add("site4", f"new{index}")
+        zone_file.render()
+
+    assert len(zone_file._lines) == size  # pylint: disable=protected-access
+    assert zone_file.get_txt_values("site1") == ["token1", "token3"]
+    assert zone_file.get_txt_values("site4") == ["new99"]
+
+
+def test_get_blob_sha(tmp_path: Path):
+    """
+    arrange: given a file.
+    act: compute the blob SHA of its content.
+    assert: the SHA matches the one computed by git.
+    """
+    Path(tmp_path, "zone").write_text(ZONE_CONTENT, encoding="utf-8")
+    repo = Repo.init(tmp_path)
+
+    assert get_blob_sha(ZONE_CONTENT.encode("utf-8")) == repo.git.hash_object("zone")
+
+
+def test_load_zone_file_from_cache(tmp_path: Path):
+    """
+    arrange: given a stored zone file.
+    act: load the zone file with its blob SHA, then load it again.
+    assert: the first load reuses the cached parse without reading the file, the second one
+        parses the file again.
+    """
+    path = Path(tmp_path, "example.com.domain")
+    zone_file = ZoneFile(ZONE_CONTENT)
+    zone_file.add("site5", "token5")
+    store_zone_file(path, zone_file)
+    blob_sha = get_blob_sha(path.read_bytes())
+
+    with patch.object(Path, "read_text") as read_patch:
+        assert load_zone_file(path, blob_sha) is zone_file
+    read_patch.assert_not_called()
+    assert load_zone_file(path, blob_sha) is not zone_file
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_rewrite_zone_file(tmp_path: Path, chunk_size: int):
+    """
+    arrange: given a zone file.
+    act: rewrite the zone file line by line, reading it in chunks of different sizes.
+    assert: the content matches the edit of the parsed zone file, the file mode is kept and no
+        temporary file is left behind.
+    """
+    path = Path(tmp_path, "example.com.domain")
+    path.write_text(ZONE_CONTENT, encoding="utf-8")
+    path.chmod(0o644)
+    zone_file = ZoneFile(ZONE_CONTENT)
+    zone_file.remove(["site1", "site2", "site3"])
+    zone_file.add("site2", "new2")
+
+    with patch("api.zone.STREAM_CHUNK_SIZE", chunk_size):
+        rewrite_zone_file(path, {"site1": None, "site2": "new2", "site3": None})
+
+    assert path.read_text(encoding="utf-8") == zone_file.render()
+    assert path.stat().st_mode & 0o777 == 0o644
+    assert os.listdir(tmp_path) == ["example.com.domain"]
+
+
+def test_load_zone_file_above_streaming_threshold(tmp_path: Path):
+    """
+    arrange: given a zone file larger than the streaming threshold.
+    act: load the zone file.
+    assert: the zone file is not parsed.
+    """
+    path = Path(tmp_path, "example.com.domain")
+    path.write_text(ZONE_CONTENT, encoding="utf-8")
+
+    with patch("api.zone.ZONE_STREAMING_THRESHOLD", len(ZONE_CONTENT) - 1):
+        assert load_zone_file(path) is None
+
+
+def test_read_zone_stream_txt_values():
+    """
+    arrange: given a zone file content with comments and irregular spacing.
+    act: read the TXT values of some owners from the content, a few bytes at a time.
+    assert: the values match the ones of the parsed zone file.
+    """
+    owners = ["site1", "site2", "site4"]
+
+    with patch("api.zone.STREAM_CHUNK_SIZE", 7):
+        values = read_zone_stream_txt_values(io.BytesIO(ZONE_CONTENT.encode("utf-8")).read, owners)
+
+    zone_file = ZoneFile(ZONE_CONTENT)
+    assert values == {owner: zone_file.get_txt_values(owner) for owner in owners}
+    assert values == {"site1": ["token1", "token3"], "site2": ["token2"], "site4": []}
+
+
+def test_zone_trie():
+    """
+    arrange: given a trie with a zone under a public suffix and a delegated subzone.
+    act: find the zones of FQDNs, then remove the subzone.
+    assert: the longest registered zone is found, and none for the FQDNs outside the zones.
+    """
+    trie = ZoneTrie(["example.co.uk", "example.com", "sub.example.com"])
+
+    assert trie.find("_acme-challenge.site.example.co.uk") == "example.co.uk"
+    assert trie.find("_acme-challenge.site.sub.example.com.") == "sub.example.com"
+    assert trie.find("_acme-challenge.Sub.Example.com") == "sub.example.com"
+    assert trie.find("_acme-challenge.example.com") == "example.com"
+    assert trie.find("co.uk") is None
+    assert trie.find("example.org") is None
+    trie.remove("sub.example.com")
+    assert trie.find("_acme-challenge.site.sub.example.com") == "example.com"
+
+
+@pytest.mark.parametrize(
+    "fqdn,expected",
+    [
+        ("_acme-challenge.site.example.co.uk", ("example.co.uk", "_acme-challenge.site")),
+        ("_acme-challenge.sub.example.com", ("sub.example.com", "_acme-challenge")),
+        ("sub.example.com", ("sub.example.com", ".")),
+        ("_acme-challenge.example.org", ("example.org", "_acme-challenge")),
+    ],
+)
+def test_get_domain_and_subdomain_from_registered_zone(fqdn: str, expected: tuple[str, str]):
+    """
+    arrange: given registered zones.
+    act: get the domain and subdomain of a FQDN.
+    assert: the domain is the longest registered zone, or the last two labels if there is none.
+    """
+    with patch("api.zone.zone_trie", ZoneTrie(["example.co.uk", "sub.example.com"])):
+        assert get_domain_and_subdomain_from_fqdn(fqdn) == expected
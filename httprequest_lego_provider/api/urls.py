@@ -6,15 +6,27 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from . import views
+from .settings import ASYNC_RECORD_VIEWS
 
 router = DefaultRouter()
+router.register("zones", views.ZoneViewSet)
 router.register("domains", views.DomainViewSet)
 router.register("domain-user-permissions", views.DomainUserPermissionViewSet)
 router.register("users", views.UserViewSet)
+router.register("jobs", views.RecordChangeJobViewSet)
+
+# The asynchronous views only spare the workers when served by an ASGI server.
+if ASYNC_RECORD_VIEWS:
+    handle_cleanup, handle_present = views.ahandle_cleanup, views.ahandle_present
+else:
+    handle_cleanup, handle_present = views.handle_cleanup, views.handle_present
 
 urlpatterns = [
-    path("cleanup", views.handle_cleanup, name="cleanup"),
-    path("present", views.handle_present, name="present"),
+    path("cleanup", handle_cleanup, name="cleanup"),
+    path("cleanup/batch", views.handle_cleanup_batch, name="cleanup-batch"),
+    path("present", handle_present, name="present"),
+    path("present/batch", views.handle_present_batch, name="present-batch"),
+    path("metrics", views.metrics, name="metrics"),
     path("api/v1/accounts/", include("django.contrib.auth.urls")),
     path("api/v1/", include(router.urls)),
 ]
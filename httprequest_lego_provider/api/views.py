@@ -5,20 +5,558 @@
 # Disable too-many-ancestors rule since we can't control inheritance for the ViewSets.
 # pylint:disable=too-many-ancestors
 
-from typing import Optional
+import asyncio
+import ipaddress
+from concurrent import futures
+from typing import Dict, List, Optional, Tuple, Type
+
+from asgiref.sync import sync_to_async
 
 # imported-auth-user has to be disabled as the import is needed for UserViewSet
 # pylint:disable=imported-auth-user
 from django.contrib.auth.models import User
-from django.http import HttpRequest, HttpResponse
+from django.forms import Form
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from rest_framework import viewsets
 from rest_framework.decorators import api_view
 from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
+from rest_framework.views import APIView
 
-from .dns import remove_dns_record, write_dns_record
+from .admission import AdmissionRejected, AdmissionSlot, admission_controller
+from .authorization import DomainGrant, authorization_index
 from .forms import FQDN_PREFIX, CleanupForm, PresentForm
-from .models import Domain, DomainUserPermission
-from .serializers import DomainSerializer, DomainUserPermissionSerializer, UserSerializer
+from .jobs import submit_job
+from .metrics import (
+    MULTIPLE_ZONES,
+    RECORD_CHANGES,
+    UNKNOWN_ZONE,
+    observe_phase,
+    render_metrics,
+)
+from .models import Domain, DomainUserPermission, RecordChangeJob, Zone
+from .pagination import CreatedAtCursorPagination, DateJoinedCursorPagination
+from .records import (
+    apply_record_change,
+    apply_record_changes,
+    get_applied_records,
+    is_record_applied,
+    run_record_operation,
+)
+from .serializers import (
+    DomainSerializer,
+    DomainUserPermissionSerializer,
+    RecordChangeJobSerializer,
+    UserSerializer,
+    ZoneSerializer,
+)
+from .settings import (
+    METRICS_ALLOWED_NETWORKS,
+    RECORD_BATCH_MAX_SIZE,
+    RECORD_CHANGES_ASYNC,
+    RECORD_JOB_WAIT,
+)
+from .writer import RecordChange
+
+_RESPONSE_OUTCOMES = {202: "queued", 204: "success", 400: "invalid"}
+WAIT_INVALID = "The wait parameter must be a number of seconds"
+METRICS_NETWORKS = [
+    ipaddress.ip_network(network.strip())
+    for network in METRICS_ALLOWED_NETWORKS.split(",")
+    if network.strip()
+]
+FORWARDED_HEADERS = ("Forwarded", "X-Forwarded-For", "X-Real-IP")
+
+
+def _get_wait(request: Request) -> float | None:
+    """Get the time to wait for a record change job, from the `wait` query parameter.
+
+    Args:
+        request: the HTTP request.
+
+    Returns:
+        the time to wait in seconds, or None if the parameter is invalid.
+    """
+    try:
+        return max(float(request.query_params.get("wait", RECORD_JOB_WAIT)), 0)
+    except ValueError:
+        return None
+
+
+def _get_job_response(job: RecordChangeJob, status: str | None, fqdn: str) -> HttpResponse:
+    """Build the response to a record change job.
+
+    Args:
+        job: the job.
+        status: the final status of the job, or None if it is still running.
+        fqdn: the FQDN of the record.
+
+    Returns:
+        an HTTP response.
+    """
+    if status is None:
+        response = JsonResponse({"id": str(job.id), "status": job.status}, status=202)
+        response["Location"] = reverse("recordchangejob-detail", args=[job.id])
+        return response
+    if status == RecordChangeJob.PUSHED:
+        return HttpResponse(status=204)
+    return HttpResponse(status=500, content=f"Failed to update the DNS records for {fqdn}")
+
+
+def _submit_record_change_job(
+    request: Request, domain: DomainGrant, value: str, action: str, slot: AdmissionSlot
+) -> HttpResponse:
+    """Submit a record change job and wait for it up to the time requested.
+
+    The time to wait, in seconds, is read from the `wait` query parameter.
+
+    Args:
+        request: the HTTP request.
+        domain: the domain of the record, as granted to the user.
+        value: the ACME challenge of the record.
+        action: whether to add or remove the record.
+        slot: the admission slot of the change, released once the job completes.
+
+    Returns:
+        an HTTP response.
+    """
+    wait = _get_wait(request)
+    if wait is None:
+        slot.release()
+        return HttpResponse(status=400, content=WAIT_INVALID)
+    job, future = submit_job(request.user, domain, value, action)
+    future.add_done_callback(lambda _: slot.release())
+    try:
+        status = future.result(timeout=wait)
+    except futures.TimeoutError:
+        status = None
+    return _get_job_response(job, status, domain.fqdn)
+
+
+async def _asubmit_record_change_job(
+    request: Request, domain: DomainGrant, value: str, action: str, slot: AdmissionSlot
+) -> HttpResponse:
+    """Submit a record change job and wait for it up to the time requested, asynchronously.
+
+    Args:
+        request: the HTTP request.
+        domain: the domain of the record, as granted to the user.
+        value: the ACME challenge of the record.
+        action: whether to add or remove the record.
+        slot: the admission slot of the change, released once the job completes.
+
+    Returns:
+        an HTTP response.
+    """
+    wait = _get_wait(request)
+    if wait is None:
+        slot.release()
+        return HttpResponse(status=400, content=WAIT_INVALID)
+    job, future = await sync_to_async(submit_job)(request.user, domain, value, action)
+    future.add_done_callback(lambda _: slot.release())
+    # asyncio.wait does not cancel the job on timeout, unlike asyncio.wait_for.
+    done, _ = await asyncio.wait({asyncio.wrap_future(future)}, timeout=wait)
+    return _get_job_response(job, done.pop().result() if done else None, domain.fqdn)
+
+
+def _get_denied_response(user: User, fqdn: str, action: str) -> HttpResponse:
+    """Count a record change denied to a user and build the response.
+
+    Args:
+        user: the user.
+        fqdn: the FQDN of the record.
+        action: whether to add or remove the record.
+
+    Returns:
+        an HTTP response.
+    """
+    RECORD_CHANGES.labels(action=action, zone=UNKNOWN_ZONE, outcome="denied").inc()
+    return HttpResponse(
+        status=403,
+        content=f"The user {user} does not have permission to manage {fqdn}",
+    )
+
+
+def _apply_record_change(
+    request: Request, domain: DomainGrant, value: str, action: str, slot: AdmissionSlot
+) -> HttpResponse:
+    """Apply an admitted record change, or submit it as a job if the changes are asynchronous.
+
+    Args:
+        request: the HTTP request.
+        domain: the domain of the record, as granted to the user.
+        value: the ACME challenge of the record.
+        action: whether to add or remove the record.
+        slot: the admission slot of the change, released once the change is applied.
+
+    Returns:
+        an HTTP response.
+    """
+    if RECORD_CHANGES_ASYNC:
+        return _submit_record_change_job(request, domain, value, action, slot)
+    with slot:
+        apply_record_change(
+            domain.fqdn, domain.backend, value if action == RecordChangeJob.PRESENT else None
+        )
+    return HttpResponse(status=204)
+
+
+async def _aapply_record_change(
+    request: Request, domain: DomainGrant, value: str, action: str, slot: AdmissionSlot
+) -> HttpResponse:
+    """Apply an admitted record change on the bounded pool of threads, or submit it as a job.
+
+    Args:
+        request: the HTTP request.
+        domain: the domain of the record, as granted to the user.
+        value: the ACME challenge of the record.
+        action: whether to add or remove the record.
+        slot: the admission slot of the change, released once the change is applied.
+
+    Returns:
+        an HTTP response.
+    """
+    if RECORD_CHANGES_ASYNC:
+        return await _asubmit_record_change_job(request, domain, value, action, slot)
+    with slot:
+        await run_record_operation(
+            apply_record_change,
+            domain.fqdn,
+            domain.backend,
+            value if action == RecordChangeJob.PRESENT else None,
+        )
+    return HttpResponse(status=204)
+
+
+def _get_throttled_response(exc: AdmissionRejected, action: str, zone: str) -> HttpResponse:
+    """Count a record change rejected by the admission control and build the response.
+
+    Args:
+        exc: the rejection.
+        action: whether to add or remove the record.
+        zone: the zone of the record, if known.
+
+    Returns:
+        an HTTP response telling the client when to retry.
+    """
+    RECORD_CHANGES.labels(action=action, zone=zone, outcome="throttled").inc()
+    response = HttpResponse(status=429, content=str(exc))
+    response["Retry-After"] = str(exc.retry_after)
+    return response
+
+
+def _handle_record_change(request: Request, fqdn: str, value: str, action: str) -> HttpResponse:
+    """Apply a record change requested by a user allowed to manage the FQDN.
+
+    The requests of the user are rate limited, and the change is only applied if the user and
+    all the users have few enough pending changes. The permissions are read from the
+    authorization index, without querying the database when cached. The duration of the
+    authorization and of the change are measured, and the change counted by outcome.
+
+    Args:
+        request: the HTTP request.
+        fqdn: the FQDN of the record.
+        value: the ACME challenge of the record.
+        action: whether to add or remove the record.
+
+    Returns:
+        an HTTP response.
+    """
+    user = request.user
+    try:
+        admission_controller.check_rate(user.id)
+    except AdmissionRejected as exc:
+        return _get_throttled_response(exc, action, UNKNOWN_ZONE)
+    with observe_phase("authorize", UNKNOWN_ZONE) as observation:
+        observation.span.set_attribute("fqdn", fqdn)
+        domain = authorization_index.get(user.id, fqdn)
+    if domain is None:
+        return _get_denied_response(user, fqdn, action)
+    zone = domain.zone or UNKNOWN_ZONE
+    record_value = value if action == RecordChangeJob.PRESENT else None
+    if is_record_applied(domain.fqdn, record_value):
+        RECORD_CHANGES.labels(action=action, zone=zone, outcome="skipped").inc()
+        return HttpResponse(status=204)
+    try:
+        slot = admission_controller.acquire(user.id)
+    except AdmissionRejected as exc:
+        return _get_throttled_response(exc, action, zone)
+    with observe_phase("apply", zone) as observation:
+        try:
+            response = _apply_record_change(request, domain, value, action, slot)
+        except Exception:
+            slot.release()
+            RECORD_CHANGES.labels(action=action, zone=zone, outcome="error").inc()
+            raise
+        observation.outcome = _RESPONSE_OUTCOMES.get(response.status_code, "error")
+    RECORD_CHANGES.labels(action=action, zone=zone, outcome=observation.outcome).inc()
+    return response
+
+
+def _authenticate(request: HttpRequest) -> Request | HttpResponse:
+    """Authenticate a request and parse its content, as the REST framework views do.
+
+    Args:
+        request: the HTTP request.
+
+    Returns:
+        the REST framework request, or an HTTP response if the request was rejected.
+    """
+    view = APIView()
+    view.args, view.kwargs = (), {}
+    rest_request = view.initialize_request(request)
+    view.request = rest_request
+    view.headers = view.default_response_headers
+    try:
+        view.initial(rest_request)
+        rest_request.data  # pylint: disable=pointless-statement
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        # Unexpected exceptions are raised again by handle_exception.
+        response = view.finalize_response(rest_request, view.handle_exception(exc))
+        return response.render()
+    return rest_request
+
+
+async def _ahandle_record_change(
+    request: Request, fqdn: str, value: str, action: str
+) -> HttpResponse:
+    """Apply a record change requested by a user allowed to manage the FQDN, asynchronously.
+
+    The change is admitted as by _handle_record_change. The permissions are read with the
+    asynchronous ORM, and the record change is applied on the bounded pool of threads of the
+    record operations, so waiting on git does not hold a worker.
+
+    Args:
+        request: the HTTP request.
+        fqdn: the FQDN of the record.
+        value: the ACME challenge of the record.
+        action: whether to add or remove the record.
+
+    Returns:
+        an HTTP response.
+    """
+    user = request.user
+    try:
+        admission_controller.check_rate(user.id)
+    except AdmissionRejected as exc:
+        return _get_throttled_response(exc, action, UNKNOWN_ZONE)
+    with observe_phase("authorize", UNKNOWN_ZONE) as observation:
+        observation.span.set_attribute("fqdn", fqdn)
+        domain = await authorization_index.aget(user.id, fqdn)
+    if domain is None:
+        return _get_denied_response(user, fqdn, action)
+    zone = domain.zone or UNKNOWN_ZONE
+    record_value = value if action == RecordChangeJob.PRESENT else None
+    if await run_record_operation(is_record_applied, domain.fqdn, record_value):
+        RECORD_CHANGES.labels(action=action, zone=zone, outcome="skipped").inc()
+        return HttpResponse(status=204)
+    try:
+        slot = admission_controller.acquire(user.id)
+    except AdmissionRejected as exc:
+        return _get_throttled_response(exc, action, zone)
+    with observe_phase("apply", zone) as observation:
+        try:
+            response = await _aapply_record_change(request, domain, value, action, slot)
+        except Exception:
+            slot.release()
+            RECORD_CHANGES.labels(action=action, zone=zone, outcome="error").inc()
+            raise
+        observation.outcome = _RESPONSE_OUTCOMES.get(response.status_code, "error")
+    RECORD_CHANGES.labels(action=action, zone=zone, outcome=observation.outcome).inc()
+    return response
+
+
+async def _ahandle_form(request: HttpRequest, form_class: Type[Form], action: str) -> HttpResponse:
+    """Authenticate a request and validate its form, then apply the record change asynchronously.
+
+    Args:
+        request: the HTTP request.
+        form_class: the form of the request.
+        action: whether to add or remove the record.
+
+    Returns:
+        an HTTP response.
+    """
+    rest_request = await sync_to_async(_authenticate)(request)
+    if isinstance(rest_request, HttpResponse):
+        return rest_request
+    form = form_class(rest_request.data)
+    if not form.is_valid():
+        return HttpResponse(content=form.errors.as_json(), status=400)
+    return await _ahandle_record_change(
+        rest_request, form.cleaned_data["fqdn"], form.cleaned_data["value"], action
+    )
+
+
+def _parse_batch(
+    entries: list, form_class: Type[Form], results: List[dict | None]
+) -> Dict[str, Tuple[int, str]]:
+    """Validate the entries of a batch of record changes.
+
+    Args:
+        entries: the entries of the batch.
+        form_class: the form of each entry.
+        results: the results of the entries, set for the invalid ones.
+
+    Returns:
+        the index and ACME challenge of the valid entries, by FQDN.
+    """
+    values: Dict[str, Tuple[int, str]] = {}
+    for index, entry in enumerate(entries):
+        form = form_class(entry if isinstance(entry, dict) else {})
+        if not form.is_valid():
+            fqdn = entry.get("fqdn") if isinstance(entry, dict) else None
+            results[index] = {"fqdn": fqdn, "status": 400, "errors": form.errors.get_json_data()}
+        elif form.cleaned_data["fqdn"] in values:
+            # The backends replace the record of a FQDN, so only one change per FQDN applies.
+            fqdn = form.cleaned_data["fqdn"]
+            results[index] = {"fqdn": fqdn, "status": 400, "detail": f"Duplicate FQDN {fqdn}"}
+        else:
+            values[form.cleaned_data["fqdn"]] = (index, form.cleaned_data["value"])
+    return values
+
+
+def _get_batch_changes(
+    user: User,
+    action: str,
+    values: Dict[str, Tuple[int, str]],
+    results: List[dict | None],
+) -> Dict[DomainGrant, RecordChange]:
+    """Authorize the changes of a batch in a single query, and skip those already applied.
+
+    Args:
+        user: the user requesting the changes.
+        action: whether to add or remove the records.
+        values: the index and ACME challenge of the valid entries, by FQDN.
+        results: the results of the entries, set for the denied and skipped ones.
+
+    Returns:
+        the changes to apply, by domain.
+    """
+    with observe_phase("authorize", UNKNOWN_ZONE) as observation:
+        observation.span.set_attribute("record.count", len(values))
+        grants = authorization_index.get_many(user.id, list(values))
+    applied = get_applied_records([grant.fqdn for grant in grants.values() if grant])
+    changes = {}
+    for fqdn, (index, value) in values.items():
+        grant = grants[fqdn]
+        record_value = value if action == RecordChangeJob.PRESENT else None
+        if grant is None:
+            RECORD_CHANGES.labels(action=action, zone=UNKNOWN_ZONE, outcome="denied").inc()
+            detail = f"The user {user} does not have permission to manage {fqdn}"
+            results[index] = {"fqdn": fqdn, "status": 403, "detail": detail}
+        elif applied.get(grant.fqdn) == (record_value or ""):
+            RECORD_CHANGES.labels(
+                action=action, zone=grant.zone or UNKNOWN_ZONE, outcome="skipped"
+            ).inc()
+            results[index] = {"fqdn": fqdn, "status": 204}
+        else:
+            changes[grant] = RecordChange(grant.fqdn, record_value)
+    return changes
+
+
+def _apply_batch_changes(
+    action: str,
+    changes: Dict[DomainGrant, RecordChange],
+    values: Dict[str, Tuple[int, str]],
+    results: List[dict | None],
+) -> None:
+    """Apply the changes of a batch, together for each backend.
+
+    Args:
+        action: whether to add or remove the records.
+        changes: the changes to apply, by domain.
+        values: the index and ACME challenge of the valid entries, by FQDN.
+        results: the results of the entries, set for the changes applied.
+    """
+    changes_by_backend: Dict[str, List[RecordChange]] = {}
+    for domain, change in changes.items():
+        changes_by_backend.setdefault(domain.backend, []).append(change)
+    zones = {domain.zone or UNKNOWN_ZONE for domain in changes}
+    with observe_phase("apply", zones.pop() if len(zones) == 1 else MULTIPLE_ZONES) as observation:
+        for backend, backend_changes in changes_by_backend.items():
+            apply_record_changes(backend, backend_changes)
+        if any(change.error for change in changes.values()):
+            observation.outcome = "error"
+    for domain, change in changes.items():
+        outcome = "error" if change.error else "success"
+        RECORD_CHANGES.labels(
+            action=action, zone=domain.zone or UNKNOWN_ZONE, outcome=outcome
+        ).inc()
+        result: dict = {"fqdn": domain.fqdn, "status": 500 if change.error else 204}
+        if change.error:
+            result["detail"] = f"Failed to update the DNS records for {domain.fqdn}"
+        results[values[domain.fqdn][0]] = result
+
+
+def _handle_record_change_batch(
+    request: Request, form_class: Type[Form], action: str
+) -> HttpResponse:
+    """Apply a batch of record changes, in a single commit per repository.
+
+    The batch counts as a single request for the admission control. Each entry is validated and
+    authorized on its own, and its outcome reported in the response, in the order of the
+    entries.
+
+    Args:
+        request: the HTTP request, whose content is a list of entries with a FQDN and value.
+        form_class: the form of each entry.
+        action: whether to add or remove the records.
+
+    Returns:
+        an HTTP response with the status of each entry.
+    """
+    entries = request.data
+    if not isinstance(entries, list) or not 0 < len(entries) <= RECORD_BATCH_MAX_SIZE:
+        return HttpResponse(
+            status=400,
+            content=f"The content must be a list of 1 to {RECORD_BATCH_MAX_SIZE} records",
+        )
+    user = request.user
+    try:
+        admission_controller.check_rate(user.id)
+    except AdmissionRejected as exc:
+        return _get_throttled_response(exc, action, UNKNOWN_ZONE)
+    results: List[dict | None] = [None] * len(entries)
+    values = _parse_batch(entries, form_class, results)
+    changes = _get_batch_changes(user, action, values, results)
+    if changes:
+        try:
+            slot = admission_controller.acquire(user.id)
+        except AdmissionRejected as exc:
+            return _get_throttled_response(exc, action, UNKNOWN_ZONE)
+        with slot:
+            _apply_batch_changes(action, changes, values, results)
+    return JsonResponse(results, safe=False)
+
+
+@api_view(["POST"])
+def handle_present_batch(request: Request) -> HttpResponse:
+    """Handle the submission of a batch of present forms.
+
+    Args:
+        request: the HTTP request.
+
+    Returns:
+        an HTTP response.
+    """
+    return _handle_record_change_batch(request, PresentForm, RecordChangeJob.PRESENT)
+
+
+@api_view(["POST"])
+def handle_cleanup_batch(request: Request) -> HttpResponse:
+    """Handle the submission of a batch of cleanup forms.
+
+    Args:
+        request: the HTTP request.
+
+    Returns:
+        an HTTP response.
+    """
+    return _handle_record_change_batch(request, CleanupForm, RecordChangeJob.CLEANUP)
 
 
 @api_view(["POST"])
@@ -34,19 +572,8 @@ def handle_present(request: HttpRequest) -> Optional[HttpResponse]:
     form = PresentForm(request.data)
     if not form.is_valid():
         return HttpResponse(content=form.errors.as_json(), status=400)
-    user = request.user
-    fqdn = form.cleaned_data["fqdn"]
-    try:
-        domain = Domain.objects.get(fqdn=fqdn)
-        value = form.cleaned_data["value"]
-        if DomainUserPermission.objects.filter(user=user, domain=domain):
-            write_dns_record(domain.fqdn, value)
-            return HttpResponse(status=204)
-    except Domain.DoesNotExist:
-        pass
-    return HttpResponse(
-        status=403,
-        content=f"The user {user} does not have permission to manage {fqdn}",
+    return _handle_record_change(
+        request, form.cleaned_data["fqdn"], form.cleaned_data["value"], RecordChangeJob.PRESENT
     )
 
 
@@ -63,21 +590,90 @@ def handle_cleanup(request: HttpRequest) -> Optional[HttpResponse]:
     form = CleanupForm(request.data)
     if not form.is_valid():
         return HttpResponse(content=form.errors.as_json(), status=400)
-    user = request.user
-    fqdn = form.cleaned_data["fqdn"]
-    try:
-        domain = Domain.objects.get(fqdn=fqdn)
-        if DomainUserPermission.objects.filter(user=user, domain=domain):
-            remove_dns_record(domain.fqdn)
-            return HttpResponse(status=204)
-    except Domain.DoesNotExist:
-        pass
-    return HttpResponse(
-        status=403,
-        content=f"The user {user} does not have permission to manage {fqdn}",
+    return _handle_record_change(
+        request, form.cleaned_data["fqdn"], form.cleaned_data["value"], RecordChangeJob.CLEANUP
     )
 
 
+@csrf_exempt
+@require_POST
+async def ahandle_present(request: HttpRequest) -> HttpResponse:
+    """Handle the submission of the present form, asynchronously.
+
+    Args:
+        request: the HTTP request.
+
+    Returns:
+        an HTTP response.
+    """
+    return await _ahandle_form(request, PresentForm, RecordChangeJob.PRESENT)
+
+
+@csrf_exempt
+@require_POST
+async def ahandle_cleanup(request: HttpRequest) -> HttpResponse:
+    """Handle the submission of the cleanup form, asynchronously.
+
+    Args:
+        request: the HTTP request.
+
+    Returns:
+        an HTTP response.
+    """
+    return await _ahandle_form(request, CleanupForm, RecordChangeJob.CLEANUP)
+
+
+def _is_metrics_client_allowed(request: HttpRequest) -> bool:
+    """Check whether a client is allowed to read the metrics.
+
+    Prometheus scrapes the units directly, while the public requests go through the ingress,
+    which adds the forwarded headers. Both come from the private networks of the cluster.
+
+    Args:
+        request: the HTTP request.
+
+    Returns:
+        whether the client address is in the allowed networks and the request was not proxied.
+    """
+    if any(header in request.headers for header in FORWARDED_HEADERS):
+        return False
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in network for network in METRICS_NETWORKS)
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    """Serve the Prometheus metrics, to the clients of the allowed networks only.
+
+    Args:
+        request: the HTTP request.
+
+    Returns:
+        an HTTP response with the metrics in the Prometheus text format, or a 403 if the client
+        is not allowed to read them.
+    """
+    if not _is_metrics_client_allowed(request):
+        return HttpResponse(status=403)
+    content, content_type = render_metrics()
+    return HttpResponse(content, content_type=content_type)
+
+
+class ZoneViewSet(viewsets.ModelViewSet):
+    """Views for the Zone.
+
+    Attributes:
+        queryset: query for the objects in the model.
+        serializer_class: class used for serialization.
+        permission_classes: list of classes to match permissions.
+    """
+
+    queryset = Zone.objects.all()
+    serializer_class = ZoneSerializer
+    permission_classes = [IsAdminUser]
+
+
 class DomainViewSet(viewsets.ModelViewSet):
     """Views for the Domain.
 
@@ -87,7 +683,7 @@ class DomainViewSet(viewsets.ModelViewSet):
         permission_classes: list of classes to match permissions.
     """
 
-    queryset = Domain.objects.all()
+    queryset = Domain.objects.select_related("zone")
     serializer_class = DomainSerializer
     permission_classes = [IsAdminUser]
 
@@ -140,11 +736,13 @@ class UserViewSet(viewsets.ModelViewSet):
         queryset: query for the objects in the model.
         serializer_class: class used for serialization.
         permission_classes: list of classes to match permissions.
+        pagination_class: class used for pagination, listing the most recent users first.
     """
 
-    queryset = User.objects.all().order_by("-date_joined")
+    queryset = User.objects.prefetch_related("groups").order_by("-date_joined", "-id")
     serializer_class = UserSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = DateJoinedCursorPagination
 
     def get_queryset(self):
         """Optionally restricts the returned object list to a given user.
@@ -157,3 +755,28 @@ class UserViewSet(viewsets.ModelViewSet):
         if username is not None:
             queryset = queryset.filter(username=username)
         return queryset
+
+
+class RecordChangeJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Views for the RecordChangeJob.
+
+    Attributes:
+        queryset: query for the objects in the model.
+        serializer_class: class used for serialization.
+        pagination_class: class used for pagination, listing the most recent jobs first.
+    """
+
+    queryset = RecordChangeJob.objects.all().order_by("-created_at")
+    serializer_class = RecordChangeJobSerializer
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        """Restrict the returned object list to the jobs of the user, unless admin.
+
+        Returns:
+            A queryset filtered by the requesting user.
+        """
+        queryset = self.queryset
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
@@ -0,0 +1,591 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Coalescing writer for the DNS records repository."""
+
+import io
+import logging
+import random
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Collection, Iterable, Mapping
+from contextlib import AbstractContextManager, ExitStack, nullcontext
+from pathlib import Path
+from typing import Dict, List
+
+from git import Blob, Commit, PushInfo, Repo, Tree
+from git.objects.fun import tree_to_stream
+from gitdb import IStream
+from opentelemetry import trace
+
+from .metrics import get_zone_label, observe_phase, tracer
+from .mirror import BareRepositoryMirror, RepositoryMirror
+from .settings import ZONE_STREAMING_THRESHOLD
+from .zone import (
+    FILENAME_TEMPLATE,
+    ZoneFile,
+    cache_zone_file,
+    get_domain_and_subdomain_from_fqdn,
+    load_zone_file,
+    pop_cached_zone_file,
+    rewrite_zone_file,
+    rewrite_zone_stream,
+    store_zone_file,
+)
+
+logger = logging.getLogger(__name__)
+
+ZoneLock = Callable[[Collection[str]], AbstractContextManager]
+
+
+class PushRejectedError(Exception):
+    """Exception raised when the remote keeps rejecting the pushes of a batch."""
+
+
+class RecordChange:
+    """Change to the record of a FQDN waiting to be pushed.
+
+    Attributes:
+        fqdn: the FQDN the change applies to.
+        value: the ACME challenge to write, or None to remove the record.
+        error: the error that prevented the change from being pushed, if any.
+        cancelled: whether the change was cancelled or superseded by a later change to the
+            record, before being pushed, so the record is left as the later change sets it.
+        retries: the number of times the push of the change was retried after a rejection.
+        span_context: the context of the span active when the change was requested, linked from
+            the span of the batch pushing it.
+    """
+
+    def __init__(self, fqdn: str, value: str | None = None):
+        """Initialize the change.
+
+        Args:
+            fqdn: the FQDN the change applies to.
+            value: the ACME challenge to write, or None to remove the record.
+        """
+        self.fqdn = fqdn
+        self.value = value
+        self.error: Exception | None = None
+        self.cancelled = False
+        self.retries = 0
+        self.span_context = trace.get_current_span().get_span_context()
+        self._done = threading.Event()
+
+    @property
+    def message(self) -> str:
+        """Describe the change.
+
+        Returns:
+            the commit message for the change.
+        """
+        return f"{'Remove' if self.value is None else 'Add'} {self.fqdn} record"
+
+    @property
+    def done(self) -> bool:
+        """Check whether the change was processed, successfully or not.
+
+        Returns:
+            whether the change has an outcome.
+        """
+        return self._done.is_set()
+
+    def resolve(self, error: Exception | None = None) -> None:
+        """Mark the change as processed.
+
+        Args:
+            error: the error that prevented the change from being pushed, if any.
+        """
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for the change to be processed.
+
+        Args:
+            timeout: maximum time to wait in seconds, or None to wait forever.
+
+        Returns:
+            whether the change was processed before the timeout.
+        """
+        return self._done.wait(timeout)
+
+
+def group_changes_by_filename(
+    changes: Iterable[RecordChange],
+) -> Dict[str, Dict[str, RecordChange]]:
+    """Group the changes by the zone file they apply to.
+
+    Args:
+        changes: the changes to group, at most one per FQDN.
+
+    Returns:
+        the changes for each subdomain, by zone filename.
+    """
+    changes_by_filename: Dict[str, Dict[str, RecordChange]] = {}
+    for change in changes:
+        domain, subdomain = get_domain_and_subdomain_from_fqdn(change.fqdn)
+        filename = FILENAME_TEMPLATE.format(domain=domain)
+        changes_by_filename.setdefault(filename, {})[subdomain] = change
+    return changes_by_filename
+
+
+def edit_zone_files(
+    working_tree_dir: Path,
+    changes_by_filename: Dict[str, Dict[str, RecordChange]],
+    blob_shas: Mapping[str, str] | None = None,
+) -> None:
+    """Apply the changes to the zone files, reading and writing each file once.
+
+    Zone files too large to be parsed are rewritten line by line.
+
+    Args:
+        working_tree_dir: the working tree containing the zone files.
+        changes_by_filename: the changes for each subdomain, by zone filename.
+        blob_shas: the git blob SHA of the zone files, by filename, to reuse cached parses.
+    """
+    for filename, subdomain_changes in changes_by_filename.items():
+        dns_record_file = working_tree_dir / filename
+        zone_file = load_zone_file(dns_record_file, (blob_shas or {}).get(filename))
+        if zone_file is None:
+            rewrite_zone_file(dns_record_file, _get_values(subdomain_changes))
+            continue
+        _edit_zone_file(zone_file, subdomain_changes)
+        store_zone_file(dns_record_file, zone_file)
+
+
+def _get_values(subdomain_changes: Dict[str, RecordChange]) -> Dict[str, str | None]:
+    """Get the new value of the record of each subdomain.
+
+    Args:
+        subdomain_changes: the changes, by subdomain.
+
+    Returns:
+        the ACME challenge to write, or None to remove the record, by subdomain.
+    """
+    return {subdomain: change.value for subdomain, change in subdomain_changes.items()}
+
+
+def _edit_zone_file(zone_file: ZoneFile, subdomain_changes: Dict[str, RecordChange]) -> None:
+    """Apply the changes to a zone file.
+
+    Args:
+        zone_file: the zone file.
+        subdomain_changes: the changes, by subdomain.
+    """
+    zone_file.remove(subdomain_changes.keys())
+    for subdomain, change in subdomain_changes.items():
+        if change.value is not None:
+            zone_file.add(subdomain, change.value)
+
+
+def _get_blob_shas(repo: Repo, filenames: Iterable[str]) -> Dict[str, str]:
+    """Get the blob SHA of files at the head of the repository.
+
+    Args:
+        repo: the repository.
+        filenames: the files to look up.
+
+    Returns:
+        the blob SHA by filename, for the files present in the head commit.
+    """
+    tree = repo.head.commit.tree
+    blob_shas = {}
+    for filename in filenames:
+        try:
+            blob_shas[filename] = (tree / filename).hexsha
+        except KeyError:
+            continue
+    return blob_shas
+
+
+def _lost_race(push_info: PushInfo) -> bool:
+    """Check whether a push failed because another writer updated the branch first.
+
+    Args:
+        push_info: the outcome of the push of a branch.
+
+    Returns:
+        whether the push can be retried on top of the updated branch.
+    """
+    if push_info.flags & PushInfo.REJECTED:
+        return True
+    # The remote fails to lock the branch while another push is updating it.
+    return bool(push_info.flags & PushInfo.REMOTE_REJECTED) and any(
+        reason in push_info.summary for reason in ("failed to update ref", "cannot lock ref")
+    )
+
+
+def _push_to_origin(repo: Repo, refspec: str | None = None) -> bool:
+    """Push to the origin remote.
+
+    Args:
+        repo: the repository.
+        refspec: the refspec to push, or None for the current branch.
+
+    Returns:
+        False if the push was rejected because the remote branch moved, True otherwise.
+    """
+    push_infos = repo.remote(name="origin").push(refspec)
+    if any(_lost_race(push_info) for push_info in push_infos):
+        return False
+    push_infos.raise_if_error()
+    return True
+
+
+def _get_commit_size(repo: Repo, commit: Commit) -> int:
+    """Get the size of the objects introduced by a commit, to estimate the amount of data pushed.
+
+    Args:
+        repo: the repository.
+        commit: the commit.
+
+    Returns:
+        the size on disk of the objects reachable from the commit but not from its parents.
+    """
+    return int(
+        repo.git.rev_list(
+            "--objects",
+            "--disk-usage",
+            "--missing=allow-any",
+            commit.hexsha,
+            "--not",
+            *(parent.hexsha for parent in commit.parents),
+        )
+    )
+
+
+def _observed_push(repo: Repo, zone: str, commit: Commit, refspec: str | None = None) -> bool:
+    """Push to the origin remote, measuring the push duration.
+
+    Args:
+        repo: the repository.
+        zone: the zone label of the pushed changes, for the metrics.
+        commit: the pushed commit, on top of the remote branch.
+        refspec: the refspec to push, or None for the current branch.
+
+    Returns:
+        False if the push was rejected because the remote branch moved, True otherwise.
+    """
+    with observe_phase("push", zone) as observation:
+        if observation.span.is_recording():
+            observation.span.set_attribute("git.pushed_bytes", _get_commit_size(repo, commit))
+        pushed = _push_to_origin(repo, refspec)
+        if not pushed:
+            observation.outcome = "rejected"
+        return pushed
+
+
+def _commit_message(changes: List[RecordChange]) -> str:
+    """Build the commit message for a set of changes.
+
+    Args:
+        changes: the changes included in the commit.
+
+    Returns:
+        the commit message.
+    """
+    if len(changes) == 1:
+        return changes[0].message
+    summary = "\n".join(change.message for change in changes)
+    return f"Update {len(changes)} records\n\n{summary}"
+
+
+class RecordWriter:
+    """Writer pushing the queued record changes to a repository in batches.
+
+    Changes submitted while the writer waits for the window to elapse, or while it is pushing
+    the previous batch, are committed and pushed together, so the number of pushes does not grow
+    with the request rate.
+
+    A push rejected because another writer updated the branch first is retried on the new tip
+    of the branch, after a jittered exponential backoff.
+
+    Attributes:
+        mirror: the mirror of the repository to push the changes to.
+        window: the time in seconds to wait for more changes before pushing a batch.
+        retries: the maximum number of times to retry a rejected push.
+        backoff: the base delay in seconds before retrying a rejected push.
+        lock: the lock of the zone files held while editing and pushing them.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        mirror: RepositoryMirror,
+        window: float,
+        retries: int = 5,
+        backoff: float = 0.2,
+        lock: ZoneLock | None = None,
+    ):
+        """Initialize the writer.
+
+        Args:
+            mirror: the mirror of the repository to push the changes to.
+            window: the time in seconds to wait for more changes before pushing a batch.
+            retries: the maximum number of times to retry a rejected push.
+            backoff: the base delay in seconds before retrying a rejected push.
+            lock: the lock of the zone files held while editing and pushing them, shared with
+                the other units. Nothing is locked if not provided.
+        """
+        self.mirror = mirror
+        self.window = window
+        self.retries = retries
+        self.backoff = backoff
+        self.lock: ZoneLock = lock or (lambda _: nullcontext())
+        self._pending: Dict[str, List[RecordChange]] = {}
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, change: RecordChange) -> None:
+        """Queue a change to be pushed with the next batch.
+
+        A removal queued while the addition of the same record is still pending cancels the
+        addition, which is resolved without touching the repository. The removal is still pushed,
+        so a value of the record already in the repository is removed.
+
+        Args:
+            change: the change to queue.
+        """
+        self.submit_all([change])
+
+    def submit_all(self, changes: Iterable[RecordChange]) -> None:
+        """Queue changes to be pushed together, in the same batch.
+
+        Args:
+            changes: the changes to queue, at most one per FQDN.
+        """
+        with self._condition:
+            for change in changes:
+                self._queue(change)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f"record-writer-{self.mirror.path.name}", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+
+    def _queue(self, change: RecordChange) -> None:
+        """Queue a change, cancelling the pending addition of the record it removes.
+
+        Must be called with the condition held.
+
+        Args:
+            change: the change to queue.
+        """
+        pending = self._pending.setdefault(change.fqdn, [])
+        if change.value is None and pending and pending[-1].value is not None:
+            cancelled = pending.pop()
+            logger.info("%s cancelled by a pending removal", cancelled.message)
+            cancelled.cancelled = True
+            cancelled.resolve()
+        pending.append(change)
+
+    def _run(self) -> None:
+        """Push the pending changes in batches, forever."""
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+            time.sleep(self.window)
+            with self._condition:
+                batch, self._pending = self._pending, {}
+            error = None
+            changes = [changes[-1] for changes in batch.values()]
+            for superseded in (change for changes in batch.values() for change in changes[:-1]):
+                logger.info("%s superseded by a later change", superseded.message)
+                superseded.cancelled = True
+            try:
+                with tracer.start_as_current_span(
+                    "push_batch",
+                    attributes={"record.count": len(changes)},
+                    links=[
+                        trace.Link(change.span_context)
+                        for change in changes
+                        if change.span_context.is_valid
+                    ],
+                ):
+                    self._push(changes)
+            # Any failure has to be reported to the requests waiting on the batch.
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to push %s record changes", len(batch))
+                error = ex
+            for changes in batch.values():
+                for change in changes:
+                    change.resolve(error)
+
+    def _push(self, changes: List[RecordChange]) -> None:
+        """Commit the changes to the repository in a single commit and push it.
+
+        When the push is rejected, the changes are applied again on top of the updated branch.
+
+        Args:
+            changes: the changes to push, at most one per FQDN.
+
+        Raises:
+            PushRejectedError: if the push is still rejected once the retries are exhausted.
+        """
+        changes_by_filename = group_changes_by_filename(changes)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # The jitter only spreads the retries of concurrent writers, it is not security
+                # sensitive.
+                delay = random.uniform(0, self.backoff * 2 ** (attempt - 1))  # nosec B311
+                logger.info(
+                    "Push rejected, retrying in %.2fs (%s/%s)", delay, attempt, self.retries
+                )
+                time.sleep(delay)
+            for change in changes:
+                change.retries = attempt
+            if self._commit_and_push(changes, changes_by_filename):
+                return
+        raise PushRejectedError(f"Push still rejected after {self.retries} retries")
+
+    def _commit_and_push(
+        self, changes: List[RecordChange], changes_by_filename: Dict[str, Dict[str, RecordChange]]
+    ) -> bool:
+        """Apply the changes on the tip of the remote branch, commit and push them.
+
+        Args:
+            changes: the changes to push, at most one per FQDN.
+            changes_by_filename: the same changes for each subdomain, by zone filename.
+
+        Returns:
+            False if the push was rejected because the remote branch moved, True otherwise.
+        """
+        zone = get_zone_label(changes_by_filename.keys())
+        with ExitStack() as stack:
+            repo = self._lock_and_checkout(stack, changes_by_filename.keys(), zone)
+            with observe_phase("edit", zone):
+                edit_zone_files(
+                    Path(repo.working_tree_dir),
+                    changes_by_filename,
+                    _get_blob_shas(repo, changes_by_filename),
+                )
+            with observe_phase("commit", zone):
+                repo.git.add("--", *changes_by_filename)
+                if not repo.git.diff("--cached", "--name-only"):
+                    logger.info("Zone files already up to date, skipping commit")
+                    return True
+                repo.git.commit("-m", _commit_message(changes))
+            return _observed_push(repo, zone, repo.head.commit)
+
+    def _lock_and_checkout(self, stack: ExitStack, filenames: Collection[str], zone: str) -> Repo:
+        """Lock the zone files and the mirror, and bring the mirror up to date.
+
+        Args:
+            stack: the stack releasing the locks on exit.
+            filenames: the zone files to edit.
+            zone: the zone label of the changes, for the metrics.
+
+        Returns:
+            the up to date repository.
+        """
+        with observe_phase("lock", zone):
+            stack.enter_context(self.lock(filenames))
+        with observe_phase("sync", zone):
+            return stack.enter_context(self.mirror.checkout(filenames))
+
+
+class BareRecordWriter(RecordWriter):
+    """Writer creating the commits directly in the object database of a bare mirror.
+
+    The blobs, tree and commit are written by GitPython without checkout nor index, so only
+    fetching and pushing run git subprocesses.
+
+    Attributes:
+        mirror: the bare mirror of the repository to push the changes to.
+    """
+
+    mirror: BareRepositoryMirror
+
+    def _commit_and_push(
+        self, changes: List[RecordChange], changes_by_filename: Dict[str, Dict[str, RecordChange]]
+    ) -> bool:
+        """Apply the changes on the tip of the remote branch, commit and push them.
+
+        Args:
+            changes: the changes to push, at most one per FQDN.
+            changes_by_filename: the same changes for each subdomain, by zone filename.
+
+        Returns:
+            False if the push was rejected because the remote branch moved, True otherwise.
+
+        Raises:
+            ValueError: if a zone file does not exist.
+        """
+        zone = get_zone_label(changes_by_filename.keys())
+        with ExitStack() as stack:
+            repo = self._lock_and_checkout(stack, changes_by_filename.keys(), zone)
+            tracking_branch = self.mirror.tracking_branch(repo)
+            parent = tracking_branch.commit
+            tree = parent.tree
+            tree_modifier = tree.cache
+            changed = False
+            with observe_phase("edit", zone):
+                for filename, subdomain_changes in changes_by_filename.items():
+                    try:
+                        blob = tree / filename
+                    except KeyError as exc:
+                        raise ValueError(f"Zone file {filename} does not exist") from exc
+                    new_blob = _edit_blob(repo, blob, subdomain_changes)
+                    if new_blob.binsha != blob.binsha:
+                        tree_modifier.add(new_blob.binsha, blob.mode, filename, force=True)
+                        changed = True
+            if not changed:
+                logger.info("Zone files already up to date, skipping commit")
+                return True
+            with observe_phase("commit", zone):
+                tree_modifier.set_done()
+                tree_content = io.BytesIO()
+                tree_to_stream(
+                    [(entry.binsha, entry.mode, entry.name) for entry in tree], tree_content.write
+                )
+                new_tree = _store_object(repo, Tree.type, tree_content.getvalue())
+                commit = Commit.create_from_tree(
+                    repo, Tree(repo, new_tree.binsha), _commit_message(changes), [parent]
+                )
+                branch = tracking_branch.remote_head
+                repo.create_head(branch, commit, force=True)
+            return _observed_push(repo, zone, commit, f"refs/heads/{branch}:refs/heads/{branch}")
+
+
+def _edit_blob(repo: Repo, blob: Blob, subdomain_changes: Dict[str, RecordChange]) -> IStream:
+    """Apply the changes to a zone file blob and store the new blob.
+
+    Blobs too large to be parsed are rewritten line by line through a temporary file.
+
+    Args:
+        repo: the repository.
+        blob: the zone file blob.
+        subdomain_changes: the changes, by subdomain.
+
+    Returns:
+        the stored blob stream, holding its SHA.
+    """
+    zone_file = pop_cached_zone_file(blob.hexsha)
+    if zone_file is None and blob.size > ZONE_STREAMING_THRESHOLD:
+        with tempfile.TemporaryFile() as content:
+            rewrite_zone_stream(
+                blob.data_stream.read, content.write, _get_values(subdomain_changes)
+            )
+            size = content.tell()
+            content.seek(0)
+            return repo.odb.store(IStream(Blob.type, size, content))
+    zone_file = zone_file or ZoneFile(blob.data_stream.read().decode("utf-8"))
+    _edit_zone_file(zone_file, subdomain_changes)
+    new_blob = _store_object(repo, Blob.type, zone_file.render().encode("utf-8"))
+    cache_zone_file(new_blob.hexsha, zone_file)
+    return new_blob
+
+
+def _store_object(repo: Repo, object_type: str, content: bytes) -> IStream:
+    """Write an object to the object database of a repository.
+
+    Args:
+        repo: the repository.
+        object_type: the object type.
+        content: the object content.
+
+    Returns:
+        the stored object stream, holding its SHA.
+    """
+    return repo.odb.store(IStream(object_type, len(content), io.BytesIO(content)))
@@ -0,0 +1,470 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Zone file utilities."""
+
+import hashlib
+import logging
+import os
+import re
+import stat
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Collection, Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .settings import ZONE_CACHE_SIZE, ZONE_STREAMING_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+FILENAME_TEMPLATE = "{domain}.domain"
+RECORD_CONTENT = "{record} 600 IN TXT \042{value}\042\n"
+
+STREAM_CHUNK_SIZE = 64 * 1024
+TXT_VALUE_PATTERN = re.compile(r"\sTXT\s+\042([^\042]*)\042")
+
+_zone_cache: "OrderedDict[str, ZoneFile]" = OrderedDict()
+_zone_cache_lock = threading.Lock()
+
+
+class ZoneTrie:
+    """Suffix trie of the registered zones, keyed by label from the top-level domain.
+
+    Finding the zone of a FQDN walks its labels once, from the right, keeping the longest
+    registered suffix, so delegated subzones take precedence over their parent zone.
+    """
+
+    def __init__(self, zones: Iterable[str] = ()):
+        """Initialize the trie.
+
+        Args:
+            zones: the names of the registered zones.
+        """
+        self._root: Dict[str, dict] = {}
+        self.replace(zones)
+
+    @staticmethod
+    def _labels(name: str) -> List[str]:
+        """Split a domain name into labels, from the top-level domain.
+
+        Args:
+            name: the domain name.
+
+        Returns:
+            the labels, in reverse order.
+        """
+        return list(reversed(name.rstrip(".").lower().split(".")))
+
+    def replace(self, zones: Iterable[str]) -> None:
+        """Replace the registered zones.
+
+        Args:
+            zones: the names of the registered zones.
+        """
+        root: Dict[str, dict] = {}
+        for zone in zones:
+            self._insert(root, zone)
+        self._root = root
+
+    def add(self, zone: str) -> None:
+        """Register a zone.
+
+        Args:
+            zone: the zone name.
+        """
+        self._insert(self._root, zone)
+
+    def remove(self, zone: str) -> None:
+        """Unregister a zone.
+
+        Args:
+            zone: the zone name.
+        """
+        node: dict | None = self._root
+        for label in self._labels(zone):
+            node = node.get(label) if node is not None else None
+        if node is not None:
+            node.pop("", None)
+
+    def _insert(self, root: Dict[str, dict], zone: str) -> None:
+        """Insert a zone into a trie.
+
+        Args:
+            root: the root node of the trie.
+            zone: the zone name.
+        """
+        node = root
+        for label in self._labels(zone):
+            node = node.setdefault(label, {})
+        # Labels are never empty, so the empty key marks the end of a zone name.
+        node[""] = zone
+
+    def find(self, fqdn: str) -> str | None:
+        """Find the zone a FQDN belongs to.
+
+        Args:
+            fqdn: the FQDN.
+
+        Returns:
+            the longest registered zone the FQDN is part of, or None if there is none.
+        """
+        node = self._root
+        zone = None
+        for label in self._labels(fqdn):
+            next_node = node.get(label)
+            if next_node is None:
+                break
+            node = next_node
+            zone = node.get("", zone)
+        return zone
+
+
+zone_trie = ZoneTrie()
+# Repository URL of the zones stored outside of the default repository, by zone name.
+zone_repositories: Dict[str, str] = {}
+
+
+def replace_zone_repositories(repositories: Mapping[str, str]) -> None:
+    """Replace the repositories of the zones, without ever removing a zone still present.
+
+    Args:
+        repositories: the repository URL of the zones stored outside of the default repository.
+    """
+    zone_repositories.update(repositories)
+    for zone in set(zone_repositories) - set(repositories):
+        zone_repositories.pop(zone, None)
+
+
+def get_domain_and_subdomain_from_fqdn(fqdn: str) -> Tuple[str, str]:
+    """Get the domain and subdomain for the FQDN record provided.
+
+    The domain is the longest registered zone the FQDN is part of, or its last two labels if no
+    zone is registered for it.
+
+    Args:
+        fqdn: Fully qualified domain name.
+
+    Returns:
+        the domain and subdomain for the FQDN provided.
+    """
+    zone = zone_trie.find(fqdn)
+    if zone is None:
+        splitted_record = fqdn.split(".")
+        return (
+            ".".join(splitted_record[-2:]),
+            ".".join(splitted_record[:-2]) if len(splitted_record) > 2 else ".",
+        )
+    name = fqdn.rstrip(".")
+    if len(name) == len(zone):
+        return zone, "."
+    return zone, name[: -len(zone) - 1]
+
+
+def _get_owner(line: str) -> str | None:
+    """Get the owner name of a line in bind9 format.
+
+    Args:
+        line: the line in bind9 format.
+
+    Returns:
+        the first field of the line, or None for comments and blank lines.
+    """
+    fields = line.split(None, 1)
+    if not fields or fields[0].startswith(";"):
+        return None
+    return fields[0]
+
+
+def _line_matches_subdomains(line: str, subdomains: Collection[str]) -> bool:
+    """Check if the line in bind9 format corresponds to one of the given subdomains.
+
+    Args:
+        line: the line in bind9 format.
+        subdomains: the subdomains to compare with.
+
+    Returns:
+        true if one of the subdomains matches the line.
+    """
+    owner = _get_owner(line)
+    return owner is not None and owner in subdomains
+
+
+def remove_subdomain_entries_from_file_content(
+    content: Iterable[str], subdomains: Collection[str]
+) -> List[str]:
+    """Remove from the file the entries matching some subdomains.
+
+    Args:
+        content: the file content.
+        subdomains: the subdomains for which to filter out the entries.
+
+    Returns:
+        the content excluding the entries for the subdomains.
+    """
+    new_content = []
+    for line in content:
+        if not _line_matches_subdomains(line, subdomains):
+            new_content.append(line)
+        else:
+            logger.info("Removing existing DNS record %s", line.split()[0])
+    return new_content
+
+
+def get_blob_sha(content: bytes) -> str:
+    """Compute the git blob SHA of a file content.
+
+    Args:
+        content: the file content.
+
+    Returns:
+        the SHA git uses to store the content.
+    """
+    header = f"blob {len(content)}\0".encode("utf-8")
+    return hashlib.sha1(header + content, usedforsecurity=False).hexdigest()
+
+
+class ZoneFile:
+    """Zone file in bind9 format, indexed by owner name.
+
+    The lines are kept as read, so comments and formatting are preserved, and only the added
+    records are rendered. Removing or adding the records of an owner costs the same whatever the
+    size of the zone: removed lines are blanked, and only dropped when the zone is rendered.
+    """
+
+    def __init__(self, content: str):
+        """Parse the zone file.
+
+        Args:
+            content: the zone file content.
+        """
+        self._lines = content.splitlines(keepends=True)
+        if self._lines and not self._lines[-1].endswith("\n"):
+            self._lines[-1] += "\n"
+        self._index: Dict[str, List[int]] = {}
+        self._removed = 0
+        for position, line in enumerate(self._lines):
+            owner = _get_owner(line)
+            if owner is not None:
+                self._index.setdefault(owner, []).append(position)
+
+    def get_txt_values(self, owner: str) -> List[str]:
+        """Get the values of the TXT records of an owner.
+
+        Args:
+            owner: the owner name of the records.
+
+        Returns:
+            the values of the records.
+        """
+        values = []
+        for position in self._index.get(owner, []):
+            match = TXT_VALUE_PATTERN.search(self._lines[position])
+            if match:
+                values.append(match.group(1))
+        return values
+
+    def remove(self, owners: Collection[str]) -> None:
+        """Remove the records of some owners.
+
+        Args:
+            owners: the owner names of the records to remove.
+        """
+        for owner in owners:
+            for position in self._index.pop(owner, []):
+                logger.info("Removing existing DNS record %s", owner)
+                self._lines[position] = ""
+                self._removed += 1
+
+    def add(self, owner: str, value: str) -> None:
+        """Add an ACME challenge record at the end of the zone.
+
+        Args:
+            owner: the owner name of the record.
+            value: the ACME challenge of the record.
+        """
+        self._index.setdefault(owner, []).append(len(self._lines))
+        self._lines.append(RECORD_CONTENT.format(record=owner, value=value))
+
+    def _compact(self) -> None:
+        """Drop the lines blanked by the removals, so they do not pile up in cached zones."""
+        if not self._removed:
+            return
+        positions: Dict[int, int] = {}
+        lines: List[str] = []
+        for position, line in enumerate(self._lines):
+            if line:
+                positions[position] = len(lines)
+                lines.append(line)
+        self._lines = lines
+        self._index = {
+            owner: [positions[position] for position in owner_positions]
+            for owner, owner_positions in self._index.items()
+        }
+        self._removed = 0
+
+    def render(self) -> str:
+        """Render the zone file.
+
+        Returns:
+            the zone file content.
+        """
+        self._compact()
+        return "".join(self._lines)
+
+
+def pop_cached_zone_file(blob_sha: str) -> ZoneFile | None:
+    """Take a zone file out of the parse cache, so it can be edited.
+
+    Args:
+        blob_sha: the git blob SHA of the zone file content.
+
+    Returns:
+        the parsed zone file, or None if not cached.
+    """
+    with _zone_cache_lock:
+        return _zone_cache.pop(blob_sha, None)
+
+
+def cache_zone_file(blob_sha: str, zone_file: ZoneFile) -> None:
+    """Keep the parse of a zone file in the cache, evicting the least recently cached ones.
+
+    Args:
+        blob_sha: the git blob SHA of the zone file content.
+        zone_file: the parsed zone file.
+    """
+    with _zone_cache_lock:
+        _zone_cache[blob_sha] = zone_file
+        while len(_zone_cache) > ZONE_CACHE_SIZE:
+            _zone_cache.popitem(last=False)
+
+
+def load_zone_file(path: Path, blob_sha: str | None = None) -> ZoneFile | None:
+    """Load a zone file, from the parse cache if its blob SHA is known and cached.
+
+    The returned zone file is removed from the cache, so it can be edited, until it is stored.
+    Zone files larger than the streaming threshold are not parsed, and have to be rewritten with
+    rewrite_zone_file instead.
+
+    Args:
+        path: the zone file path.
+        blob_sha: the git blob SHA of the zone file content, if known.
+
+    Returns:
+        the parsed zone file, or None if the zone file is too large to be parsed.
+    """
+    zone_file = pop_cached_zone_file(blob_sha) if blob_sha is not None else None
+    if zone_file is None and path.stat().st_size > ZONE_STREAMING_THRESHOLD:
+        return None
+    return zone_file or ZoneFile(path.read_text("utf-8"))
+
+
+def store_zone_file(path: Path, zone_file: ZoneFile) -> str:
+    """Write a zone file and keep its parse in the cache, keyed by its git blob SHA.
+
+    Args:
+        path: the zone file path.
+        zone_file: the zone file to write.
+
+    Returns:
+        the git blob SHA of the written content.
+    """
+    content = zone_file.render().encode("utf-8")
+    path.write_bytes(content)
+    blob_sha = get_blob_sha(content)
+    cache_zone_file(blob_sha, zone_file)
+    return blob_sha
+
+
+def _iter_lines(read: Callable[[int], bytes]) -> Iterator[bytes]:
+    """Read lines from a stream, a chunk at a time.
+
+    Args:
+        read: the function reading up to a number of bytes from the stream.
+
+    Yields:
+        the lines, each ending with a new line.
+    """
+    pending = b""
+    while chunk := read(STREAM_CHUNK_SIZE):
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + b"\n"
+    if pending:
+        yield pending + b"\n"
+
+
+def read_zone_stream_txt_values(
+    read: Callable[[int], bytes], owners: Collection[str]
+) -> Dict[str, List[str]]:
+    """Read the values of the TXT records of some owners from a zone file stream.
+
+    Only one chunk of the zone file is held in memory at a time.
+
+    Args:
+        read: the function reading up to a number of bytes from the stream.
+        owners: the owner names of the records.
+
+    Returns:
+        the values of the records, by owner.
+    """
+    values: Dict[str, List[str]] = {owner: [] for owner in owners}
+    encoded_owners = {owner.encode("utf-8"): owner for owner in owners}
+    for line in _iter_lines(read):
+        fields = line.split(None, 1)
+        if not fields or fields[0] not in encoded_owners:
+            continue
+        match = TXT_VALUE_PATTERN.search(line.decode("utf-8"))
+        if match:
+            values[encoded_owners[fields[0]]].append(match.group(1))
+    return values
+
+
+def rewrite_zone_stream(
+    read: Callable[[int], bytes],
+    write: Callable[[bytes], object],
+    changes: Mapping[str, str | None],
+) -> None:
+    """Copy a zone file from a stream to another, replacing the records of some owners.
+
+    Only one chunk of the zone file is held in memory at a time.
+
+    Args:
+        read: the function reading up to a number of bytes from the source stream.
+        write: the function writing bytes to the target stream.
+        changes: the new ACME challenge of each owner, or None to only remove its records.
+    """
+    owners = {owner.encode("utf-8") for owner in changes}
+    for line in _iter_lines(read):
+        fields = line.split(None, 1)
+        if fields and not fields[0].startswith(b";") and fields[0] in owners:
+            logger.info("Removing existing DNS record %s", fields[0].decode("utf-8"))
+            continue
+        write(line)
+    for owner, value in changes.items():
+        if value is not None:
+            write(RECORD_CONTENT.format(record=owner, value=value).encode("utf-8"))
+
+
+def rewrite_zone_file(path: Path, changes: Mapping[str, str | None]) -> None:
+    """Rewrite a zone file line by line, replacing the records of some owners.
+
+    The new content is written to a temporary file, which then atomically replaces the zone file,
+    so readers never see a partially written zone.
+
+    Args:
+        path: the zone file path.
+        changes: the new ACME challenge of each owner, or None to only remove its records.
+    """
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f".{path.name}.", delete=False
+    ) as target:
+        try:
+            with open(path, "rb") as source:
+                rewrite_zone_stream(source.read, target.write, changes)
+            os.chmod(target.name, stat.S_IMODE(os.stat(path).st_mode))
+        except BaseException:
+            os.unlink(target.name)
+            raise
+    os.replace(target.name, path)
@@ -0,0 +1,96 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Benchmark of the HTTP Basic authentication, with and without the verified credential cache.
+
+Every request of a client authenticates with the same credentials, as lego does. The first
+request of the cached authentication verifies the password, the following ones hit the cache.
+
+Run from the httprequest_lego_provider directory with `python -m benchmarks.authentication`, with
+DJANGO_SETTINGS_MODULE set to api.tests.settings; the users are created in an in-memory
+database.
+"""
+
+import argparse
+import base64
+import json
+import os
+import statistics
+import time
+
+import django
+from django.conf import settings
+
+
+def _setup() -> None:
+    """Set Django up with an in-memory database."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api.tests.settings")
+    settings.DATABASES["default"]["NAME"] = ":memory:"
+    django.setup()
+    # pylint: disable=import-outside-toplevel
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def _measure(authentication, request, requests: int) -> dict:
+    """Measure the wall clock and CPU time of authenticating the same request repeatedly.
+
+    Args:
+        authentication: the authentication class instance.
+        request: the request to authenticate.
+        requests: the number of times to authenticate the request.
+
+    Returns:
+        the mean and median wall clock time, and the mean CPU time, in milliseconds.
+    """
+    durations = []
+    cpu_start = time.process_time()
+    for _ in range(requests):
+        start = time.perf_counter()
+        authentication.authenticate(request)
+        durations.append(time.perf_counter() - start)
+    cpu = time.process_time() - cpu_start
+    return {
+        "mean_ms": statistics.mean(durations) * 1000,
+        "p50_ms": statistics.median(durations) * 1000,
+        "cpu_ms": cpu / requests * 1000,
+    }
+
+
+def run(requests: int) -> dict:
+    """Run the benchmark.
+
+    Args:
+        requests: the number of requests authenticated by each authentication class.
+
+    Returns:
+        the timings of the uncached and cached authentication.
+    """
+    _setup()
+    # pylint: disable=import-outside-toplevel
+    from api.authentication import CachedBasicAuthentication, credential_cache
+    from django.contrib.auth.models import User
+    from django.test import RequestFactory
+    from rest_framework.authentication import BasicAuthentication
+
+    User.objects.create_user("lego", password="lego-password")
+    credentials = base64.b64encode(b"lego:lego-password").decode("utf-8")
+    request = RequestFactory().post("/present", HTTP_AUTHORIZATION=f"Basic {credentials}")
+    credential_cache.clear()
+    return {
+        "requests": requests,
+        "uncached": _measure(BasicAuthentication(), request, requests),
+        "cached": _measure(CachedBasicAuthentication(), request, requests),
+    }
+
+
+def main() -> None:
+    """Parse the command line arguments and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests), indent=2))
+
+
+if __name__ == "__main__":
+    main()
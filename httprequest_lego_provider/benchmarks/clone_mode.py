@@ -0,0 +1,83 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Benchmark of the full, sparse and bare clone modes against a large repository.
+
+Run from the httprequest_lego_provider directory with `python -m benchmarks.clone_mode`.
+"""
+
+import argparse
+import json
+import secrets
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from api import dns
+
+from .repositories import configure_git_identity, create_bare_repository
+
+
+def _directory_size(path: Path) -> int:
+    """Compute the size of the files in a directory.
+
+    Args:
+        path: the directory.
+
+    Returns:
+        the total size in bytes.
+    """
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def run(commits: int, zones: int, records: int) -> dict:
+    """Run the benchmark.
+
+    Args:
+        commits: number of commits in the generated repository history.
+        zones: number of zone files in the generated repository.
+        records: number of records in each zone file.
+
+    Returns:
+        the time to commit the first and a second record, and the size of the mirror on disk,
+        which is the amount of data transferred from the remote, for each clone mode.
+    """
+    configure_git_identity()
+    results = {}
+    with TemporaryDirectory() as tmp_dir:
+        repository_url = create_bare_repository(
+            Path(tmp_dir, "remote.git"), commits, zones, records
+        )
+        for mode in ("full", "sparse", "bare"):
+            mirror_dir = Path(tmp_dir, f"mirrors-{mode}")
+            with patch.object(dns, "GIT_REPO_URL", repository_url), patch.object(
+                dns, "GIT_MIRROR_DIR", str(mirror_dir)
+            ), patch.object(dns, "GIT_COMMIT_WINDOW", 0), patch.object(
+                dns, "GIT_CLONE_MODE", mode
+            ):
+                start = time.perf_counter()
+                dns.write_dns_record(f"_acme-challenge.{mode}1.zone0.com", secrets.token_hex())
+                first_commit_seconds = time.perf_counter() - start
+                start = time.perf_counter()
+                dns.write_dns_record(f"_acme-challenge.{mode}2.zone1.com", secrets.token_hex())
+                second_commit_seconds = time.perf_counter() - start
+            results[mode] = {
+                "first_commit_seconds": first_commit_seconds,
+                "second_commit_seconds": second_commit_seconds,
+                "mirror_bytes": _directory_size(mirror_dir),
+            }
+    return results
+
+
+def main() -> None:
+    """Parse the command line arguments and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commits", type=int, default=5000)
+    parser.add_argument("--zones", type=int, default=300)
+    parser.add_argument("--records", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(run(args.commits, args.zones, args.records), indent=2))
+
+
+if __name__ == "__main__":
+    main()
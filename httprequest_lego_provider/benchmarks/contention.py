@@ -0,0 +1,115 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Benchmark of parallel writers, like scaled out units, pushing to the same branch.
+
+Run from the httprequest_lego_provider directory with `python -m benchmarks.contention`.
+"""
+
+import argparse
+import json
+import secrets
+import statistics
+import threading
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from api.mirror import RepositoryMirror
+from api.writer import RecordChange, RecordWriter
+
+from .repositories import configure_git_identity, create_bare_repository
+
+
+def _send_requests(writer: RecordWriter, prefix: str, requests: int) -> list[RecordChange]:
+    """Submit record changes one after the other, waiting for each to be pushed.
+
+    Args:
+        writer: the writer to submit the changes to.
+        prefix: prefix of the hostnames, unique to the writer.
+        requests: number of changes to submit.
+
+    Returns:
+        the processed changes.
+    """
+    changes = []
+    for index in range(requests):
+        change = RecordChange(
+            f"_acme-challenge.{prefix}-host{index}.zone{index % 10}.com", secrets.token_hex()
+        )
+        writer.submit(change)
+        change.wait()
+        changes.append(change)
+    return changes
+
+
+def run(writers: list[int], requests: int, retries: int, backoff: float) -> list[dict]:
+    """Run the benchmark.
+
+    Args:
+        writers: the numbers of parallel writers to benchmark.
+        requests: number of changes submitted by each writer.
+        retries: the maximum number of retries of a rejected push.
+        backoff: the base delay in seconds before retrying a rejected push.
+
+    Returns:
+        the throughput, failures and retries per change for each number of writers.
+    """
+    configure_git_identity()
+    results = []
+    for count in writers:
+        with TemporaryDirectory() as tmp_dir:
+            remote_path = Path(tmp_dir, "remote.git")
+            create_bare_repository(remote_path, 0, 10, 100)
+            record_writers = [
+                RecordWriter(
+                    RepositoryMirror(
+                        str(remote_path), "main", Path(tmp_dir, f"mirror{index}"), "bench"
+                    ),
+                    0,
+                    retries,
+                    backoff,
+                )
+                for index in range(count)
+            ]
+            changes: list[RecordChange] = []
+            threads = [
+                threading.Thread(
+                    target=lambda writer, prefix: changes.extend(
+                        _send_requests(writer, prefix, requests)
+                    ),
+                    args=(writer, f"writer{index}"),
+                )
+                for index, writer in enumerate(record_writers)
+            ]
+            start = time.monotonic()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - start
+            retry_counts = [change.retries for change in changes]
+            results.append(
+                {
+                    "writers": count,
+                    "changes_per_second": len(changes) / elapsed,
+                    "failed_changes": sum(1 for change in changes if change.error),
+                    "mean_retries": statistics.mean(retry_counts),
+                    "max_retries": max(retry_counts),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    """Parse the command line arguments and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--backoff", type=float, default=0.2)
+    args = parser.parse_args()
+    print(json.dumps(run(args.writers, args.requests, args.retries, args.backoff), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Benchmark of a fresh clone per request against the persistent repository mirror.
+
+Run from the httprequest_lego_provider directory with `python -m benchmarks.mirror`.
+"""
+
+import argparse
+import io
+import json
+import secrets
+import statistics
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from api import dns, zone
+from git import Repo
+
+from .repositories import configure_git_identity, create_bare_repository
+
+
+def _write_with_fresh_clone(repository_url: str, fqdn: str, value: str) -> None:
+    """Write a DNS record cloning the repository from scratch, as done before the mirror.
+
+    Args:
+        repository_url: the repository's connection string.
+        fqdn: the FQDN for which to add a record.
+        value: the record value.
+    """
+    _, base_url, branch = dns.parse_repository_url(repository_url)
+    with TemporaryDirectory() as tmp_dir:
+        repo = Repo.clone_from(base_url, tmp_dir, branch=branch)
+        domain, subdomain = zone.get_domain_and_subdomain_from_fqdn(fqdn)
+        filename = zone.FILENAME_TEMPLATE.format(domain=domain)
+        dns_record_file = Path(tmp_dir, filename)
+        new_content = zone.remove_subdomain_entries_from_file_content(
+            io.StringIO(dns_record_file.read_text("utf-8")), [subdomain]
+        )
+        new_content.append(zone.RECORD_CONTENT.format(record=subdomain, value=value))
+        dns_record_file.write_text("".join(new_content), encoding="utf-8")
+        repo.index.add([filename])
+        repo.git.commit("-m", f"Add {fqdn} record")
+        repo.remote(name="origin").push()
+
+
+def _time_requests(write, requests: int) -> list[float]:
+    """Time a number of record writes.
+
+    Args:
+        write: the function writing a record for a FQDN and a value.
+        requests: number of records to write.
+
+    Returns:
+        the duration of each write in seconds.
+    """
+    durations = []
+    for index in range(requests):
+        start = time.perf_counter()
+        write(f"_acme-challenge.host{index}.zone0.com", secrets.token_hex())
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def run(requests: int, commits: int, zones: int, records: int) -> dict:
+    """Run the benchmark.
+
+    Args:
+        requests: number of record writes to time for each strategy.
+        commits: number of commits in the generated repository history.
+        zones: number of zone files in the generated repository.
+        records: number of records in each zone file.
+
+    Returns:
+        the mean and median duration of a write for each strategy.
+    """
+    configure_git_identity()
+    results = {}
+    with TemporaryDirectory() as tmp_dir:
+        repository_url = create_bare_repository(
+            Path(tmp_dir, "fresh.git"), commits, zones, records
+        )
+        results["fresh_clone"] = _time_requests(
+            lambda fqdn, value: _write_with_fresh_clone(repository_url, fqdn, value), requests
+        )
+        repository_url = create_bare_repository(
+            Path(tmp_dir, "mirror.git"), commits, zones, records
+        )
+        with patch.object(dns, "GIT_REPO_URL", repository_url), patch.object(
+            dns, "GIT_MIRROR_DIR", str(Path(tmp_dir, "mirrors"))
+        ), patch.object(dns, "GIT_COMMIT_WINDOW", 0):
+            results["mirror"] = _time_requests(dns.write_dns_record, requests)
+    return {
+        strategy: {
+            "mean_seconds": statistics.mean(durations),
+            "median_seconds": statistics.median(durations),
+        }
+        for strategy, durations in results.items()
+    }
+
+
+def main() -> None:
+    """Parse the command line arguments and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--commits", type=int, default=5000)
+    parser.add_argument("--zones", type=int, default=50)
+    parser.add_argument("--records", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, args.commits, args.zones, args.records), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Benchmark of each phase of the DNS write path as the history, zones and concurrency grow.
+
+Every combination of the history lengths, zone counts, zone sizes and concurrency levels is run
+against a freshly generated local bare repository. Each client thread adds then removes its own
+records with `write_dns_record` and `remove_dns_record`, and every commit of the writer is split
+into its phases:
+
+- clone: cloning the mirror on first use, fetching and resetting it afterwards.
+- edit: editing the zone files.
+- commit: staging and committing the changes, or writing the objects in bare mode.
+- push: pushing the commit.
+
+Run from the httprequest_lego_provider directory with `python -m benchmarks.phases`; the results
+are printed as JSON, or written to the file given with `--output`.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import secrets
+import statistics
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from api import dns, writer
+from api.mirror import RepositoryMirror
+from git import Git
+
+from .repositories import configure_git_identity, create_bare_repository
+
+PHASES = ("clone", "edit", "commit", "push")
+
+
+class PhaseTimer:
+    """Collect the duration of the phases of the commits made by the record writers.
+
+    Attributes:
+        durations: the durations in seconds of each phase, by operation and phase.
+    """
+
+    def __init__(self):
+        """Initialize the timer."""
+        self.durations: dict[str, dict[str, list[float]]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _timed(self, phase: str, function):
+        """Wrap a function to add its duration to a phase of the current commit.
+
+        Args:
+            phase: the phase the function belongs to.
+            function: the function to wrap.
+
+        Returns:
+            the wrapped function.
+        """
+
+        def wrapper(*args, **kwargs):
+            """Call the function and time it.
+
+            Args:
+                args: positional arguments for the function.
+                kwargs: keyword arguments for the function.
+
+            Returns:
+                the result of the function.
+            """
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                phases = getattr(self._local, "phases", None)
+                if phases is not None:
+                    phases[phase] = phases.get(phase, 0) + time.perf_counter() - start
+
+        return wrapper
+
+    def _commit_and_push(self, function):
+        """Wrap the commit method of a writer to record the phases of each commit.
+
+        The commit phase is what remains of the commit duration once the other phases are
+        accounted for.
+
+        Args:
+            function: the commit method to wrap.
+
+        Returns:
+            the wrapped method.
+        """
+
+        def wrapper(record_writer, changes, changes_by_filename):
+            """Commit and push the changes, recording the duration of the phases.
+
+            Args:
+                record_writer: the writer.
+                changes: the changes to push.
+                changes_by_filename: the same changes by zone filename.
+
+            Returns:
+                the result of the commit method.
+            """
+            self._local.phases = {}
+            start = time.perf_counter()
+            try:
+                return function(record_writer, changes, changes_by_filename)
+            finally:
+                phases = self._local.phases
+                self._local.phases = None
+                total = time.perf_counter() - start
+                phases["commit"] = total - sum(phases.values())
+                operation = (
+                    "write"
+                    if all(change.value is not None for change in changes)
+                    else "remove" if all(change.value is None for change in changes) else "mixed"
+                )
+                with self._lock:
+                    by_phase = self.durations.setdefault(operation, {})
+                    for phase, duration in phases.items():
+                        by_phase.setdefault(phase, []).append(duration)
+
+        return wrapper
+
+    def patch(self) -> ExitStack:
+        """Instrument the writers and mirrors.
+
+        Returns:
+            the context manager removing the instrumentation on exit.
+        """
+        stack = ExitStack()
+        stack.enter_context(
+            patch.object(RepositoryMirror, "_sync", self._timed("clone", RepositoryMirror._sync))
+        )
+        stack.enter_context(
+            patch.object(writer, "edit_zone_files", self._timed("edit", writer.edit_zone_files))
+        )
+        stack.enter_context(
+            patch.object(writer, "_edit_blob", self._timed("edit", writer._edit_blob))
+        )
+        stack.enter_context(
+            patch.object(writer, "_push_to_origin", self._timed("push", writer._push_to_origin))
+        )
+        for writer_class in (writer.RecordWriter, writer.BareRecordWriter):
+            stack.enter_context(
+                patch.object(
+                    writer_class,
+                    "_commit_and_push",
+                    self._commit_and_push(writer_class._commit_and_push),
+                )
+            )
+        return stack
+
+
+def _summarize(durations: list[float]) -> dict:
+    """Summarize durations.
+
+    Args:
+        durations: the durations in seconds.
+
+    Returns:
+        the count, and the mean, median and 95th percentile in milliseconds.
+    """
+    p95 = statistics.quantiles(durations, n=20)[-1] if len(durations) > 1 else durations[0]
+    return {
+        "count": len(durations),
+        "mean_ms": statistics.mean(durations) * 1000,
+        "p50_ms": statistics.median(durations) * 1000,
+        "p95_ms": p95 * 1000,
+    }
+
+
+def _client(client: int, zones: int, requests: int, latencies: dict[str, list[float]]) -> None:
+    """Add then remove records, timing each request.
+
+    Args:
+        client: the index of the client, distinguishing its records.
+        zones: number of zone files in the repository, across which the records are spread.
+        requests: number of records to add and remove.
+        latencies: the request durations in seconds, by operation, to add to.
+    """
+    for index in range(requests):
+        fqdn = f"_acme-challenge.client{client}-{index}.zone{index % zones}.com"
+        for operation, request in (
+            ("write", lambda fqdn=fqdn: dns.write_dns_record(fqdn, secrets.token_hex())),
+            ("remove", lambda fqdn=fqdn: dns.remove_dns_record(fqdn)),
+        ):
+            start = time.perf_counter()
+            request()
+            latencies[operation].append(time.perf_counter() - start)
+
+
+def _run_case(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    tmp_dir: Path,
+    mode: str,
+    commits: int,
+    zones: int,
+    records: int,
+    concurrency: int,
+    requests: int,
+) -> dict:
+    """Benchmark one combination of the parameters.
+
+    Args:
+        tmp_dir: directory where to create the repository and the mirror.
+        mode: the clone mode of the mirror.
+        commits: number of commits in the generated repository history.
+        zones: number of zone files in the generated repository.
+        records: number of records in each zone file.
+        concurrency: number of clients sending requests at the same time.
+        requests: number of records each client adds and removes.
+
+    Returns:
+        the request latencies and the phase durations, by operation.
+    """
+    repository_url = create_bare_repository(Path(tmp_dir, "remote.git"), commits, zones, records)
+    timer = PhaseTimer()
+    latencies: dict[str, list[float]] = {"write": [], "remove": []}
+    with timer.patch(), patch.object(dns, "GIT_REPO_URL", repository_url), patch.object(
+        dns, "GIT_MIRROR_DIR", str(Path(tmp_dir, "mirrors"))
+    ), patch.object(dns, "GIT_CLONE_MODE", mode), patch.object(dns, "GIT_COMMIT_WINDOW", 0):
+        threads = [
+            threading.Thread(target=_client, args=(client, zones, requests, latencies))
+            for client in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return {
+        "mode": mode,
+        "commits": commits,
+        "zones": zones,
+        "records": records,
+        "concurrency": concurrency,
+        "latency": {operation: _summarize(values) for operation, values in latencies.items()},
+        "phases": {
+            operation: {
+                phase: _summarize(by_phase[phase]) for phase in PHASES if phase in by_phase
+            }
+            for operation, by_phase in timer.durations.items()
+        },
+    }
+
+
+def run(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    modes: list[str],
+    commits: list[int],
+    zones: list[int],
+    records: list[int],
+    concurrency: list[int],
+    requests: int,
+) -> dict:
+    """Run the benchmark.
+
+    Args:
+        modes: the clone modes of the mirror.
+        commits: the numbers of commits in the generated repository history.
+        zones: the numbers of zone files in the generated repository.
+        records: the numbers of records in each zone file.
+        concurrency: the numbers of clients sending requests at the same time.
+        requests: number of records each client adds and removes.
+
+    Returns:
+        the environment of the run and the results of every combination of the parameters.
+    """
+    configure_git_identity()
+    results = []
+    for case in itertools.product(modes, commits, zones, records, concurrency):
+        with TemporaryDirectory() as tmp_dir:
+            results.append(_run_case(Path(tmp_dir), *case, requests))
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "git": ".".join(str(part) for part in Git().version_info),
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    """Parse the command line arguments and output the results as JSON."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--modes", nargs="+", choices=["full", "sparse", "bare"], default=["full", "bare"]
+    )
+    parser.add_argument("--commits", type=int, nargs="+", default=[0, 5000])
+    parser.add_argument("--zones", type=int, nargs="+", default=[10, 300])
+    parser.add_argument("--records", type=int, nargs="+", default=[100, 10000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="file to write the results to")
+    args = parser.parse_args()
+    results = json.dumps(
+        run(args.modes, args.commits, args.zones, args.records, args.concurrency, args.requests),
+        indent=2,
+    )
+    if args.output:
+        args.output.write_text(results + "\n", encoding="utf-8")
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
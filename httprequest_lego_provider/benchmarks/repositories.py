@@ -0,0 +1,95 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Synthetic DNS records repositories for benchmarking."""
+
+import io
+import os
+import subprocess  # nosec B404
+from pathlib import Path
+
+COMMITTER = "bench <bench@example.com> 1700000000 +0000"
+RECORD = "host{index} 600 IN TXT \042{value}\042\n"
+
+
+def _zone_content(records: int, challenge: str | None = None) -> bytes:
+    """Build the content of a zone file.
+
+    Args:
+        records: number of static records in the zone.
+        challenge: value of the ACME challenge record to append, if any.
+
+    Returns:
+        the encoded zone file.
+    """
+    content = "".join(RECORD.format(index=index, value=f"v{index}") for index in range(records))
+    if challenge:
+        content += f"_acme-challenge 600 IN TXT \042{challenge}\042\n"
+    return content.encode("utf-8")
+
+
+def _write_commit(stream: io.BytesIO, message: str, files: dict[str, bytes]) -> None:
+    """Append a commit on top of the main branch to a git fast-import stream.
+
+    Args:
+        stream: the fast-import stream.
+        message: the commit message.
+        files: the modified files by path.
+    """
+    encoded_message = message.encode("utf-8")
+    stream.write(b"commit refs/heads/main\n")
+    stream.write(f"committer {COMMITTER}\n".encode("utf-8"))
+    stream.write(f"data {len(encoded_message)}\n".encode("utf-8") + encoded_message + b"\n")
+    for path, content in files.items():
+        stream.write(f"M 100644 inline {path}\ndata {len(content)}\n".encode("utf-8"))
+        stream.write(content + b"\n")
+    stream.write(b"\n")
+
+
+def create_bare_repository(path: Path, commits: int, zones: int, records: int) -> str:
+    """Create a bare repository with a history of ACME challenge commits.
+
+    The first commit creates the zone files `zone<N>.com.domain`; each following commit adds or
+    removes a challenge record in one of them, like the service does.
+
+    Args:
+        path: where to create the repository.
+        commits: number of challenge commits in the history.
+        zones: number of zone files.
+        records: number of static records in each zone file.
+
+    Returns:
+        the repository connection string in the format expected by the api.dns module.
+    """
+    subprocess.run(  # nosec B603 B607
+        ["git", "init", "--quiet", "--bare", "--initial-branch", "main", str(path)], check=True
+    )
+    for key in ("uploadpack.allowFilter", "uploadpack.allowAnySHA1InWant"):
+        subprocess.run(  # nosec B603 B607
+            ["git", "-C", str(path), "config", key, "true"], check=True
+        )
+    stream = io.BytesIO()
+    _write_commit(
+        stream,
+        "Initial zones",
+        {f"zone{zone}.com.domain": _zone_content(records) for zone in range(zones)},
+    )
+    for index in range(commits):
+        zone = index // 2 % zones
+        challenge = None if index % 2 else f"challenge{index}"
+        action = "Remove" if index % 2 else "Add"
+        _write_commit(
+            stream,
+            f"{action} _acme-challenge.zone{zone}.com record",
+            {f"zone{zone}.com.domain": _zone_content(records, challenge)},
+        )
+    subprocess.run(  # nosec B603 B607
+        ["git", "fast-import", "--quiet"], cwd=path, input=stream.getvalue(), check=True
+    )
+    subprocess.run(["git", "-C", str(path), "gc", "--quiet"], check=True)  # nosec B603 B607
+    return f"file://bench@localhost{path}@main"
+
+
+def configure_git_identity() -> None:
+    """Provide a committer identity for the benchmarked git operations."""
+    for variable in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        os.environ.setdefault(variable, "bench@example.com")
@@ -0,0 +1,106 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Benchmark of the number of pushes made by the record writer as the request rate grows.
+
+Run from the httprequest_lego_provider directory with `python -m benchmarks.writer`.
+"""
+
+import argparse
+import json
+import secrets
+import threading
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from api.mirror import RepositoryMirror
+from api.writer import RecordChange, RecordWriter
+from git import Repo
+
+from .repositories import configure_git_identity, create_bare_repository
+
+
+def _request(writer: RecordWriter, change: RecordChange) -> None:
+    """Submit a record change and wait for it to be pushed.
+
+    Args:
+        writer: the writer to submit the change to.
+        change: the change to submit.
+    """
+    writer.submit(change)
+    change.wait()
+
+
+def _send_requests(writer: RecordWriter, rate: float, duration: float) -> int:
+    """Submit record changes at a fixed rate, each from its own thread, like lego clients do.
+
+    Args:
+        writer: the writer to submit the changes to.
+        rate: number of changes per second.
+        duration: for how long to submit changes, in seconds.
+
+    Returns:
+        the number of submitted changes.
+    """
+    threads = []
+    start = time.monotonic()
+    index = 0
+    while time.monotonic() - start < duration:
+        change = RecordChange(
+            f"_acme-challenge.host{index}.zone{index % 10}.com", secrets.token_hex()
+        )
+        thread = threading.Thread(target=_request, args=(writer, change))
+        thread.start()
+        threads.append(thread)
+        index += 1
+        time.sleep(1 / rate)
+    for thread in threads:
+        thread.join()
+    return index
+
+
+def run(rates: list[float], duration: float, window: float) -> list[dict]:
+    """Run the benchmark.
+
+    Args:
+        rates: the request rates to benchmark, in changes per second.
+        duration: for how long to submit changes at each rate, in seconds.
+        window: the batching window of the writer, in seconds.
+
+    Returns:
+        the number of requests and pushes per minute for each rate.
+    """
+    configure_git_identity()
+    results = []
+    for rate in rates:
+        with TemporaryDirectory() as tmp_dir:
+            create_bare_repository(Path(tmp_dir, "remote.git"), 0, 10, 100)
+            mirror = RepositoryMirror(
+                str(Path(tmp_dir, "remote.git")), "main", Path(tmp_dir, "mirror"), "bench"
+            )
+            start = time.monotonic()
+            requests = _send_requests(RecordWriter(mirror, window), rate, duration)
+            elapsed_minutes = (time.monotonic() - start) / 60
+            pushes = int(Repo(Path(tmp_dir, "remote.git")).git.rev_list("--count", "main")) - 1
+            results.append(
+                {
+                    "rate": rate,
+                    "requests_per_minute": requests / elapsed_minutes,
+                    "pushes_per_minute": pushes / elapsed_minutes,
+                }
+            )
+    return results
+
+
+def main() -> None:
+    """Parse the command line arguments and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rates", type=float, nargs="+", default=[1, 5, 25, 100])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--window", type=float, default=0.5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rates, args.duration, args.window), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Benchmark of the peak memory of a zone file edit, parsed in memory or rewritten line by line.
+
+Run from the httprequest_lego_provider directory with `python -m benchmarks.zone_memory`.
+"""
+
+import argparse
+import json
+import secrets
+import time
+import tracemalloc
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from api import zone
+
+from .repositories import RECORD
+
+MEGABYTE = 1024 * 1024
+
+
+def _write_zone(path: Path, size: int) -> None:
+    """Write a zone file of about a given size, a record at a time.
+
+    Args:
+        path: the zone file path.
+        size: the size of the zone file in bytes.
+    """
+    written = 0
+    with open(path, "w", encoding="utf-8") as zone_file:
+        while written < size:
+            written += zone_file.write(RECORD.format(index=written, value=f"v{written}"))
+
+
+def _parsed_edit(path: Path, value: str) -> None:
+    """Edit a record of the zone file through the in memory zone model.
+
+    Args:
+        path: the zone file path.
+        value: the ACME challenge of the record.
+    """
+    zone_file = zone.ZoneFile(path.read_text("utf-8"))
+    zone_file.remove(["_acme-challenge"])
+    zone_file.add("_acme-challenge", value)
+    path.write_bytes(zone_file.render().encode("utf-8"))
+
+
+def _streamed_edit(path: Path, value: str) -> None:
+    """Edit a record of the zone file rewriting it line by line.
+
+    Args:
+        path: the zone file path.
+        value: the ACME challenge of the record.
+    """
+    zone.rewrite_zone_file(path, {"_acme-challenge": value})
+
+
+def _measure(function, path: Path) -> dict:
+    """Measure the duration and the peak memory allocated by an edit.
+
+    Args:
+        function: the edit function.
+        path: the zone file path.
+
+    Returns:
+        the duration in milliseconds and the peak memory in megabytes of the edit.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(path, secrets.token_hex())
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": duration * 1000, "peak_mb": peak / MEGABYTE}
+
+
+def run(sizes: list[int]) -> list[dict]:
+    """Run the benchmark.
+
+    The durations are measured with tracemalloc enabled, so they are only comparable between them.
+
+    Args:
+        sizes: the sizes of the zones to benchmark, in megabytes.
+
+    Returns:
+        for each zone size, the duration and peak memory of an edit of the parsed zone file and of
+        a line by line rewrite.
+    """
+    results = []
+    for size in sizes:
+        with TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir, "zone0.com.domain")
+            _write_zone(path, size * MEGABYTE)
+            parsed = _measure(_parsed_edit, path)
+            streamed = _measure(_streamed_edit, path)
+        results.append(
+            {
+                "size_mb": size,
+                "parsed_ms": parsed["ms"],
+                "parsed_peak_mb": parsed["peak_mb"],
+                "streamed_ms": streamed["ms"],
+                "streamed_peak_mb": streamed["peak_mb"],
+            }
+        )
+    return results
+
+
+def main() -> None:
+    """Parse the command line arguments and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
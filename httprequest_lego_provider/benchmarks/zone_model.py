@@ -0,0 +1,127 @@
+# Copyright 2025 Canonical Ltd.
+# See LICENSE file for licensing details.
+"""Benchmark of the indexed zone model against the line by line scan of the zone file.
+
+Run from the httprequest_lego_provider directory with `python -m benchmarks.zone_model`.
+"""
+
+import argparse
+import io
+import json
+import secrets
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from api import zone
+
+from .repositories import RECORD
+
+
+def _mean_seconds(function, repeats: int) -> float:
+    """Time a function.
+
+    Args:
+        function: the function to time.
+        repeats: number of calls to average.
+
+    Returns:
+        the mean duration of a call in seconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def _scan_edit(content: str, subdomain: str, value: str) -> str:
+    """Edit a record scanning every line of the zone, as done before the zone model.
+
+    Args:
+        content: the zone file content.
+        subdomain: the owner name of the record.
+        value: the ACME challenge of the record.
+
+    Returns:
+        the new zone file content.
+    """
+    new_content = zone.remove_subdomain_entries_from_file_content(
+        io.StringIO(content), [subdomain]
+    )
+    new_content.append(zone.RECORD_CONTENT.format(record=subdomain, value=value))
+    return "".join(new_content)
+
+
+def run(sizes: list[int], repeats: int) -> list[dict]:
+    """Run the benchmark.
+
+    Args:
+        sizes: the numbers of lines of the zones to benchmark.
+        repeats: number of edits to average.
+
+    Returns:
+        for each zone size, the time in milliseconds of an edit with the line by line scan, of a
+        parse, of an edit of the indexed model, of a render, and of a full edit of the zone file
+        with a cached parse.
+    """
+    results = []
+    for size in sizes:
+        content = "".join(RECORD.format(index=index, value=f"v{index}") for index in range(size))
+        zone_file = zone.ZoneFile(content)
+
+        def _indexed_edit(zone_file=zone_file):
+            """Edit a record of the indexed model.
+
+            Args:
+                zone_file: the zone file to edit.
+            """
+            zone_file.remove(["_acme-challenge"])
+            zone_file.add("_acme-challenge", secrets.token_hex())
+
+        with TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir, "zone0.com.domain")
+            blob_shas = [zone.store_zone_file(path, zone.ZoneFile(content))]
+
+            def _file_edit(path=path, blob_shas=blob_shas):
+                """Edit a record of the zone file, from the cached parse of the previous edit.
+
+                Args:
+                    path: the zone file.
+                    blob_shas: the blob SHAs of the successive zone file contents.
+                """
+                zone_file = zone.load_zone_file(path, blob_shas[-1])
+                zone_file.remove(["_acme-challenge"])
+                zone_file.add("_acme-challenge", secrets.token_hex())
+                blob_shas.append(zone.store_zone_file(path, zone_file))
+
+            results.append(
+                {
+                    "lines": size,
+                    "scan_edit_ms": _mean_seconds(
+                        lambda content=content: _scan_edit(
+                            content, "_acme-challenge", secrets.token_hex()
+                        ),
+                        repeats,
+                    )
+                    * 1000,
+                    "parse_ms": _mean_seconds(lambda content=content: zone.ZoneFile(content), 1)
+                    * 1000,
+                    "indexed_edit_ms": _mean_seconds(_indexed_edit, repeats) * 1000,
+                    "render_ms": _mean_seconds(zone_file.render, repeats) * 1000,
+                    "cached_file_edit_ms": _mean_seconds(_file_edit, repeats) * 1000,
+                }
+            )
+    return results
+
+
+def main() -> None:
+    """Parse the command line arguments and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.repeats), indent=2))
+
+
+if __name__ == "__main__":
+    main()
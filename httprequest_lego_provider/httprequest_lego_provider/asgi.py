@@ -13,7 +13,14 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from opentelemetry.instrumentation.django import DjangoInstrumentor
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "httprequest_lego_provider.settings")
+# Serve the present and cleanup endpoints with the asynchronous views.
+os.environ.setdefault("DJANGO_ASYNC_RECORD_VIEWS", "true")
+
+# The exporter is configured by the charm when the tracing relation is established.
+if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+    DjangoInstrumentor().instrument()
 
 application = get_asgi_application()
@@ -28,6 +28,12 @@ except json.decoder.JSONDecodeError:
     env_allowed_hosts = []
 ALLOWED_HOSTS = env_allowed_hosts
 
+# The metrics of the gunicorn workers are aggregated through the files of this directory. The
+# variable has to be set before the Prometheus client is imported.
+if os.getenv("DJANGO_METRICS_DIR"):
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.environ["DJANGO_METRICS_DIR"])
+    Path(os.environ["PROMETHEUS_MULTIPROC_DIR"]).mkdir(parents=True, exist_ok=True)
+
 
 # Application definition
 
@@ -51,6 +57,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.queries.QueryCountMiddleware",
 ]
 
 ROOT_URLCONF = "httprequest_lego_provider.urls"
@@ -91,6 +98,23 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+# Optional cache shared by all the units, holding the generation of the authorization index
+# instead of the database, and the permissions loaded by any process.
+if os.getenv("DJANGO_AUTHORIZATION_CACHE_BACKEND"):
+    CACHES["authorization"] = {
+        "BACKEND": os.environ["DJANGO_AUTHORIZATION_CACHE_BACKEND"],
+        "LOCATION": os.getenv("DJANGO_AUTHORIZATION_CACHE_LOCATION", ""),
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -135,13 +159,14 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.BasicAuthentication",
+        "api.authentication.CachedBasicAuthentication",
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.IdCursorPagination",
 }
 
 SIMPLE_JWT = {
@@ -13,7 +13,12 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
 import os
 
 from django.core.wsgi import get_wsgi_application
+from opentelemetry.instrumentation.django import DjangoInstrumentor
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "httprequest_lego_provider.settings")
 
+# The exporter is configured by the charm when the tracing relation is established.
+if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+    DjangoInstrumentor().instrument()
+
 application = get_wsgi_application()